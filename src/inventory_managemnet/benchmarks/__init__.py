@@ -0,0 +1,8 @@
+"""
+Benchmarks for the inventory API.
+
+Run from the project directory, e.g. ``python -m benchmarks.bench_pagination``.
+Every benchmark creates and destroys its own test database, the same way
+``manage.py test`` does, so it never touches the configured data. Set
+``DJANGO_SETTINGS_MODULE`` to run against a different database or cache.
+"""
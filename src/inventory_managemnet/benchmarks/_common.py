@@ -0,0 +1,91 @@
+import contextlib
+import os
+import statistics
+import time
+from decimal import Decimal
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_managemnet.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def bench_database():
+    """
+    Run the block against a throwaway test database
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def bench_user(username='bench'):
+    from django.contrib.auth.models import User
+    user, _ = User.objects.get_or_create(username=username)
+    return user
+
+
+def seed_items(total, user, chunk_size=10000):
+    """
+    Grow the item table to `total` rows with bulk inserts
+    """
+    from inventory_app.models import Item
+
+    start = Item.objects.count()
+    for offset in range(start, total, chunk_size):
+        Item.objects.bulk_create([
+            Item(
+                name=f"Bench item {n:08d}",
+                description=f"Benchmark item number {n}",
+                quantity=n % 500,
+                price=Decimal(n % 100000) / 100,
+                created_by=user,
+            )
+            for n in range(offset, min(offset + chunk_size, total))
+        ])
+
+
+def measure(fn, repeat=50, warmup=3):
+    """
+    Call `fn` repeatedly and return latency percentiles in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'p50': statistics.median(samples),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': statistics.fmean(samples),
+    }
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, round(pct / 100 * (len(sorted_samples) - 1)))
+    return sorted_samples[index]
+
+
+def parse_sizes(value):
+    return [int(size.replace('_', '').lower().replace('k', '000').replace('m', '000000'))
+            for size in value.split(',')]
@@ -0,0 +1,235 @@
+"""
+Throughput and latency of the main API endpoints under concurrent clients.
+
+Seeds a throwaway test database with bulk inserts, then drives each scenario
+with `--concurrency` client threads for `--duration` seconds, in process
+through Django's test client (one WSGI worker with that many threads).
+Reports requests per second, p50/p95/p99 latency and database queries per
+request, the latter read from the Server-Timing header.
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python -m benchmarks.bench_api --items 100k --save baseline.json
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python -m benchmarks.bench_api --items 100k --compare baseline.json
+
+benchmarks.settings runs on SQLite and LocMemCache; with the project
+settings it uses the configured Postgres and Redis instead. --compare exits
+with status 1 when a scenario's RPS drops, or its p95 grows, by more than
+--tolerance percent. Any failed request, an error response or an exception
+raised by a view, also makes the run exit with status 1.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import re
+import sys
+import threading
+import time
+
+from benchmarks._common import bench_database, bench_user, parse_sizes, seed_items, setup, summarize
+
+PASSWORD = 'bench-password'
+SCENARIOS = ('list', 'detail', 'create', 'update', 'auth')
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+class Scenario:
+    """
+    Request factory for one scenario; `request(client, rng)` returns the response
+    """
+
+    def __init__(self, name, targets, token, run_id):
+        self.name = name
+        self.targets = targets
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.run_id = run_id
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def next_number(self):
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+    def request(self, client, rng):
+        if self.name == 'list':
+            return client.get('/api/items/', {'page': rng.randint(1, 20)}, **self.headers)
+        if self.name == 'detail':
+            pk, _ = rng.choice(self.targets)
+            return client.get(f'/api/items/{pk}/', **self.headers)
+        if self.name == 'create':
+            body = {'name': f'Bench create {self.run_id}-{self.next_number()}', 'quantity': 1, 'price': '9.99'}
+            return client.post('/api/items/', body, content_type='application/json', **self.headers)
+        if self.name == 'update':
+            pk, name = rng.choice(self.targets)
+            body = {'name': name, 'quantity': rng.randint(0, 500), 'price': '1.00', 'description': 'Updated'}
+            return client.put(f'/api/items/{pk}/', body, content_type='application/json', **self.headers)
+        return client.post('/api/token/', {'username': 'bench', 'password': PASSWORD}, content_type='application/json')
+
+
+def drive(scenario, concurrency, duration, seed):
+    """
+    Keep `concurrency` clients busy for `duration` seconds; return the figures
+    """
+    from django.db import connection
+    from django.test import Client
+
+    latencies, queries, errors, exceptions = [], [], [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client_loop(index):
+        client = Client()
+        rng = random.Random(seed * 1000 + index)
+        mine, my_queries, failed, raised = [], [], 0, []
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = scenario.request(client, rng)
+                except Exception as e:
+                    # The test client re-raises view exceptions; count them like a 500
+                    mine.append((time.perf_counter() - started) * 1000)
+                    failed += 1
+                    raised.append(f"{type(e).__name__}: {e}")
+                    continue
+                mine.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    failed += 1
+                match = QUERIES.search(response.get('Server-Timing', ''))
+                if match:
+                    my_queries.append(int(match.group(1)))
+        finally:
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+                queries.extend(my_queries)
+                errors.append(failed)
+                exceptions.extend(raised)
+
+    threads = [threading.Thread(target=client_loop, args=(index,)) for index in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        **summarize(latencies or [0.0]),
+        'queries_per_request': sum(queries) / len(queries) if queries else None,
+        'errors': sum(errors),
+        # The distinct exceptions raised, if any, to explain the errors
+        'exceptions': sorted(set(exceptions))[:5],
+    }
+
+
+def run(args):
+    from django.conf import settings
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from inventory_app.models import Item
+    from inventory_app.serializers import ClaimsTokenObtainPairSerializer
+
+    user = bench_user()
+    user.set_password(PASSWORD)
+    user.save()
+    seed_items(args.items, user)
+    targets = list(Item.objects.order_by('?').values_list('id', 'name')[:1000])
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token if settings.JWT_STATELESS_AUTH \
+        else RefreshToken.for_user(user).access_token
+
+    results = {}
+    print(f"{'scenario':>10} {'requests':>9} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'errors':>7}")
+    for name in args.scenarios:
+        scenario = Scenario(name, targets, token, int(time.time()))
+        result = drive(scenario, args.concurrency, args.duration, args.seed)
+        results[name] = result
+        queries = '-' if result['queries_per_request'] is None else f"{result['queries_per_request']:.1f}"
+        print(f"{name:>10} {result['requests']:>9} {result['rps']:>9.0f} {result['p50']:>7.1f}ms "
+              f"{result['p95']:>7.1f}ms {result['p99']:>7.1f}ms {queries:>8} {result['errors']:>7}")
+
+    return {
+        'meta': {
+            'items': args.items,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Print the change against `baseline`; return True if nothing regressed
+    """
+    ok = True
+    print(f"\n{'scenario':>10} {'req/s':>18} {'p95':>22}   (baseline -> now)")
+    for name, now in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        rps_change = (now['rps'] - before['rps']) / before['rps'] * 100 if before['rps'] else 0.0
+        p95_change = (now['p95'] - before['p95']) / before['p95'] * 100 if before['p95'] else 0.0
+        regressed = rps_change < -tolerance or p95_change > tolerance
+        ok = ok and not regressed
+        print(f"{name:>10} {before['rps']:>6.0f} -> {now['rps']:<6.0f}({rps_change:+.0f}%) "
+              f"{before['p95']:>6.1f} -> {now['p95']:<6.1f}ms ({p95_change:+.0f}%){'  REGRESSED' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', default='10k', type=lambda value: parse_sizes(value)[0])
+    parser.add_argument('--concurrency', default=8, type=int)
+    parser.add_argument('--duration', default=10, type=float, help="Seconds per scenario")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), type=lambda value: value.split(','))
+    parser.add_argument('--seed', default=1, type=int)
+    parser.add_argument('--save', metavar='PATH', help="Write the results as baseline JSON")
+    parser.add_argument('--compare', metavar='PATH', help="Compare with a saved baseline")
+    parser.add_argument('--tolerance', default=20, type=float, help="Allowed regression, in percent")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    setup()
+    from django.test import override_settings
+
+    # Per-request log lines would dominate the run; Server-Timing stays on
+    # because it carries the query counts. Failed requests are summed up at
+    # the end instead of logging a traceback each.
+    logging.disable(logging.INFO)
+    logging.getLogger('django.request').disabled = True
+    with bench_database(), override_settings(
+        PERF_SERVER_TIMING=True, SLOW_REQUEST_THRESHOLD_MS=float('inf'), SLOW_QUERY_THRESHOLD_MS=float('inf'),
+    ):
+        report = run(args)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        ok = compare(report, baseline, args.tolerance)
+
+    for name, result in report['results'].items():
+        if result['errors']:
+            ok = False
+            print(f"\n{name}: {result['errors']} requests failed", file=sys.stderr)
+            for exception in result['exceptions']:
+                print(f"  {exception}", file=sys.stderr)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare offset (``?page=N``) and cursor (``?cursor=``) latency on the item list.
+
+    python -m benchmarks.bench_pagination --sizes 10k,100k,1m
+"""
+import argparse
+
+from benchmarks._common import bench_database, bench_user, measure, parse_sizes, seed_items, setup
+
+
+def run(sizes, repeat):
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from inventory_app.models import Item
+    from inventory_app.pagination import CURSOR_ORDERING, cursor_position, encode_cursor
+
+    user = bench_user()
+    client = APIClient()
+    client.force_authenticate(user=user)
+    list_url = reverse('item-list')
+
+    print(f"{'rows':>10} {'depth':>8} {'offset p50':>12} {'cursor p50':>12} {'offset p95':>12} {'cursor p95':>12}")
+    for size in sizes:
+        seed_items(size, user)
+        last_page = max(1, (size + 9) // 10)
+        for label, page in (('first', 1), ('middle', last_page // 2), ('last', last_page)):
+            cursor = ''
+            if page > 1:
+                anchor = Item.objects.order_by(*CURSOR_ORDERING)[(page - 1) * 10 - 1]
+                cursor = encode_cursor(*cursor_position(anchor))
+
+            offset = measure(lambda: client.get(list_url, {'page': page}), repeat)
+            keyset = measure(lambda: client.get(list_url, {'cursor': cursor}), repeat)
+            print(f"{size:>10} {label:>8} {offset['p50']:>10.2f}ms {keyset['p50']:>10.2f}ms "
+                  f"{offset['p95']:>10.2f}ms {keyset['p95']:>10.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10k,100k,1m', type=parse_sizes)
+    parser.add_argument('--repeat', default=30, type=int)
+    args = parser.parse_args()
+
+    setup()
+    with bench_database():
+        run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
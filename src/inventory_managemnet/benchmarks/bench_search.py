@@ -0,0 +1,70 @@
+"""
+Item list search and filter latency at growing table sizes.
+
+Times the first page of each filter plus its exact count, the work the list
+view does on a cache miss. Run against Postgres to exercise the GIN and
+trigram indexes; `--explain` prints each query plan at the largest size.
+
+    python -m benchmarks.bench_search --sizes 100k,1m
+"""
+import argparse
+
+from benchmarks._common import bench_database, bench_user, measure, parse_sizes, seed_items, setup
+
+CASES = {
+    'full text': {'q': 'number 4242'},
+    'prefix': {'name_prefix': 'bench item 00012'},
+    'substring': {'search': 'item 0000424'},
+    'quantity range': {'min_quantity': '100', 'max_quantity': '101'},
+    'price range': {'min_price': '10.00', 'max_price': '10.50'},
+    'created_by': {'created_by': 'bench'},
+}
+
+
+def first_page(params):
+    from inventory_app.models import Item
+    from inventory_app.representations import item_rows, represent_rows
+    from inventory_app.search import filter_items
+
+    items, _ = filter_items(Item.objects.all(), params)
+    return represent_rows(item_rows(items)[:10]), items.count()
+
+
+def explain(params):
+    from inventory_app.models import Item
+    from inventory_app.representations import item_rows
+    from inventory_app.search import filter_items
+
+    items, _ = filter_items(Item.objects.all(), params)
+    return item_rows(items)[:10].explain()
+
+
+def run(sizes, repeat, show_plans):
+    user = bench_user()
+    print(f"{'rows':>10} {'filter':>16} {'matches':>9} {'p50':>10} {'p95':>10}")
+    for size in sizes:
+        seed_items(size, user)
+        for label, params in CASES.items():
+            _, matches = first_page(params)
+            timings = measure(lambda: first_page(params), repeat)
+            print(f"{size:>10} {label:>16} {matches:>9} {timings['p50']:>8.2f}ms {timings['p95']:>8.2f}ms")
+
+    if show_plans:
+        for label, params in CASES.items():
+            print(f"\n-- {label}: {params}\n{explain(params)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='100k,1m', type=parse_sizes)
+    parser.add_argument('--repeat', default=30, type=int)
+    parser.add_argument('--explain', action='store_true')
+    args = parser.parse_args()
+
+    setup()
+    with bench_database():
+        run(args.sizes, args.repeat, args.explain)
+
+
+if __name__ == '__main__':
+    main()
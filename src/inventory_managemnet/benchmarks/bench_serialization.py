@@ -0,0 +1,54 @@
+"""
+Compare ItemSerializer with the fast read path (inventory_app.representations).
+
+Reports milliseconds per 1,000 items, both for rendering alone (rows and
+instances already loaded) and end to end including the query.
+
+    python -m benchmarks.bench_serialization --items 1000
+"""
+import argparse
+
+from benchmarks._common import bench_database, bench_user, measure, seed_items, setup
+
+
+def run(items, repeat):
+    from inventory_app.models import Item
+    from inventory_app.representations import item_rows, represent_items, represent_rows
+    from inventory_app.serializers import ItemSerializer
+
+    seed_items(items, bench_user())
+    queryset = Item.objects.all()[:items]
+    instances = list(Item.objects.select_related('created_by')[:items])
+    rows = list(item_rows(queryset))
+    scale = 1000 / len(rows)
+
+    cases = {
+        'render only': (
+            lambda: ItemSerializer(instances, many=True).data,
+            lambda: represent_rows(rows),
+        ),
+        'query + render': (
+            lambda: ItemSerializer(Item.objects.select_related('created_by')[:items], many=True).data,
+            lambda: represent_items(queryset),
+        ),
+    }
+    print(f"{'case':>16} {'serializer':>12} {'fast path':>12} {'speedup':>8}   (ms per 1,000 items, p50)")
+    for label, (slow, fast) in cases.items():
+        slow_ms = measure(slow, repeat)['p50'] * scale
+        fast_ms = measure(fast, repeat)['p50'] * scale
+        print(f"{label:>16} {slow_ms:>10.2f}ms {fast_ms:>10.2f}ms {slow_ms / fast_ms:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', default=1000, type=int)
+    parser.add_argument('--repeat', default=30, type=int)
+    args = parser.parse_args()
+
+    setup()
+    with bench_database():
+        run(args.items, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Item detail latency (cache hits) with and without the in-process cache tier.
+
+Uses the remote cache configured for the two-tier `default` cache, so run
+it with Redis up to see the round trip the local tier saves.
+
+    python -m benchmarks.bench_two_tier_cache --requests 2000
+"""
+import argparse
+import itertools
+
+from benchmarks._common import bench_database, bench_user, measure, seed_items, setup
+
+
+def run(requests, items):
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from inventory_app.models import Item
+
+    two_tier = settings.CACHES['default']
+    if two_tier['BACKEND'] != 'inventory_app.cache_backends.TwoTierCache':
+        raise SystemExit("The default cache is not inventory_app.cache_backends.TwoTierCache")
+    remote_alias = two_tier['OPTIONS']['REMOTE']
+    remote_only = dict(settings.CACHES, default=settings.CACHES[remote_alias])
+
+    user = bench_user()
+    client = APIClient()
+    client.force_authenticate(user=user)
+    seed_items(items, user)
+    urls = [reverse('item-detail', kwargs={'pk': pk}) for pk in Item.objects.values_list('id', flat=True)[:items]]
+
+    def hit_every_item():
+        for url in urls:
+            client.get(url)
+
+    print(f"{'cache':>14} {'p50':>9} {'p95':>9} {'p99':>9}   (detail GET on cached items)")
+    for label, cache_settings in (('remote only', remote_only), ('two-tier', settings.CACHES)):
+        with override_settings(CACHES=cache_settings):
+            caches['default'].clear()
+            hit_every_item()
+            next_url = itertools.cycle(urls).__next__
+            stats = measure(lambda: client.get(next_url()), repeat=requests)
+        print(f"{label:>14} {stats['p50']:>7.3f}ms {stats['p95']:>7.3f}ms {stats['p99']:>7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', default=2000, type=int)
+    parser.add_argument('--items', default=100, type=int)
+    args = parser.parse_args()
+
+    setup()
+    with bench_database():
+        run(args.requests, args.items)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Compare sync WSGI and async ASGI throughput on the item read endpoints.
+
+Starts gunicorn (sync views under /api/) and uvicorn (async views under
+/api/async/) with the same number of workers against the configured
+database, then drives each with the same closed-loop load:
+
+    python -m benchmarks.loadtest --workers 4 --concurrency 64 --duration 20
+
+Pass --sync-url/--async-url to load servers started some other way. Unlike
+the other benchmarks this writes to the configured database: --seed grows
+the item table to that many rows.
+"""
+import argparse
+import http.client
+import itertools
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks._common import bench_user, seed_items, setup, summarize
+
+SCENARIOS = {
+    'list': lambda ids: f"items/?page={random.randint(1, 20)}",
+    'detail': lambda ids: f"items/{random.choice(ids)}/",
+    'stock': lambda ids: f"items/{random.choice(ids)}/stock/",
+}
+
+
+def start_servers(workers, sync_port, async_port):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'inventory_managemnet.settings'))
+    commands = [
+        ['gunicorn', 'inventory_managemnet.wsgi:application', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{sync_port}', '--log-level', 'warning'],
+        ['uvicorn', 'inventory_managemnet.asgi:application', '--workers', str(workers),
+         '--host', '127.0.0.1', '--port', str(async_port), '--log-level', 'warning', '--no-access-log'],
+    ]
+    return [subprocess.Popen(command, env=env) for command in commands]
+
+
+def wait_until_up(url, timeout=30):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            connection.request('GET', parts.path)
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    sys.exit(f"Server at {url} did not come up")
+
+
+def load(base_url, scenario, ids, token, concurrency, duration):
+    """
+    Keep `concurrency` requests in flight for `duration` seconds; return throughput and latencies
+    """
+    parts = urlsplit(base_url)
+    headers = {'Authorization': f'Bearer {token}'}
+    samples, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        latencies, failed = [], 0
+        while time.monotonic() < deadline:
+            path = parts.path + SCENARIOS[scenario](ids)
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+        with lock:
+            samples.extend(latencies)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return {'rps': len(samples) / elapsed, 'errors': sum(errors), **summarize(samples or [0.0])}
+
+
+def run(args):
+    from rest_framework_simplejwt.tokens import AccessToken
+    from inventory_app.models import Item
+
+    user = bench_user('loadtest')
+    seed_items(args.seed, user)
+    ids = list(Item.objects.values_list('id', flat=True)[:1000])
+    token = str(AccessToken.for_user(user))
+
+    servers = []
+    if not (args.sync_url and args.async_url):
+        servers = start_servers(args.workers, args.sync_port, args.async_port)
+    targets = {
+        'sync (WSGI)': args.sync_url or f'http://127.0.0.1:{args.sync_port}/api/',
+        'async (ASGI)': args.async_url or f'http://127.0.0.1:{args.async_port}/api/async/',
+    }
+    try:
+        for url in targets.values():
+            wait_until_up(url)
+        print(f"{'scenario':>10} {'target':>14} {'req/s':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'errors':>7}")
+        for scenario, (label, url) in itertools.product(SCENARIOS, targets.items()):
+            result = load(url, scenario, ids, token, args.concurrency, args.duration)
+            print(f"{scenario:>10} {label:>14} {result['rps']:>10.0f} {result['p50']:>8.1f}ms "
+                  f"{result['p95']:>8.1f}ms {result['p99']:>8.1f}ms {result['errors']:>7}")
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default=4, type=int)
+    parser.add_argument('--concurrency', default=64, type=int)
+    parser.add_argument('--duration', default=20, type=float)
+    parser.add_argument('--seed', default=10000, type=int)
+    parser.add_argument('--sync-port', default=8001, type=int)
+    parser.add_argument('--async-port', default=8002, type=int)
+    parser.add_argument('--sync-url', help="Base URL of a running WSGI server, e.g. http://127.0.0.1:8000/api/")
+    parser.add_argument('--async-url', help="Base URL of a running ASGI server, e.g. http://127.0.0.1:8001/api/async/")
+    args = parser.parse_args()
+
+    setup()
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Settings for running the benchmarks without Postgres or Redis:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings python -m benchmarks.bench_api
+
+The database is a SQLite file, so concurrent clients wait for each other's
+writes instead of failing, and the remote cache tier is LocMemCache.
+"""
+import os
+
+os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key-not-for-production-use')
+os.environ.setdefault('DEBUG', 'False')
+for name in ('DB_NAME', 'DB_PASSWORD', 'DB_HOST', 'DB_USER', 'DB_PORT'):
+    os.environ.setdefault(name, '')
+
+from inventory_managemnet.settings import *  # noqa: E402,F401,F403
+from inventory_managemnet.settings import BASE_DIR, LOGGING  # noqa: E402
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmarks' / 'bench.sqlite3',
+        'OPTIONS': {'timeout': 30},
+        'TEST': {'NAME': BASE_DIR / 'benchmarks' / 'test_bench.sqlite3'},
+    }
+}
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'inventory_app.cache_backends.TwoTierCache',
+        'OPTIONS': {'REMOTE': 'remote'},
+    },
+    'remote': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+}
+
+# Benchmark runs shouldn't need, or grow, logs/django.log
+LOGGING['handlers']['file'] = {'class': 'logging.NullHandler'}
+
+# `config('DEBUG')` is the string 'False', which is truthy; the debug cursor
+# would format every query
+DEBUG = False
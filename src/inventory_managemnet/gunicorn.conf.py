@@ -0,0 +1,14 @@
+import os
+from decouple import config
+from prometheus_client import multiprocess
+
+# Sync workers reuse their thread's connection; the settings default of 0
+# is kept for ASGI servers, where persistent connections leak. A value from
+# the environment or .env still wins.
+os.environ['DB_CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default='60')
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the multiprocess metrics
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
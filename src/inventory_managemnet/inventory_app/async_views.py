@@ -0,0 +1,260 @@
+"""
+Native async versions of the item read endpoints, served under /api/async/.
+
+They return the same payloads as the views in `views.py` but are plain
+Django async views, so under ASGI a request waiting on the cache or the
+database doesn't hold a worker thread. DRF's APIView is sync-only, so
+authentication and error bodies are handled here directly.
+
+The live item feed is here too: an open Server-Sent Events stream is only a
+coroutine waiting on its subscriber, which needs ASGI.
+"""
+import json
+import logging
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import urlencode
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+from .authentication import aauthenticate
+from .counting import aget_item_count
+from .feed import EVENT_TYPES, Subscriber, hub
+from .item_cache import (
+    aget_item_payload, aget_list_page, aget_or_compute_item_payload, aitems_recently_written, alist_page_key,
+    aset_list_page,
+)
+from .ledger import aquantity_as_of, parse_as_of
+from .models import Item
+from .pagination import InvalidCursor, apaginate_by_cursor
+from .representations import format_datetime, item_rows, represent_row, represent_rows, row_position
+from .routers import pin_to_primary
+from .search import InvalidFilter, filter_items, is_filtered
+from .views import etag_matches, is_conditional, item_validators, payload_validators, with_validators
+
+
+logger = logging.getLogger('inventory_app')
+
+
+def _page_link(request, **params):
+    query = request.GET.copy()
+    for key, value in params.items():
+        query[key] = value
+    return f"{request.path}?{urlencode(query, doseq=True)}"
+
+
+def _wants_count(request):
+    return request.GET.get('count', '').lower() in ('1', 'true', 'yes')
+
+
+def _list_param(request, name, parse):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    return frozenset(parse(part) for part in value.split(','))
+
+
+def _sse(data, event=None):
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+
+class AsyncAPIView(View):
+    """
+    JWT-authenticated async view answering errors like DRF does
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await aauthenticate(request)
+            if request.user is None:
+                raise exceptions.NotAuthenticated()
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as e:
+            detail = e.detail if isinstance(e.detail, (dict, list)) else {"detail": e.detail}
+            response = JsonResponse(detail, status=e.status_code, safe=False)
+            if e.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = 'Bearer realm="api"'
+            return response
+
+
+class AsyncItemListView(AsyncAPIView):
+
+    async def get(self, request):
+        cache_key = await alist_page_key(request.GET)
+        cached = await aget_list_page(cache_key)
+        if cached is None:
+            with pin_to_primary(await aitems_recently_written()):
+                data = await self.get_page(request)
+            etag = await aset_list_page(cache_key, data)
+        else:
+            etag, data = cached
+
+        response = HttpResponseNotModified() if etag_matches(request, etag) else JsonResponse(data)
+        response['ETag'] = etag
+        return response
+
+    async def get_page(self, request):
+        try:
+            items, ranked = filter_items(Item.objects.all(), request.GET)
+        except InvalidFilter as e:
+            raise exceptions.ParseError(str(e))
+
+        if 'cursor' in request.GET:
+            if ranked:
+                raise exceptions.ParseError("Cursor pagination can't be combined with q, use page")
+            return await self.get_cursor_page(request, items)
+
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+
+        page_size = api_settings.PAGE_SIZE
+        start = (page - 1) * page_size
+        rows = [row async for row in item_rows(items)[start:start + page_size]]
+
+        if is_filtered(request.GET):
+            total_items, count_exact = await items.acount(), True
+        else:
+            total_items, count_exact = await aget_item_count()
+        total_pages = (total_items + page_size - 1) // page_size
+
+        return {
+            'count': total_items,
+            'count_exact': count_exact,
+            'next': _page_link(request, page=page+1) if page < total_pages else None,
+            'previous': _page_link(request, page=page-1) if page > 1 else None,
+            'results': represent_rows(rows),
+        }
+
+    async def get_cursor_page(self, request, items):
+        try:
+            page = await apaginate_by_cursor(
+                item_rows(items), request.GET.get('cursor'), api_settings.PAGE_SIZE, position=row_position,
+            )
+        except InvalidCursor:
+            logger.warning("Invalid item list cursor")
+            raise exceptions.ParseError("Invalid cursor")
+
+        data = {}
+        if _wants_count(request) and is_filtered(request.GET):
+            data['count'], data['count_exact'] = await items.acount(), True
+        elif _wants_count(request):
+            data['count'], data['count_exact'] = await aget_item_count()
+        data.update({
+            'next': _page_link(request, cursor=page.next_cursor) if page.next_cursor else None,
+            'previous': _page_link(request, cursor=page.previous_cursor) if page.previous_cursor else None,
+            'results': represent_rows(page.items),
+        })
+        return data
+
+
+class AsyncItemDetailView(AsyncAPIView):
+
+    async def get(self, request, pk):
+        payload = None
+        if is_conditional(request):
+            payload = await aget_item_payload(pk)
+            validators = payload_validators(payload) if payload is not None else await self.load_validators(pk)
+            response = get_conditional_response(request, *validators)
+            if response is not None:
+                return with_validators(response, *validators)
+        if payload is None:
+            try:
+                payload, computed = await aget_or_compute_item_payload(pk, lambda: self.load_payload(pk))
+            except Http404:
+                raise exceptions.NotFound("Item not found")
+            if computed:
+                logger.debug("item %s fetched from database and cached", pk)
+        return with_validators(JsonResponse(payload), *payload_validators(payload))
+
+    async def load_validators(self, pk):
+        updated_at = await Item.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            raise exceptions.NotFound("Item not found")
+        return item_validators(pk, updated_at)
+
+    async def load_payload(self, pk):
+        row = await item_rows(Item.objects.filter(pk=pk)).afirst()
+        if row is None:
+            logger.warning("Item %s not found", pk)
+            raise Http404("Item not found")
+        return represent_row(row)
+
+
+class AsyncItemStockView(AsyncAPIView):
+
+    async def get(self, request, pk):
+        at = parse_as_of(request.GET.get('at'))
+        if at is None:
+            raise exceptions.ParseError("at must be an ISO 8601 datetime")
+        if not await Item.objects.filter(pk=pk).aexists():
+            raise exceptions.NotFound("Item not found")
+        return JsonResponse({"id": pk, "at": format_datetime(at), "quantity": await aquantity_as_of(pk, at)})
+
+
+class ASGIRequired(exceptions.APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "This endpoint is only served under ASGI."
+
+
+class FeedStream:
+    """
+    The SSE messages of one subscriber. Django closes the response, and so
+    unsubscribes it, once the stream ends or the client goes away.
+    """
+    retry_ms = 1000
+
+    def __init__(self, subscriber):
+        self.subscriber = subscriber
+        hub.subscribe(subscriber)
+
+    def __aiter__(self):
+        return self.messages()
+
+    async def messages(self):
+        yield f"retry: {self.retry_ms}\n: subscribed\n\n"
+        # Django < 5 doesn't end a stream when its client disconnects, so
+        # streams end after ITEM_FEED_MAX_AGE and clients reconnect
+        loop = self.subscriber.loop
+        deadline = loop.time() + settings.ITEM_FEED_MAX_AGE
+        while (remaining := deadline - loop.time()) > 0:
+            overflowed, events = await self.subscriber.wait(min(settings.ITEM_FEED_HEARTBEAT, remaining))
+            messages = [_sse(event) for event in events]
+            if overflowed:
+                messages.append(_sse({"detail": "Events were dropped, resync"}, event='reset'))
+            yield "".join(messages) or ": heartbeat\n\n"
+
+    def close(self):
+        hub.unsubscribe(self.subscriber)
+
+
+class AsyncItemFeedView(AsyncAPIView):
+    """
+    Item changes as Server-Sent Events, optionally only for the comma-separated
+    `ids` and event `types`. Changes made before the stream opened, or dropped
+    with a `reset` event, are fetched from the delta sync endpoint.
+    """
+
+    async def get(self, request):
+        # Under WSGI Django reads an async stream to the end before sending
+        # any of it, holding a worker for ITEM_FEED_MAX_AGE to send nothing
+        if not isinstance(request, ASGIRequest):
+            raise ASGIRequired()
+        try:
+            ids = _list_param(request, 'ids', int)
+        except ValueError:
+            raise exceptions.ParseError("ids must be comma-separated item ids")
+        types = _list_param(request, 'types', str)
+        if types is not None and not types <= set(EVENT_TYPES):
+            raise exceptions.ParseError(f"types must be among {', '.join(EVENT_TYPES)}")
+
+        stream = FeedStream(Subscriber(ids, types))
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,180 @@
+"""
+JWT authentication without a user query per request.
+
+Tokens from `/api/token/` carry the USER_CLAIMS, and StatelessJWTAuthentication
+builds `request.user` from them instead of loading the row. Tokens issued
+before the claims were added fall back to a lookup, kept in a short-lived
+in-process cache.
+
+Trusting claims means a changed user must be cut off explicitly: saving a
+new password, deactivating or demoting a user, or calling `/api/token/revoke/`
+records a revocation time, and every token of that user issued up to then is
+refused. Refreshed access tokens keep their refresh token's `iat`, so the
+revocation covers them too. The time is stored in TokenRevocation and checked
+in the cache; a cache miss reads the table once and caches the answer, so an
+evicted entry can't revive revoked tokens.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .cache_backends import _MISSING, LocalLRU
+from .models import TokenRevocation
+
+USER_CLAIMS = ('username', 'is_active', 'is_staff', 'is_superuser')
+USER_CACHE_MAX_ENTRIES = 10000
+# Cached for users whose tokens were never revoked
+NOT_REVOKED = 0
+
+_users = LocalLRU(USER_CACHE_MAX_ENTRIES)
+
+
+def revoked_key(user_id):
+    return f"jwt_revoked_user_{user_id}"
+
+
+def _revocation_timeout():
+    # Refreshed access tokens carry the refresh token's iat, so entries must
+    # outlive the refresh tokens
+    return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def revoke_user_tokens(user_id):
+    """
+    Refuse every token issued to `user_id` until now
+    """
+    revoked_at = timezone.now()
+    TokenRevocation.objects.update_or_create(user_id=user_id, defaults={'revoked_at': revoked_at})
+    cache.set(revoked_key(user_id), int(revoked_at.timestamp()), timeout=_revocation_timeout())
+    _users.delete([user_id])
+
+
+def _stored_revocation(revoked_at):
+    return NOT_REVOKED if revoked_at is None else int(revoked_at.timestamp())
+
+
+def _revoked_at(user_id):
+    """
+    When `user_id`'s tokens were last revoked, as a timestamp, or NOT_REVOKED
+    """
+    revoked_at = cache.get(revoked_key(user_id))
+    if revoked_at is None:
+        # Read from the primary: a lagging replica could miss a revocation.
+        # add() never overwrites an entry set by a revocation meanwhile.
+        revoked_at = _stored_revocation(TokenRevocation.objects.using(DEFAULT_DB_ALIAS).filter(
+            user_id=user_id,
+        ).values_list('revoked_at', flat=True).first())
+        cache.add(revoked_key(user_id), revoked_at, timeout=_revocation_timeout())
+    return revoked_at
+
+
+async def _arevoked_at(user_id):
+    revoked_at = await cache.aget(revoked_key(user_id))
+    if revoked_at is None:
+        revoked_at = _stored_revocation(await TokenRevocation.objects.using(DEFAULT_DB_ALIAS).filter(
+            user_id=user_id,
+        ).values_list('revoked_at', flat=True).afirst())
+        await cache.aadd(revoked_key(user_id), revoked_at, timeout=_revocation_timeout())
+    return revoked_at
+
+
+def _user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+
+def _check_not_revoked(validated_token, revoked_at):
+    if revoked_at != NOT_REVOKED and validated_token.get('iat', 0) <= revoked_at:
+        raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+
+
+def _check_active(user):
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def _user_from_claims(validated_token, user_id):
+    if any(claim not in validated_token for claim in USER_CLAIMS):
+        return None
+    user = get_user_model()(**{api_settings.USER_ID_FIELD: user_id}, **{
+        claim: validated_token[claim] for claim in USER_CLAIMS
+    })
+    # Behave like a fetched row, e.g. when assigned to a foreign key
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+def _cached_user(user_id):
+    user = _users.get(user_id)
+    return None if user is _MISSING else user
+
+
+def _cache_user(user):
+    _users.set(user.pk, user, settings.JWT_USER_CACHE_TIMEOUT)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that takes the user from the token's signed claims
+    """
+
+    def get_user(self, validated_token):
+        user_id = _user_id(validated_token)
+        _check_not_revoked(validated_token, _revoked_at(user_id))
+        user = _user_from_claims(validated_token, user_id) or _cached_user(user_id)
+        if user is None:
+            user = _cache_user(super().get_user(validated_token))
+        return _check_active(user)
+
+    async def aget_user(self, validated_token):
+        user_id = _user_id(validated_token)
+        _check_not_revoked(validated_token, await _arevoked_at(user_id))
+        user = _user_from_claims(validated_token, user_id) or _cached_user(user_id)
+        if user is None:
+            user = _cache_user(await _aload_user(user_id))
+        return _check_active(user)
+
+
+def stateless_enabled():
+    return any(issubclass(cls, StatelessJWTAuthentication) for cls in drf_settings.DEFAULT_AUTHENTICATION_CLASSES)
+
+
+async def _aload_user(user_id):
+    User = get_user_model()
+    try:
+        return await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+
+
+async def aauthenticate(request):
+    """
+    Authenticate a plain Django request by its JWT bearer token, for async views.
+
+    Returns the user, or None when no token was sent. Raises AuthenticationFailed
+    (or InvalidToken) like JWTAuthentication does. Token validation is pure
+    computation; only the user lookup touches the database, and with
+    StatelessJWTAuthentication configured not even that.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = authentication.get_validated_token(raw_token)
+
+    if stateless_enabled():
+        return await StatelessJWTAuthentication().aget_user(validated_token)
+    return _check_active(await _aload_user(_user_id(validated_token)))
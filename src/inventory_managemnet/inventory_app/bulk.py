@@ -0,0 +1,209 @@
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from .counting import adjust_item_count
+from .feed import CREATED, UPDATED, item_event, publish
+from .item_cache import deferred_invalidation, items_changed
+from .ledger import REASON_CREATED, REASON_EDITED, record_applied
+from .models import Item
+from .serializers import BulkItemSerializer
+from .signals import batched_deletes, record_item_deletes
+
+
+logger = logging.getLogger('inventory_app')
+
+BULK_OPS = ('create', 'update', 'delete')
+
+
+class BulkRow:
+    def __init__(self, index, op, pk=None, data=None):
+        self.index = index
+        self.op = op
+        self.pk = pk
+        self.data = data or {}
+        self.errors = None
+        self.status = None
+
+    def fail(self, errors, status_code=status.HTTP_400_BAD_REQUEST):
+        self.errors = errors
+        self.status = status_code
+
+    def result(self):
+        result = {'index': self.index, 'op': self.op, 'id': self.pk, 'status': self.status}
+        if self.errors is not None:
+            result['errors'] = self.errors
+        return result
+
+
+def parse_row(index, row):
+    """
+    Work out what a row asks for and validate its fields.
+
+    The op defaults to `update` when the row has an `id` and `create` otherwise.
+    """
+    if not isinstance(row, dict):
+        parsed = BulkRow(index, None)
+        parsed.fail({'non_field_errors': ['Expected an object.']})
+        return parsed
+
+    row = dict(row)
+    pk = row.pop('id', None)
+    op = row.pop('op', None) or ('update' if pk is not None else 'create')
+    parsed = BulkRow(index, op, pk)
+
+    if op not in BULK_OPS:
+        parsed.fail({'op': [f'Must be one of: {", ".join(BULK_OPS)}.']})
+        return parsed
+    if op == 'create':
+        parsed.pk = None
+    elif not isinstance(pk, int) or isinstance(pk, bool):
+        parsed.fail({'id': ['A valid integer is required.']})
+        return parsed
+
+    if op != 'delete':
+        serializer = BulkItemSerializer(data=row, partial=(op == 'update'))
+        if not serializer.is_valid():
+            parsed.fail(serializer.errors)
+            return parsed
+        parsed.data = serializer.validated_data
+    return parsed
+
+
+def check_name_conflicts(rows, deleted_pks=()):
+    """
+    Flag rows whose name is used twice in the batch or by another item.
+
+    All names are checked against the database in a single query.
+    """
+    claimed = {}
+    for row in rows:
+        name = row.data.get('name')
+        if name is None:
+            continue
+        if name in claimed:
+            row.fail({'name': ['An item with this name appears earlier in the batch.']})
+        else:
+            claimed[name] = row
+
+    holders = Item.objects.filter(name__in=claimed).values_list('name', 'id')
+    for name, holder_pk in holders:
+        row = claimed[name]
+        if holder_pk != row.pk and holder_pk not in deleted_pks and row.errors is None:
+            row.fail({'name': ['An item with this name already exists.']})
+
+
+def apply_bulk(raw_rows, user):
+    """
+    Validate and apply a batch of item writes in one transaction.
+
+    Either every row is applied or none is. Returns `(applied, results)` where
+    `results` has one entry per input row, in order.
+    """
+    rows = [parse_row(index, row) for index, row in enumerate(raw_rows)]
+
+    existing_pks = set()
+    for row in rows:
+        if row.op not in ('update', 'delete') or row.errors is not None:
+            continue
+        if row.pk in existing_pks:
+            row.fail({'id': ['This item appears earlier in the batch.']})
+        else:
+            existing_pks.add(row.pk)
+
+    try:
+        with deferred_invalidation(), transaction.atomic():
+            applied = _apply_rows(rows, existing_pks, user)
+    except IntegrityError as e:
+        # Another request took one of the names after they were checked
+        logger.warning("Bulk item batch lost a name to a concurrent write: %s", e)
+        for row in rows:
+            if 'name' in row.data:
+                row.fail({'name': ['An item with this name was just created, retry.']}, status.HTTP_409_CONFLICT)
+        return False, [row.result() for row in rows]
+    if not applied:
+        return False, [row.result() for row in rows]
+
+    deletes = [row for row in rows if row.op == 'delete']
+    updates = [row for row in rows if row.op == 'update']
+    creates = [row for row in rows if row.op == 'create']
+    adjust_item_count(len(creates))
+
+    for row in deletes:
+        row.status = status.HTTP_204_NO_CONTENT
+    for row in updates:
+        row.status = status.HTTP_200_OK
+    for row in creates:
+        row.status = status.HTTP_201_CREATED
+
+    logger.info("Bulk applied %s creates, %s updates, %s deletes", len(creates), len(updates), len(deletes))
+    return True, [row.result() for row in rows]
+
+
+def _apply_rows(rows, existing_pks, user):
+    """
+    Check the rows against the items they touch, locked, and write them;
+    return whether the batch was applied
+    """
+    # Locked so a concurrent write can't change a row between this read and
+    # the update that writes it back
+    existing = Item.objects.select_for_update().in_bulk(existing_pks)
+    for row in rows:
+        if row.errors is None and row.pk in existing_pks and row.pk not in existing:
+            row.fail({'detail': 'Item not found'}, status.HTTP_404_NOT_FOUND)
+
+    deleted_pks = {row.pk for row in rows if row.op == 'delete' and row.errors is None}
+    check_name_conflicts(
+        [row for row in rows if row.op in ('create', 'update') and row.errors is None],
+        deleted_pks,
+    )
+
+    if any(row.errors is not None for row in rows):
+        return False
+
+    updates = [row for row in rows if row.op == 'update']
+    creates = [row for row in rows if row.op == 'create']
+    batch_size = settings.ITEM_BULK_BATCH_SIZE
+
+    if deleted_pks:
+        # One tombstone insert for the batch rather than one per item
+        with batched_deletes():
+            Item.objects.filter(pk__in=deleted_pks).delete()
+        record_item_deletes(deleted_pks)
+
+    if updates:
+        now = timezone.now()
+        # Each row only writes the fields it sets, so rows are updated in
+        # groups sharing the same fields
+        groups = {}
+        edited = {}
+        for row in updates:
+            instance = existing[row.pk]
+            if 'quantity' in row.data:
+                edited[row.pk] = row.data['quantity'] - instance.quantity
+            for field, value in row.data.items():
+                setattr(instance, field, value)
+            instance.updated_at = now
+            groups.setdefault(tuple(sorted({*row.data, 'updated_at'})), []).append(instance)
+        for fields, instances in groups.items():
+            Item.objects.bulk_update(instances, fields, batch_size=batch_size)
+        record_applied(edited, REASON_EDITED, user.pk)
+
+    if creates:
+        created = Item.objects.bulk_create(
+            [Item(created_by=user, **row.data) for row in creates],
+            batch_size=batch_size,
+        )
+        for row, instance in zip(creates, created):
+            row.pk = instance.pk
+        record_applied({instance.pk: instance.quantity for instance in created}, REASON_CREATED, user.pk)
+
+    # bulk_create and bulk_update do not send post_save, so the ledger
+    # entries above, this invalidation and the feed events are done here
+    items_changed([row.pk for row in updates + creates])
+    publish(
+        [item_event(UPDATED, row.pk, quantity=existing[row.pk].quantity) for row in updates]
+        + [item_event(CREATED, row.pk, quantity=row.data.get('quantity', 0)) for row in creates]
+    )
+    return True
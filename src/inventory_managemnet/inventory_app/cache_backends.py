@@ -0,0 +1,339 @@
+"""
+Two-tier cache backend: a bounded in-process LRU in front of another cache.
+
+Configured in settings.CACHES, e.g.::
+
+    'default': {
+        'BACKEND': 'inventory_app.cache_backends.TwoTierCache',
+        'OPTIONS': {
+            'REMOTE': 'redis',                  # alias of the shared cache
+            'LOCAL_MAX_ENTRIES': 1024,          # 0 disables the local tier
+            'LOCAL_TIMEOUT': 5,                 # seconds an entry may live locally
+            'INVALIDATION_CHANNEL': 'inventory-cache-invalidation',
+        },
+    }
+
+Every write goes to the remote cache first. When the remote is Redis, the
+keys written are then published on INVALIDATION_CHANNEL and every worker
+drops them from its local tier. LOCAL_TIMEOUT bounds staleness if a message
+is lost; without Redis it is the only coherence mechanism.
+
+The async API serves local hits on the event loop and runs remote calls in
+worker threads, instead of the single thread Django's default async cache
+methods share with the ORM.
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+logger = logging.getLogger('inventory_app')
+
+_MISSING = object()
+_CLEAR_ALL = '*'
+
+# Django builds a backend instance per thread, so the local tier and the
+# invalidation bus are shared per process, keyed by LOCATION (or REMOTE)
+_local_tiers = {}
+_buses = {}
+_registry_lock = threading.Lock()
+
+
+def _off_loop(func):
+    # Remote cache clients are thread-safe, so they needn't share the ORM's thread
+    return sync_to_async(func, thread_sensitive=False)
+
+
+class LocalLRU:
+    """
+    Thread-safe LRU with per-entry expiry. Values are stored pickled, like
+    LocMemCache does, so callers can't mutate a cached object in place.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, pickled = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return pickle.loads(pickled)
+                del self._entries[key]
+            self.stats['misses'] += 1
+            return _MISSING
+
+    def set(self, key, value, timeout):
+        if self.max_entries <= 0 or timeout <= 0:
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, pickled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisInvalidationBus:
+    """
+    Publishes written keys on a Redis channel and evicts keys published by
+    other processes from the local tier, from a background thread.
+    """
+
+    def __init__(self, client, channel, local):
+        self.client = client
+        self.channel = channel
+        self.local = local
+        self.origin = uuid.uuid4().hex
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, keys):
+        message = json.dumps({'origin': self.origin, 'keys': list(keys)})
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            logger.warning("Cache invalidation publish failed: %s", e)
+
+    def ensure_listening(self):
+        # Started lazily, and again in a forked child: threads don't survive fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+            thread.start()
+
+    def handle(self, data):
+        message = json.loads(data)
+        if message['origin'] == self.origin:
+            return
+        if _CLEAR_ALL in message['keys']:
+            self.local.clear()
+        else:
+            self.local.delete(message['keys'])
+
+    def _listen(self):
+        backoff = 0.1
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Messages may have been missed while disconnected
+                self.local.clear()
+                backoff = 0.1
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.handle(message['data'])
+            except Exception as e:
+                logger.warning("Cache invalidation listener failed: %s", e)
+                self.local.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5)
+
+
+class TwoTierCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.remote_alias = options['REMOTE']
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.channel = options.get('INVALIDATION_CHANNEL')
+        self.name = location or self.remote_alias
+        with _registry_lock:
+            if self.name not in _local_tiers:
+                _local_tiers[self.name] = LocalLRU(options.get('LOCAL_MAX_ENTRIES', 1024))
+            self.local = _local_tiers[self.name]
+
+    @property
+    def remote(self):
+        return caches[self.remote_alias]
+
+    def get_bus(self):
+        """
+        The process-wide invalidation bus, started on first use; None
+        when there is no channel or the remote cache is not Redis
+        """
+        bus = _buses.get(self.name, _MISSING)
+        if bus is _MISSING:
+            bus = self._create_bus()
+        if bus is not None:
+            bus.ensure_listening()
+        return bus
+
+    def _create_bus(self):
+        with _registry_lock:
+            if self.name not in _buses:
+                client = getattr(getattr(self.remote, '_cache', None), 'get_client', None)
+                if self.channel and client is not None:
+                    _buses[self.name] = RedisInvalidationBus(client(write=True), self.channel, self.local)
+                else:
+                    _buses[self.name] = None
+            return _buses[self.name]
+
+    def set_bus(self, bus):
+        with _registry_lock:
+            _buses[self.name] = bus
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.remote.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _full_key(self, key, version):
+        return self.remote.make_key(key, version=version)
+
+    def _invalidate(self, full_keys):
+        self.local.delete(full_keys)
+        bus = self.get_bus()
+        if bus is not None and full_keys:
+            bus.publish(full_keys)
+
+    def get(self, key, default=None, version=None):
+        self.get_bus()
+        value = self.local.get(self._full_key(key, version))
+        if value is not _MISSING:
+            return value
+        return self._get_remote(key, default, version)
+
+    def _get_remote(self, key, default, version):
+        value = self.remote.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self.local.set(self._full_key(key, version), value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.get_bus()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(self._full_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.remote.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self.local.set(self._full_key(key, version), value, self.local_timeout)
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        if self.local.get(self._full_key(key, version)) is not _MISSING:
+            return True
+        return self.remote.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.remote.set(key, value, timeout=timeout, version=version)
+        full_key = self._full_key(key, version)
+        self._invalidate([full_key])
+        self.local.set(full_key, value, self._local_timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.remote.set_many(data, timeout=timeout, version=version)
+        self._invalidate([self._full_key(key, version) for key in data])
+        for key, value in data.items():
+            if key not in failed:
+                self.local.set(self._full_key(key, version), value, self._local_timeout(timeout))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # add() backs locks and counters initialisation: never served locally
+        self.local.delete([self._full_key(key, version)])
+        return self.remote.add(key, value, timeout=timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.touch(key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.remote.incr(key, delta, version=version)
+        self._invalidate([self._full_key(key, version)])
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.remote.delete(key, version=version)
+        self._invalidate([self._full_key(key, version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.remote.delete_many(keys, version=version)
+        self._invalidate([self._full_key(key, version) for key in keys])
+
+    def clear(self):
+        self.remote.clear()
+        self._invalidate([_CLEAR_ALL])
+        self.local.clear()
+
+    def close(self, **kwargs):
+        self.remote.close(**kwargs)
+
+    async def aget(self, key, default=None, version=None):
+        self.get_bus()
+        value = self.local.get(self._full_key(key, version))
+        if value is not _MISSING:
+            return value
+        return await _off_loop(self._get_remote)(key, default, version)
+
+    async def aget_many(self, keys, version=None):
+        return await _off_loop(self.get_many)(keys, version)
+
+    async def ahas_key(self, key, version=None):
+        return await _off_loop(self.has_key)(key, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await _off_loop(self.set)(key, value, timeout, version)
+
+    async def aset_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return await _off_loop(self.set_many)(data, timeout, version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await _off_loop(self.add)(key, value, timeout, version)
+
+    async def atouch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return await _off_loop(self.touch)(key, timeout, version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return await _off_loop(self.incr)(key, delta, version)
+
+    async def adelete(self, key, version=None):
+        return await _off_loop(self.delete)(key, version)
+
+    async def adelete_many(self, keys, version=None):
+        return await _off_loop(self.delete_many)(keys, version)
+
+    async def aclear(self):
+        return await _off_loop(self.clear)()
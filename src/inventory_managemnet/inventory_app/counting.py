@@ -0,0 +1,95 @@
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from .models import Item
+
+
+logger = logging.getLogger('inventory_app')
+
+ITEM_COUNT_CACHE_KEY = 'item_count'
+
+
+def get_item_count():
+    """
+    Return `(count, exact)` for the whole item table.
+
+    The exact count is cached and kept current by the Item create/delete
+    signals. When it is not cached and the planner estimate on Postgres is
+    above `ITEM_COUNT_ESTIMATE_THRESHOLD`, the estimate is returned instead
+    of running a full `COUNT(*)`.
+    """
+    count = cache.get(ITEM_COUNT_CACHE_KEY)
+    if count is not None:
+        return count, True
+
+    threshold = settings.ITEM_COUNT_ESTIMATE_THRESHOLD
+    if threshold and connection.vendor == 'postgresql':
+        estimate = estimate_item_count()
+        if estimate is not None and estimate >= threshold:
+            logger.debug("Using planner estimate for item count: %s", estimate)
+            return estimate, False
+
+    count = Item.objects.count()
+    # A count read inside a transaction includes its uncommitted rows
+    transaction.on_commit(
+        lambda: cache.set(ITEM_COUNT_CACHE_KEY, count, timeout=settings.ITEM_COUNT_CACHE_TIMEOUT)
+    )
+    return count, True
+
+
+async def aget_item_count():
+    """
+    `get_item_count` for async callers
+    """
+    count = await cache.aget(ITEM_COUNT_CACHE_KEY)
+    if count is not None:
+        return count, True
+
+    threshold = settings.ITEM_COUNT_ESTIMATE_THRESHOLD
+    if threshold and connection.vendor == 'postgresql':
+        estimate = await sync_to_async(estimate_item_count)()
+        if estimate is not None and estimate >= threshold:
+            logger.debug("Using planner estimate for item count: %s", estimate)
+            return estimate, False
+
+    count = await Item.objects.acount()
+    await cache.aset(ITEM_COUNT_CACHE_KEY, count, timeout=settings.ITEM_COUNT_CACHE_TIMEOUT)
+    return count, True
+
+
+def estimate_item_count():
+    """
+    Row estimate from `pg_class.reltuples`, or None if the table was never analyzed
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [Item._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def adjust_item_count(delta):
+    """
+    Apply a create/delete delta to the cached count, if there is one, once
+    the current transaction commits
+    """
+    if delta:
+        transaction.on_commit(lambda: _incr_item_count(delta))
+
+
+def _incr_item_count(delta):
+    try:
+        cache.incr(ITEM_COUNT_CACHE_KEY, delta)
+    except ValueError:
+        # Nothing cached yet; the next read computes the count
+        pass
+
+
+def invalidate_item_count():
+    cache.delete(ITEM_COUNT_CACHE_KEY)
@@ -0,0 +1,54 @@
+"""
+Database connection statistics for the internal metrics endpoint.
+
+With DB_POOL_MAX_SIZE set, Django (5.1+) keeps a psycopg connection pool per
+worker process and the pool's own counters are reported. Otherwise each
+thread keeps its connection for CONN_MAX_AGE seconds, and the number of
+connections this process has opened shows whether they are being reused.
+"""
+import threading
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_created_lock = threading.Lock()
+_created = {}
+
+
+def record_connection_created(alias):
+    with _created_lock:
+        _created[alias] = _created.get(alias, 0) + 1
+
+
+def connections_created(alias=DEFAULT_DB_ALIAS):
+    with _created_lock:
+        return _created.get(alias, 0)
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    Connection counters of this process for the `alias` database
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return {
+            'pooled': False,
+            'conn_max_age': settings_dict['CONN_MAX_AGE'],
+            'health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+            'connected': connection.connection is not None,
+            'created': connections_created(alias),
+        }
+
+    stats = pool.get_stats()
+    return {
+        'pooled': True,
+        'min_size': stats['pool_min'],
+        'max_size': stats['pool_max'],
+        'size': stats['pool_size'],
+        'in_use': stats['pool_size'] - stats['pool_available'],
+        'idle': stats['pool_available'],
+        'waiting': stats.get('requests_waiting', 0),
+        'created': stats.get('connections_num', 0),
+        'errors': stats.get('requests_errors', 0) + stats.get('connections_errors', 0),
+        'lost': stats.get('connections_lost', 0),
+    }
@@ -0,0 +1,55 @@
+import csv
+import json
+from django.utils import timezone
+from .models import Item
+from .representations import ITEM_COLUMNS, ITEM_FIELDS, format_row
+
+
+def export_rows(chunk_size):
+    """
+    Yield every item as a list of formatted ITEM_FIELDS values.
+
+    Rows are read through a server-side cursor where the database supports
+    one, and `created_by` is resolved with a join, so memory stays flat.
+    """
+    tz = timezone.get_current_timezone()
+    queryset = Item.objects.order_by('id').values_list(*ITEM_COLUMNS)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield format_row(row, tz)
+
+
+def stream_ndjson(rows, lines_per_chunk=500):
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(dict(zip(ITEM_FIELDS, row))))
+        if len(buffer) >= lines_per_chunk:
+            yield '\n'.join(buffer) + '\n'
+            buffer = []
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+
+class _Echo:
+    """
+    File-like object that hands back what is written to it, for csv.writer
+    """
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, lines_per_chunk=500):
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(ITEM_FIELDS)]
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= lines_per_chunk:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', stream_ndjson),
+    'csv': ('text/csv', stream_csv),
+}
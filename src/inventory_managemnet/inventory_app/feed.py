@@ -0,0 +1,270 @@
+"""
+Live item change feed, streamed by `GET /api/async/items/feed/`.
+
+Writers `publish` the item changes they make; the events go out once the
+transaction commits. When ITEM_FEED_CACHE names a Redis cache, events travel
+over ITEM_FEED_CHANNEL and each process keeps a single subscription to it, in
+a background thread, whatever the number of clients it streams to. Without
+Redis the feed stays within the process, which is what the tests use.
+
+A subscriber is a small buffer and an asyncio.Event on its stream's event
+loop, indexed by the item ids it follows, so idle clients cost little and an
+event is only offered to the clients that want it. A client that falls
+ITEM_FEED_QUEUE_SIZE events behind has its buffer dropped and is told to
+resync, through the delta sync endpoint, rather than holding events for it.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+logger = logging.getLogger('inventory_app')
+
+CREATED, UPDATED, DELETED, STOCK = 'created', 'updated', 'deleted', 'stock'
+EVENT_TYPES = (CREATED, UPDATED, DELETED, STOCK)
+
+
+def item_event(event_type, pk, **fields):
+    """
+    An event: `quantity` for created and updated items, `delta` for stock
+    """
+    return {'type': event_type, 'id': pk, **fields}
+
+
+def publish(events):
+    """
+    Send `events` to every subscriber, after commit inside a transaction
+    """
+    events = list(events)
+    if not events:
+        return
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: get_broker().publish(events))
+    else:
+        get_broker().publish(events)
+
+
+class Subscriber:
+    """
+    One client's filters and the events waiting to be sent to it
+    """
+    __slots__ = ('ids', 'types', 'loop', 'queue', 'overflowed', 'ready')
+
+    def __init__(self, ids=None, types=None):
+        self.ids = ids
+        self.types = types
+        self.loop = asyncio.get_running_loop()
+        self.queue = deque()
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def offer(self, events):
+        """
+        Queue the events that pass the filters; called on the subscriber's loop
+        """
+        for event in events:
+            if self.overflowed:
+                return
+            if self.types is not None and event['type'] not in self.types:
+                continue
+            if len(self.queue) >= settings.ITEM_FEED_QUEUE_SIZE:
+                self.reset()
+                return
+            self.queue.append(event)
+            self.ready.set()
+
+    def reset(self):
+        self.queue.clear()
+        self.overflowed = True
+        self.ready.set()
+
+    async def wait(self, timeout):
+        """
+        Wait up to `timeout` seconds for events; return (overflowed, events)
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False, []
+        self.ready.clear()
+        overflowed, self.overflowed = self.overflowed, False
+        events = list(self.queue)
+        self.queue.clear()
+        return overflowed, events
+
+
+class Hub:
+    """
+    The subscribers of this process; events may arrive from any thread
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._unfiltered = set()
+        self._by_id = {}
+        self._loops = {}
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            if subscriber.ids is None:
+                self._unfiltered.add(subscriber)
+            else:
+                for pk in subscriber.ids:
+                    self._by_id.setdefault(pk, set()).add(subscriber)
+            self._loops[subscriber.loop] = self._loops.get(subscriber.loop, 0) + 1
+        get_broker().ensure_listening()
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber.ids is None:
+                self._unfiltered.discard(subscriber)
+            else:
+                for pk in subscriber.ids:
+                    followers = self._by_id.get(pk)
+                    if followers is not None:
+                        followers.discard(subscriber)
+                        if not followers:
+                            del self._by_id[pk]
+            count = self._loops.pop(subscriber.loop, 0) - 1
+            if count > 0:
+                self._loops[subscriber.loop] = count
+
+    def __len__(self):
+        with self._lock:
+            return sum(self._loops.values())
+
+    def dispatch(self, events=(), reset=False):
+        """
+        Hand `events` (or, with `reset`, a resync) to every subscriber's loop
+        """
+        with self._lock:
+            loops = list(self._loops)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, loop, events, reset)
+            except RuntimeError:
+                # The loop has closed; its streams are gone with it
+                pass
+
+    def _deliver(self, loop, events, reset):
+        # Runs on `loop`, the only place its subscribers' queues are touched
+        with self._lock:
+            unfiltered = [subscriber for subscriber in self._unfiltered if subscriber.loop is loop]
+            followers = {}
+            if reset:
+                for followed in self._by_id.values():
+                    followers.update((subscriber, []) for subscriber in followed if subscriber.loop is loop)
+            else:
+                for event in events:
+                    for subscriber in self._by_id.get(event['id'], ()):
+                        if subscriber.loop is loop:
+                            followers.setdefault(subscriber, []).append(event)
+
+        if reset:
+            for subscriber in (*unfiltered, *followers):
+                subscriber.reset()
+            return
+        for subscriber in unfiltered:
+            subscriber.offer(events)
+        for subscriber, followed_events in followers.items():
+            subscriber.offer(followed_events)
+
+
+hub = Hub()
+
+
+class LocalBroker:
+    """
+    Delivers events to this process's subscribers only
+    """
+
+    def publish(self, events):
+        hub.dispatch(events)
+
+    def ensure_listening(self):
+        pass
+
+
+class RedisBroker:
+    """
+    Publishes events on a Redis channel and hands the messages it receives
+    to the hub, from one background thread per process.
+    """
+
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, events):
+        try:
+            self.client.publish(self.channel, json.dumps(events))
+        except Exception as e:
+            logger.warning("Item feed publish failed: %s", e)
+
+    def ensure_listening(self):
+        # Started lazily, and again in a forked child: threads don't survive fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._listen, name='item-feed', daemon=True)
+            thread.start()
+
+    def _listen(self):
+        backoff = 0.1
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                backoff = 0.1
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        hub.dispatch(json.loads(message['data']))
+            except Exception as e:
+                logger.warning("Item feed listener failed: %s", e)
+                # Events may have been missed while disconnected
+                hub.dispatch(reset=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    The process-wide broker: Redis when ITEM_FEED_CACHE is a Redis cache
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = _create_broker()
+    return _broker
+
+
+def _create_broker():
+    alias = settings.ITEM_FEED_CACHE
+    if alias and alias in settings.CACHES:
+        client = getattr(getattr(caches[alias], '_cache', None), 'get_client', None)
+        if client is not None:
+            return RedisBroker(client(write=True), settings.ITEM_FEED_CHANNEL)
+    return LocalBroker()
+
+
+def set_broker(broker):
+    global _broker
+    with _broker_lock:
+        _broker = broker
@@ -0,0 +1,256 @@
+"""
+Streaming item import behind `manage.py import_items`.
+
+The file is read as a stream and handled `chunk_size` rows at a time, each
+chunk in its own transaction, so memory stays flat whatever the file size:
+
+- rows are validated by one shared BulkItemSerializer, without building a
+  serializer per row;
+- names are checked against the batch and the database in one query per
+  chunk (`bulk.check_name_conflicts`);
+- valid rows, and their creation movements in the stock ledger, are
+  inserted with COPY on Postgres (psycopg 3) and with one executemany
+  elsewhere. Both skip model instances, which dominate bulk_create's time.
+
+Invalid rows are skipped and reported; they do not stop the import. After
+each chunk commits, the number of rows read so far is saved to the
+checkpoint file, so an interrupted import can carry on from there.
+"""
+import csv
+import itertools
+import json
+import logging
+import os
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .bulk import BulkRow, check_name_conflicts
+from .counting import adjust_item_count
+from .feed import CREATED, item_event, publish
+from .item_cache import items_changed
+from .ledger import REASON_CREATED
+from .models import Item, StockMovement
+from .serializers import BulkItemSerializer
+
+
+logger = logging.getLogger('inventory_app')
+
+# Columns written for each new item and its creation movement
+ITEM_COLUMNS = ('name', 'description', 'quantity', 'price', 'created_at', 'updated_at', 'created_by')
+MOVEMENT_COLUMNS = ('item', 'delta', 'reason', 'user', 'created_at', 'applied')
+
+
+def read_csv(f):
+    """
+    Yield `(line_number, row)` for each CSV record; empty cells are left out
+    """
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+
+
+def read_ndjson(f):
+    """
+    Yield `(line_number, row)` for each non-blank line; unparsable lines yield None
+    """
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+IMPORT_FORMATS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+def format_for(path):
+    """
+    The import format implied by the file extension, or None
+    """
+    extension = os.path.splitext(path)[1].lower()
+    return {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}.get(extension)
+
+
+class ImportState:
+    """
+    Progress of an import; `rows` counts the records read, valid or not
+    """
+
+    def __init__(self, rows=0, created=0, rejected=0):
+        self.rows = rows
+        self.created = created
+        self.rejected = rejected
+
+    def as_dict(self):
+        return {'rows': self.rows, 'created': self.created, 'rejected': self.rejected}
+
+
+class Checkpoint:
+    """
+    The state of an import of `source`, kept in a JSON file between chunks
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.size = os.path.getsize(source)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """
+        Return the saved ImportState; ValueError if it belongs to another file
+        """
+        with open(self.path) as f:
+            saved = json.load(f)
+        if (saved.get('source'), saved.get('size')) != (self.source, self.size):
+            raise ValueError(f"Checkpoint {self.path} was written for another file, or the file has changed")
+        return ImportState(**saved['state'])
+
+    def save(self, state):
+        # Written aside and renamed, so a crash never leaves half a checkpoint
+        partial = f'{self.path}.partial'
+        with open(partial, 'w') as f:
+            json.dump({'source': self.source, 'size': self.size, 'state': state.as_dict()}, f)
+        os.replace(partial, self.path)
+
+    def remove(self):
+        if self.exists():
+            os.remove(self.path)
+
+
+def validate_chunk(records, serializer):
+    """
+    Turn `(line_number, row)` records into BulkRows, failing the invalid ones
+    """
+    rows = []
+    for line_number, record in records:
+        row = BulkRow(line_number, 'create')
+        if record is None:
+            row.fail({'non_field_errors': ['Invalid JSON.']})
+        else:
+            try:
+                row.data = serializer.to_internal_value(record)
+            except ValidationError as exc:
+                row.fail(exc.detail)
+        rows.append(row)
+    check_name_conflicts([row for row in rows if row.errors is None])
+    return rows
+
+
+def insert_rows(model, columns, values):
+    """
+    Insert tuples of `columns` values into `model`'s table, bypassing the ORM.
+
+    Uses COPY on Postgres with psycopg 3, and a single executemany of
+    database-ready values elsewhere.
+    """
+    # The real connection, not the `django.db.connection` proxy: it is
+    # looked up on every attribute access
+    db = connections[router.db_for_write(model)]
+    table = db.ops.quote_name(model._meta.db_table)
+    fields = [model._meta.get_field(column) for column in columns]
+    names = ', '.join(db.ops.quote_name(field.column) for field in fields)
+    with db.cursor() as cursor:
+        if db.vendor == 'postgresql':
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+            if is_psycopg3:
+                with cursor.copy(f"COPY {table} ({names}) FROM STDIN") as copy:
+                    for row in values:
+                        copy.write_row(row)
+                return
+        # Strings and integers go to the driver as they are; other values
+        # (dates, decimals) repeat a lot and are prepared once each
+        prepared = [{} for _ in fields]
+
+        def prepare(index, value):
+            if value is None or type(value) in (str, int, bool):
+                return value
+            cache = prepared[index]
+            if value not in cache:
+                cache[value] = fields[index].get_db_prep_save(value, db)
+            return cache[value]
+
+        cursor.executemany(
+            f"INSERT INTO {table} ({names}) VALUES ({', '.join(['%s'] * len(fields))})",
+            [[prepare(index, value) for index, value in enumerate(row)] for row in values],
+        )
+
+
+def insert_items(rows, user):
+    """
+    Insert the items of `rows`, their ledger entries, and set their `pk`
+    """
+    now = timezone.now()
+    insert_rows(Item, ITEM_COLUMNS, [
+        (
+            row.data['name'], row.data.get('description'), row.data.get('quantity', 0),
+            row.data.get('price', 0), now, now, user.pk,
+        )
+        for row in rows
+    ])
+    # Neither COPY nor executemany returns ids; the names were just checked to be unique
+    pks = dict(Item.objects.filter(name__in=[row.data['name'] for row in rows]).values_list('name', 'id'))
+    for row in rows:
+        row.pk = pks[row.data['name']]
+
+    # As `ledger.record_applied` would
+    insert_rows(StockMovement, MOVEMENT_COLUMNS, [
+        (row.pk, row.data['quantity'], REASON_CREATED, user.pk, now, True)
+        for row in rows
+        if row.data.get('quantity')
+    ])
+
+
+def import_chunk(records, user, serializer):
+    """
+    Validate and insert one chunk in a transaction; return its BulkRows
+    """
+    rows = validate_chunk(records, serializer)
+    valid = [row for row in rows if row.errors is None]
+    if valid:
+        with transaction.atomic():
+            insert_items(valid, user)
+        adjust_item_count(len(valid))
+        # New items have no cached payloads, only cached lists and counts
+        items_changed()
+        publish(item_event(CREATED, row.pk, quantity=row.data.get('quantity', 0)) for row in valid)
+    return rows
+
+
+def import_items(f, fmt, user, chunk_size, state=None, checkpoint=None, on_chunk=None, on_reject=None):
+    """
+    Import every row of the open file `f` after the first `state.rows`.
+
+    `on_chunk(state)` is called after each committed chunk and
+    `on_reject(row)` for each invalid row. Returns the final ImportState.
+    """
+    state = state or ImportState()
+    serializer = BulkItemSerializer()
+    records = itertools.islice(IMPORT_FORMATS[fmt](f), state.rows, None)
+
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        rows = import_chunk(chunk, user, serializer)
+        rejected = [row for row in rows if row.errors is not None]
+        state.rows += len(rows)
+        state.created += len(rows) - len(rejected)
+        state.rejected += len(rejected)
+        if checkpoint is not None:
+            checkpoint.save(state)
+        if on_reject is not None:
+            for row in rejected:
+                on_reject(row)
+        if on_chunk is not None:
+            on_chunk(state)
+
+    logger.info("Imported %s items, rejected %s rows", state.created, state.rejected)
+    return state
@@ -0,0 +1,140 @@
+"""
+Per-request performance counters.
+
+PerformanceMiddleware puts a RequestMetrics in a context variable for the
+duration of each request; the pieces below add to it. Context variables are
+copied into `sync_to_async` threads, so async views are measured too.
+
+- Database: `record_query` is installed as an execute wrapper on every new
+  connection (see `signals.py`) rather than per request, so it also sees the
+  connections async views use from worker threads. Queries slower than
+  SLOW_QUERY_THRESHOLD_MS are logged, sampled at SLOW_QUERY_SAMPLE_RATE.
+- Cache: `item_cache` reports its hits and misses through `record_cache`.
+- Serialization: code wrapped in `timed('serialize')`.
+
+Query and cache figures are also fed to the Prometheus metrics in `metrics`.
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import random
+import time
+from django.conf import settings
+from . import metrics as metrics_registry
+
+slow_query_logger = logging.getLogger('inventory_app.slow_queries')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+# item_cache stat names, as Prometheus result labels
+CACHE_RESULTS = {'hits': 'hit', 'misses': 'miss'}
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings = {}
+        self._timing = None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        """
+        Times in milliseconds, rounded for logging
+        """
+        return {
+            'duration_ms': round(self.elapsed * 1000, 2),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in self.timings.items()},
+        }
+
+    def server_timing(self):
+        entries = [
+            f'app;dur={self.elapsed * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hits / {self.cache_misses} misses"',
+        ]
+        entries += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.timings.items()]
+        return ', '.join(entries)
+
+
+@contextlib.contextmanager
+def measure_request():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def timed(name):
+    """
+    Add the block's duration to `name`; nested blocks of the same name count once
+    """
+    metrics = _current.get()
+    if metrics is None or metrics._timing == name:
+        yield
+        return
+    outer, metrics._timing = metrics._timing, name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - started
+        metrics._timing = outer
+
+
+def timed_function(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache(name, count=1):
+    if name in CACHE_RESULTS:
+        metrics_registry.record_cache_lookup(CACHE_RESULTS[name], count)
+    metrics = _current.get()
+    if metrics is not None:
+        if name == 'hits':
+            metrics.cache_hits += count
+        elif name == 'misses':
+            metrics.cache_misses += count
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper timing every query on the connection
+    """
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics_registry.record_query(context['connection'].alias, duration)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.db_queries += 1
+            metrics.db_time += duration
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS and random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+            # Parameters are left out: they may hold user data
+            slow_query_logger.warning(
+                "Slow query (%.1fms) on %s: %s", duration * 1000, context['connection'].alias, sql,
+                extra={'performance': {'duration_ms': round(duration * 1000, 2), 'database': context['connection'].alias}},
+            )
@@ -0,0 +1,366 @@
+"""
+Item cache layer.
+
+Detail entries hold the rendered payload built by `representations`, keyed
+`item_<pk>`, so a hit needs no query and no serializer. ITEM_PAYLOAD_VERSION
+is passed as the cache key version; bump it whenever the stored shape
+changes so entries written by older code are never served.
+
+Misses are single-flight: one caller takes a short lock in the cache and
+recomputes while the others wait for its result. Entries are refreshed
+early with a probability that grows as they near expiry (XFetch), and
+timeouts are jittered, so hot keys neither expire in sync nor stampede.
+
+List-level entries are keyed by the item generation, a counter bumped on
+every item write, so all of them are invalidated at once. Invalidation is
+driven by the model signals in `signals.py`; code that writes without
+signals (bulk_create, bulk_update, update) calls `items_changed` itself.
+
+With read replicas, rows read within DB_REPLICA_PIN_SECONDS of an item
+write may predate it, so cache fills read from the primary then.
+
+Functions prefixed with `a` are the async equivalents used by `async_views`.
+"""
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import urlencode
+from .instrumentation import record_cache
+from .routers import pin_to_primary
+
+ITEM_CACHE_TIMEOUT = 60 * 15
+ITEM_CACHE_TIMEOUT_JITTER = 0.1
+ITEM_CACHE_EARLY_REFRESH_BETA = 1.0
+ITEM_CACHE_LOCK_TIMEOUT = 5
+ITEM_CACHE_LOCK_WAIT = 2
+ITEM_CACHE_LOCK_POLL = 0.02
+ITEM_PAYLOAD_VERSION = 3
+ITEM_GENERATION_KEY = 'item_generation'
+ITEM_WRITTEN_KEY = 'item_recently_written'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+_pending_changes = contextvars.ContextVar('item_cache_pending_changes', default=None)
+
+
+def _record(name, count=1):
+    with _stats_lock:
+        _stats[name] += count
+    record_cache(name, count)
+
+
+def cache_stats():
+    """
+    Hit, miss and eviction counters of this process
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def item_cache_key(pk):
+    return f"item_{pk}"
+
+
+def _jittered_timeout():
+    return ITEM_CACHE_TIMEOUT * random.uniform(1 - ITEM_CACHE_TIMEOUT_JITTER, 1 + ITEM_CACHE_TIMEOUT_JITTER)
+
+
+def _should_refresh_early(entry):
+    """
+    XFetch: refresh before expiry with a probability that rises as expiry
+    nears, scaled by how long the value took to compute
+    """
+    delta = entry['delta'] * ITEM_CACHE_EARLY_REFRESH_BETA
+    return time.time() - delta * math.log(1 - random.random()) >= entry['expires']
+
+
+def get_item_payload(pk):
+    entry = cache.get(item_cache_key(pk), version=ITEM_PAYLOAD_VERSION)
+    _record('misses' if entry is None else 'hits')
+    return None if entry is None else entry['payload']
+
+
+async def aget_item_payload(pk):
+    entry = await cache.aget(item_cache_key(pk), version=ITEM_PAYLOAD_VERSION)
+    _record('misses' if entry is None else 'hits')
+    return None if entry is None else entry['payload']
+
+
+def _entry(payload, delta):
+    timeout = _jittered_timeout()
+    return {'payload': payload, 'delta': delta, 'expires': time.time() + timeout}, timeout
+
+
+def set_item_payload(payload, delta=0.0):
+    """
+    Cache a payload; `delta` is how long it took to compute, in seconds
+    """
+    entry, timeout = _entry(payload, delta)
+    cache.set(item_cache_key(payload['id']), entry, timeout=timeout, version=ITEM_PAYLOAD_VERSION)
+
+
+async def aset_item_payload(payload, delta=0.0):
+    entry, timeout = _entry(payload, delta)
+    await cache.aset(item_cache_key(payload['id']), entry, timeout=timeout, version=ITEM_PAYLOAD_VERSION)
+
+
+def _lock_key(pk):
+    return f"item_{pk}_lock"
+
+
+@contextlib.contextmanager
+def _recompute_lock(pk):
+    """
+    Yield True if this caller holds the recompute lock for `pk`
+    """
+    token = uuid.uuid4().hex
+    acquired = cache.add(_lock_key(pk), token, timeout=ITEM_CACHE_LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(_lock_key(pk)) == token:
+            cache.delete(_lock_key(pk))
+
+
+@contextlib.asynccontextmanager
+async def _arecompute_lock(pk):
+    token = uuid.uuid4().hex
+    acquired = await cache.aadd(_lock_key(pk), token, timeout=ITEM_CACHE_LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired and await cache.aget(_lock_key(pk)) == token:
+            await cache.adelete(_lock_key(pk))
+
+
+def items_recently_written():
+    """
+    True while replicas may still lag the last item write
+    """
+    return bool(settings.DATABASE_REPLICAS) and cache.get(ITEM_WRITTEN_KEY) is not None
+
+
+async def aitems_recently_written():
+    return bool(settings.DATABASE_REPLICAS) and await cache.aget(ITEM_WRITTEN_KEY) is not None
+
+
+def _compute(compute):
+    started = time.perf_counter()
+    with pin_to_primary(items_recently_written()):
+        payload = compute()
+    set_item_payload(payload, time.perf_counter() - started)
+    return payload
+
+
+def get_or_compute_item_payload(pk, compute):
+    """
+    Return `(payload, computed)`, calling `compute()` on a miss.
+
+    Only the caller holding the recompute lock runs `compute`. On an early
+    refresh the others keep serving the current entry; on a miss they wait
+    up to ITEM_CACHE_LOCK_WAIT for the result before computing themselves.
+    """
+    entry = cache.get(item_cache_key(pk), version=ITEM_PAYLOAD_VERSION)
+    if entry is not None:
+        _record('hits')
+        if not _should_refresh_early(entry):
+            return entry['payload'], False
+        with _recompute_lock(pk) as acquired:
+            if not acquired:
+                return entry['payload'], False
+            return _compute(compute), True
+
+    _record('misses')
+    deadline = time.monotonic() + ITEM_CACHE_LOCK_WAIT
+    while True:
+        with _recompute_lock(pk) as acquired:
+            if acquired or time.monotonic() >= deadline:
+                return _compute(compute), True
+        time.sleep(ITEM_CACHE_LOCK_POLL)
+        entry = cache.get(item_cache_key(pk), version=ITEM_PAYLOAD_VERSION)
+        if entry is not None:
+            return entry['payload'], False
+
+
+async def _acompute(compute):
+    started = time.perf_counter()
+    with pin_to_primary(await aitems_recently_written()):
+        payload = await compute()
+    await aset_item_payload(payload, time.perf_counter() - started)
+    return payload
+
+
+async def aget_or_compute_item_payload(pk, compute):
+    """
+    `get_or_compute_item_payload` for async callers; `compute` is a coroutine function
+    """
+    entry = await cache.aget(item_cache_key(pk), version=ITEM_PAYLOAD_VERSION)
+    if entry is not None:
+        _record('hits')
+        if not _should_refresh_early(entry):
+            return entry['payload'], False
+        async with _arecompute_lock(pk) as acquired:
+            if not acquired:
+                return entry['payload'], False
+            return await _acompute(compute), True
+
+    _record('misses')
+    deadline = time.monotonic() + ITEM_CACHE_LOCK_WAIT
+    while True:
+        async with _arecompute_lock(pk) as acquired:
+            if acquired or time.monotonic() >= deadline:
+                return await _acompute(compute), True
+        await asyncio.sleep(ITEM_CACHE_LOCK_POLL)
+        entry = await cache.aget(item_cache_key(pk), version=ITEM_PAYLOAD_VERSION)
+        if entry is not None:
+            return entry['payload'], False
+
+
+def invalidate_items(pks):
+    """
+    Drop the cached payloads of `pks` in a single cache call
+    """
+    keys = [item_cache_key(pk) for pk in pks]
+    if keys:
+        cache.delete_many(keys, version=ITEM_PAYLOAD_VERSION)
+        _record('evictions', len(keys))
+
+
+def get_generation():
+    generation = cache.get(ITEM_GENERATION_KEY)
+    if generation is None:
+        # Start from the clock rather than 0, so a generation lost to eviction
+        # never comes back to a value that older list entries were keyed by
+        cache.add(ITEM_GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+        generation = cache.get(ITEM_GENERATION_KEY)
+    return generation
+
+
+async def aget_generation():
+    generation = await cache.aget(ITEM_GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(ITEM_GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+        generation = await cache.aget(ITEM_GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(ITEM_GENERATION_KEY)
+    except ValueError:
+        get_generation()
+
+
+def generation_key(name):
+    """
+    Cache key for list-level data that any item write must invalidate
+    """
+    return f"{name}_g{get_generation()}"
+
+
+def _list_page_name(query_params, prefix='item_list'):
+    query = urlencode(sorted((key, sorted(values)) for key, values in query_params.lists()), doseq=True)
+    return f"{prefix}_{hashlib.md5(query.encode()).hexdigest()}"
+
+
+def list_page_key(query_params):
+    """
+    Key for one list page: the normalized query string under the current generation
+    """
+    return generation_key(_list_page_name(query_params))
+
+
+async def alist_page_key(query_params):
+    # Async pages link to the async routes, so they are cached apart
+    return f"{_list_page_name(query_params, 'item_list_async')}_g{await aget_generation()}"
+
+
+def payload_etag(payload):
+    digest = hashlib.md5(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def get_list_page(key):
+    """
+    Return `(etag, payload)` cached under a `list_page_key`, or None
+    """
+    return cache.get(key)
+
+
+def set_list_page(key, payload):
+    """
+    Cache a list page and return its ETag.
+
+    `key` must be computed before the page is built: a write in between
+    then leaves the page under the old generation, where it is never read.
+    """
+    etag = payload_etag(payload)
+    cache.set(key, (etag, payload), timeout=settings.ITEM_LIST_CACHE_TIMEOUT)
+    return etag
+
+
+async def aget_list_page(key):
+    return await cache.aget(key)
+
+
+async def aset_list_page(key, payload):
+    etag = payload_etag(payload)
+    await cache.aset(key, (etag, payload), timeout=settings.ITEM_LIST_CACHE_TIMEOUT)
+    return etag
+
+
+def _apply_changes(pks):
+    invalidate_items(pks)
+    bump_generation()
+    if settings.DATABASE_REPLICAS:
+        cache.set(ITEM_WRITTEN_KEY, True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def items_changed(pks=()):
+    """
+    Invalidate the cached payloads of `pks` and every generation-keyed entry.
+
+    Runs immediately and, inside a transaction, again after commit, so a read
+    that re-cached the old row before the commit does not survive it.
+    Inside `deferred_invalidation()` the work is collected and done once.
+    """
+    pending = _pending_changes.get()
+    if pending is not None:
+        pending.update(pks)
+        return
+
+    pks = list(pks)
+    _apply_changes(pks)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _apply_changes(pks))
+
+
+@contextlib.contextmanager
+def deferred_invalidation():
+    """
+    Collect every `items_changed` call in the block into a single invalidation
+    """
+    pending = set()
+    token = _pending_changes.set(pending)
+    try:
+        yield
+    finally:
+        _pending_changes.reset(token)
+        items_changed(pending)
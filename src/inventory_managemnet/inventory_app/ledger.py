@@ -0,0 +1,177 @@
+"""
+Stock movement ledger.
+
+Every change to an item's quantity is a `StockMovement`. Movements appended
+through `append_movement` are plain inserts that never touch the item row,
+so concurrent writers to a hot item don't contend; `fold_movements`, run
+periodically by the `fold_stock_movements` command, adds them to
+`Item.quantity` and records a `StockSnapshot` of each item it saw.
+
+Folding only covers movements older than STOCK_FOLD_GRACE seconds, so a
+transaction that was still open when the window was read can't commit a
+movement behind it. The latest snapshot time is the watermark the next
+fold starts from, and `quantity_as_of` never has to sum more than the
+movements of one fold interval.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .feed import STOCK, item_event, publish
+from .item_cache import items_changed
+from .models import Item, StockMovement, StockSnapshot
+
+
+logger = logging.getLogger('inventory_app')
+
+# Reasons recorded for movements the application writes itself
+REASON_CREATED = 'created'
+REASON_EDITED = 'edited'
+REASON_ADJUSTED = 'adjusted'
+
+FOLD_LOCK_KEY = 'stock_fold_lock'
+
+
+def quantity_plus(deltas):
+    """
+    `quantity + delta` for an UPDATE of the items in `deltas` ({item_id: delta})
+    """
+    if len(deltas) == 1:
+        return F('quantity') + Value(next(iter(deltas.values())))
+    return F('quantity') + Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def append_movement(item_id, delta, reason='', user=None):
+    """
+    Record a movement to be folded into the item later; a single INSERT
+    """
+    return StockMovement.objects.create(item_id=item_id, delta=delta, reason=reason, user=user)
+
+
+def record_applied(deltas, reason, user_id=None):
+    """
+    Record movements already made to `Item.quantity`, `deltas` being {item_id: delta}
+    """
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(item_id=pk, delta=delta, reason=reason, user_id=user_id, applied=True)
+            for pk, delta in deltas.items()
+            if delta
+        ],
+        batch_size=settings.ITEM_BULK_BATCH_SIZE,
+    )
+
+
+def fold_watermark():
+    return StockSnapshot.objects.aggregate(watermark=Max('taken_at'))['watermark']
+
+
+def fold_movements(now=None, grace=None):
+    """
+    Fold movements up to `now - grace` into item quantities and snapshots.
+
+    Returns the number of items snapshotted, or None if another fold holds
+    the lock.
+    """
+    now = now or timezone.now()
+    grace = settings.STOCK_FOLD_GRACE if grace is None else grace
+    cutoff = now - timedelta(seconds=grace)
+
+    if not cache.add(FOLD_LOCK_KEY, 1, timeout=settings.STOCK_FOLD_LOCK_TIMEOUT):
+        logger.warning("Stock fold already running, skipped")
+        return None
+    try:
+        with transaction.atomic():
+            watermark = fold_watermark()
+            window = StockMovement.objects.filter(created_at__lte=cutoff)
+            if watermark is not None:
+                if cutoff <= watermark:
+                    return 0
+                window = window.filter(created_at__gt=watermark)
+
+            totals = list(
+                window.values('item')
+                .annotate(total=Sum('delta'), pending=Sum('delta', filter=Q(applied=False)))
+                .order_by('item')
+                .values_list('item', 'total', 'pending')
+            )
+            batch_size = settings.ITEM_BULK_BATCH_SIZE
+            for start in range(0, len(totals), batch_size):
+                _fold_batch(totals[start:start + batch_size], cutoff)
+    finally:
+        cache.delete(FOLD_LOCK_KEY)
+
+    logger.info("Folded stock movements of %s items up to %s", len(totals), cutoff.isoformat())
+    return len(totals)
+
+
+def _fold_batch(totals, cutoff):
+    pks = [pk for pk, _, _ in totals]
+    latest = StockSnapshot.objects.filter(item=OuterRef('pk')).order_by('-taken_at').values('quantity')[:1]
+    previous = dict(Item.objects.filter(pk__in=pks).annotate(previous=Subquery(latest)).values_list('pk', 'previous'))
+
+    StockSnapshot.objects.bulk_create([
+        StockSnapshot(item_id=pk, quantity=(previous[pk] or 0) + total, taken_at=cutoff)
+        for pk, total, _ in totals
+        # Movements of an item deleted since are gone with it
+        if pk in previous
+    ])
+
+    pending = {pk: delta for pk, _, delta in totals if delta and pk in previous}
+    if pending:
+        Item.objects.filter(pk__in=pending).update(
+            quantity=quantity_plus(pending),
+            updated_at=timezone.now(),
+        )
+        items_changed(pending)
+        publish(item_event(STOCK, pk, delta=delta) for pk, delta in pending.items())
+
+
+def parse_as_of(value):
+    """
+    An aware datetime from an ISO 8601 `?at=` value, now if empty, None if invalid
+    """
+    if not value:
+        return timezone.now()
+    at = parse_datetime(value)
+    if at is not None and timezone.is_naive(at):
+        at = timezone.make_aware(at)
+    return at
+
+
+def _nearest_snapshot(item_id, at):
+    return (
+        StockSnapshot.objects.filter(item_id=item_id, taken_at__lte=at)
+        .order_by('-taken_at')
+        .values_list('quantity', 'taken_at')
+    )
+
+
+def _movements_since(item_id, at, snapshot):
+    movements = StockMovement.objects.filter(item_id=item_id, created_at__lte=at)
+    if snapshot is not None:
+        movements = movements.filter(created_at__gt=snapshot[1])
+    return movements
+
+
+def quantity_as_of(item_id, at):
+    """
+    The item's quantity at `at`: the nearest snapshot before it plus the movements since
+    """
+    snapshot = _nearest_snapshot(item_id, at).first()
+    total = _movements_since(item_id, at, snapshot).aggregate(total=Sum('delta'))['total']
+    return (snapshot[0] if snapshot else 0) + (total or 0)
+
+
+async def aquantity_as_of(item_id, at):
+    snapshot = await _nearest_snapshot(item_id, at).afirst()
+    total = (await _movements_since(item_id, at, snapshot).aaggregate(total=Sum('delta')))['total']
+    return (snapshot[0] if snapshot else 0) + (total or 0)
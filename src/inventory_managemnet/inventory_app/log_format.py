@@ -0,0 +1,20 @@
+import json
+import logging
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the record's `performance` extra merged in
+    """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **getattr(record, 'performance', {}),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
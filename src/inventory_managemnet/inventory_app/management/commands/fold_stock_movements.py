@@ -0,0 +1,36 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from inventory_app.ledger import fold_movements
+
+
+logger = logging.getLogger('inventory_app')
+
+
+class Command(BaseCommand):
+    help = "Fold stock movements into item quantities and snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.STOCK_FOLD_GRACE,
+            help="Leave movements younger than this many seconds for the next fold",
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help=f"Keep folding every STOCK_FOLD_INTERVAL ({settings.STOCK_FOLD_INTERVAL}s) seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                folded = fold_movements(grace=options['grace'])
+                if folded is not None:
+                    self.stdout.write(f"Folded movements of {folded} items")
+            except Exception as e:
+                if not options['loop']:
+                    raise
+                logger.error("Stock fold failed: %s", e)
+            if not options['loop']:
+                return
+            time.sleep(settings.STOCK_FOLD_INTERVAL)
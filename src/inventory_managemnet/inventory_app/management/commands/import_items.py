@@ -0,0 +1,79 @@
+import json
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from inventory_app.importer import IMPORT_FORMATS, Checkpoint, format_for, import_items
+
+
+class Command(BaseCommand):
+    help = "Import items from a CSV or NDJSON file, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV with a header row, or one JSON object per line")
+        parser.add_argument('--user', required=True, help="Username recorded as the items' creator")
+        parser.add_argument(
+            '--format', choices=sorted(IMPORT_FORMATS),
+            help="Defaults to the file extension (.csv, .ndjson or .jsonl)",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.ITEM_IMPORT_CHUNK_SIZE,
+            help="Rows validated and inserted per transaction",
+        )
+        parser.add_argument('--checkpoint', help="Checkpoint file, by default PATH.checkpoint")
+        parser.add_argument(
+            '--resume', action='store_true',
+            help="Carry on from the checkpoint of an interrupted import",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or format_for(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}")
+
+        checkpoint = Checkpoint(options['checkpoint'] or f'{path}.checkpoint', path)
+        state = None
+        if checkpoint.exists():
+            if not options['resume']:
+                raise CommandError(
+                    f"{checkpoint.path} exists: pass --resume to carry on from it, or delete it to start over"
+                )
+            try:
+                state = checkpoint.load()
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Resuming after {state.rows} rows")
+
+        started = time.monotonic()
+        reported = started
+
+        def on_chunk(state):
+            nonlocal reported
+            now = time.monotonic()
+            if now - reported >= 1 or options['verbosity'] > 1:
+                reported = now
+                self.stdout.write(
+                    f"{state.rows} rows read, {state.created} created, {state.rejected} rejected "
+                    f"({state.rows / (now - started):.0f} rows/s)"
+                )
+
+        def on_reject(row):
+            self.stderr.write(f"Line {row.index}: {json.dumps(row.errors)}")
+
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            state = import_items(
+                f, fmt, user, options['chunk_size'],
+                state=state, checkpoint=checkpoint, on_chunk=on_chunk, on_reject=on_reject,
+            )
+        checkpoint.remove()
+
+        self.stdout.write(
+            f"Imported {state.created} items from {state.rows} rows in {time.monotonic() - started:.1f}s"
+        )
+        if state.rejected:
+            raise CommandError(f"{state.rejected} rows were rejected")
@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from inventory_app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = f"Delete item tombstones older than ITEM_TOMBSTONE_RETENTION ({settings.ITEM_TOMBSTONE_RETENTION} days)"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Pruned {prune_tombstones()} tombstones")
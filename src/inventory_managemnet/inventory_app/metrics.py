@@ -0,0 +1,150 @@
+"""
+Prometheus metrics for the API, the item cache and the database.
+
+Recording is lock-free: each thread adds to plain counters and observation
+lists of its own, and folds them into the prometheus_client metrics at most
+every METRICS_FLUSH_INTERVAL seconds (or after METRICS_FLUSH_SIZE
+observations). A thread's figures can therefore lag by that interval, or
+until its next request when it goes idle; the scraping thread flushes first.
+
+With PROMETHEUS_MULTIPROC_DIR set, prometheus_client keeps the values in
+per-process files and `/metrics` merges them, so any gunicorn worker can
+answer a scrape. The directory must be emptied before the server starts;
+`gunicorn.conf.py` removes the files of workers that exit.
+"""
+import os
+import threading
+import time
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from .counting import get_item_count
+from .db_pool import pool_stats
+
+ITEM_COUNT_HELP = "Number of items (estimated on large tables)"
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'inventory_http_request_duration_seconds', "Request latency by route", ['route', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter('inventory_http_requests', "Requests by route and status", ['route', 'method', 'status'])
+ITEM_CACHE = Counter('inventory_item_cache_lookups', "item_<pk> cache lookups", ['result'])
+DB_QUERY_DURATION = Histogram(
+    'inventory_db_query_duration_seconds', "Database query time", ['database'], buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'inventory_db_pool_connections', "Database pool connections by state, summed over live processes",
+    ['state'], multiprocess_mode='livesum',
+)
+
+_buffers = threading.local()
+
+
+class _Buffer:
+    """
+    One thread's unflushed metric updates
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.observations = {}
+        self.size = 0
+        self.flushed_at = time.monotonic()
+
+    def flush(self):
+        counts, observations = self.counts, self.observations
+        self.counts, self.observations, self.size = {}, {}, 0
+        self.flushed_at = time.monotonic()
+        for (counter, labels), amount in counts.items():
+            counter.labels(*labels).inc(amount)
+        for (histogram, labels), values in observations.items():
+            child = histogram.labels(*labels)
+            for value in values:
+                child.observe(value)
+        _update_pool_gauges()
+
+
+def _buffer():
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = _Buffer()
+    return buffer
+
+
+def _maybe_flush(buffer):
+    if buffer.size >= settings.METRICS_FLUSH_SIZE or time.monotonic() - buffer.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+        buffer.flush()
+
+
+def inc(counter, *labels, amount=1):
+    buffer = _buffer()
+    key = (counter, labels)
+    buffer.counts[key] = buffer.counts.get(key, 0) + amount
+    buffer.size += 1
+    _maybe_flush(buffer)
+
+
+def observe(histogram, value, *labels):
+    buffer = _buffer()
+    buffer.observations.setdefault((histogram, labels), []).append(value)
+    buffer.size += 1
+    _maybe_flush(buffer)
+
+
+def flush():
+    _buffer().flush()
+
+
+def record_request(route, method, status, seconds):
+    observe(REQUEST_LATENCY, seconds, route, method)
+    inc(REQUESTS, route, method, str(status))
+
+
+def record_cache_lookup(result, count=1):
+    inc(ITEM_CACHE, result, amount=count)
+
+
+def record_query(database, seconds):
+    observe(DB_QUERY_DURATION, seconds, database)
+
+
+def _update_pool_gauges():
+    stats = pool_stats()
+    if stats['pooled']:
+        for state in ('in_use', 'idle', 'waiting'):
+            DB_POOL_CONNECTIONS.labels(state).set(stats[state])
+
+
+class ItemCountCollector:
+    """
+    Item count gauge, read from the cached count when scraped
+    """
+
+    def describe(self):
+        yield GaugeMetricFamily('inventory_items', ITEM_COUNT_HELP, labels=['exact'])
+
+    def collect(self):
+        count, exact = get_item_count()
+        gauge = GaugeMetricFamily('inventory_items', ITEM_COUNT_HELP, labels=['exact'])
+        gauge.add_metric([str(exact).lower()], count)
+        yield gauge
+
+
+REGISTRY.register(ItemCountCollector())
+
+
+def render():
+    """
+    Return `(body, content_type)` of the exposition text
+    """
+    flush()
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(ItemCountCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
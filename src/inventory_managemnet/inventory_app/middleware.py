@@ -0,0 +1,119 @@
+import logging
+import random
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import LazyObject
+from .instrumentation import measure_request
+from .metrics import record_request
+from .routers import apin_user, pin_user, routing_request
+
+performance_logger = logging.getLogger('inventory_app.performance')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinMiddleware:
+    """
+    Keep writes and the writer's following reads on the primary database.
+
+    A request with an unsafe method reads from the primary throughout, and
+    once it succeeds the user's reads stay there for DB_REPLICA_PIN_SECONDS,
+    longer than the replicas take to catch up. Without DATABASE_REPLICAS
+    every read is on the primary already, and requests pass straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        writes = self.start(request)
+        with routing_request(request):
+            response = self.get_response(request)
+        if self.should_pin(response, writes) and request.user.is_authenticated:
+            pin_user(request.user)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        writes = self.start(request)
+        with routing_request(request):
+            response = await self.get_response(request)
+        # Unlike the sync path, the lazy session user can't be loaded here
+        user = request.__dict__.get('user')
+        if self.should_pin(response, writes) and not isinstance(user, LazyObject) and getattr(user, 'is_authenticated', False):
+            await apin_user(user)
+        return response
+
+    def start(self, request):
+        writes = request.method not in SAFE_METHODS
+        if writes:
+            request._db_pinned = True
+        return writes
+
+    def should_pin(self, response, writes):
+        return writes and response.status_code < 400
+
+
+class PerformanceMiddleware:
+    """
+    Measure each request; see `inventory_app.instrumentation`.
+
+    The totals go into a Server-Timing header, the Prometheus request
+    metrics and an `inventory_app.performance` log record. Requests slower
+    than SLOW_REQUEST_THRESHOLD_MS are logged as warnings, the others at info
+    level, sampled at PERF_LOG_SAMPLE_RATE.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with measure_request() as metrics:
+            response = self.get_response(request)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        with measure_request() as metrics:
+            response = await self.get_response(request)
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+
+        record = metrics.as_dict()
+        match = request.resolver_match
+        route = match.url_name if match else None
+        record_request(route or 'unmatched', request.method, response.status_code, record['duration_ms'] / 1000)
+
+        slow = record['duration_ms'] >= settings.SLOW_REQUEST_THRESHOLD_MS
+        if not slow and random.random() >= settings.PERF_LOG_SAMPLE_RATE:
+            return
+        record.update({
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+        })
+        performance_logger.log(
+            logging.WARNING if slow else logging.INFO, "%s %s %s %.1fms",
+            request.method, request.path, response.status_code, record['duration_ms'],
+            extra={'performance': record},
+        )
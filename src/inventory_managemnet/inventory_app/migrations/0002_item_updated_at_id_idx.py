@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['-updated_at', '-id'], name='item_updated_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:20
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('pg_catalog.english', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('pg_catalog.english', coalesce({row}description, '')), 'B')"
+)
+
+CREATE_SEARCH_SQL = [
+    f"""
+    CREATE FUNCTION inventory_app_item_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER inventory_app_item_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON inventory_app_item
+    FOR EACH ROW EXECUTE FUNCTION inventory_app_item_search_vector_update()
+    """,
+    f"UPDATE inventory_app_item SET search_vector = {SEARCH_VECTOR.format(row='')}",
+    "CREATE INDEX item_search_vector_idx ON inventory_app_item USING gin (search_vector)",
+    # Match the UPPER(col::text) LIKE ... that icontains/istartswith compile to
+    "CREATE INDEX item_name_trgm_idx ON inventory_app_item USING gin (UPPER(name::text) gin_trgm_ops)",
+    "CREATE INDEX item_description_trgm_idx ON inventory_app_item USING gin (UPPER(description::text) gin_trgm_ops)",
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS item_description_trgm_idx",
+    "DROP INDEX IF EXISTS item_name_trgm_idx",
+    "DROP INDEX IF EXISTS item_search_vector_idx",
+    "DROP TRIGGER IF EXISTS inventory_app_item_search_vector_trigger ON inventory_app_item",
+    "DROP FUNCTION IF EXISTS inventory_app_item_search_vector_update()",
+]
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in CREATE_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in DROP_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0002_item_updated_at_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='item',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quantity'], name='item_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['price'], name='item_price_idx'),
+        ),
+        # Trigger and GIN indexes are Postgres-only, so they are not part of
+        # the model state
+        migrations.RunPython(create_search, drop_search),
+    ]
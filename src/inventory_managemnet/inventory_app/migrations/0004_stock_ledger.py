@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Record each existing item's quantity as its opening balance
+    """
+    Item = apps.get_model('inventory_app', 'Item')
+    StockMovement = apps.get_model('inventory_app', 'StockMovement')
+    db_alias = schema_editor.connection.alias
+    opened_at = django.utils.timezone.now()
+    batch = []
+    for pk, quantity in Item.objects.using(db_alias).exclude(quantity=0).values_list('pk', 'quantity').iterator(chunk_size=2000):
+        batch.append(StockMovement(item_id=pk, delta=quantity, reason='opening balance', created_at=opened_at, applied=True))
+        if len(batch) >= 2000:
+            StockMovement.objects.using(db_alias).bulk_create(batch)
+            batch = []
+    StockMovement.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory_app', '0003_item_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('applied', models.BooleanField(default=False)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory_app.item')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory_app.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-taken_at'], name='snapshot_taken_at_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('item', 'taken_at'), name='snapshot_item_taken_at_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['item', 'created_at'], name='movement_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at'], name='movement_created_idx'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
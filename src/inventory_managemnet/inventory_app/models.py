@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 
 # Create your models here.
 
@@ -12,9 +13,111 @@ class Item(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='items')
+    # Weighted tsvector of name (A) and description (B), maintained by a
+    # database trigger on Postgres; unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Backs the keyset seek used by cursor pagination
+            models.Index(fields=['-updated_at', '-id'], name='item_updated_at_id_idx'),
+            # Range filters on the item list; the search indexes are
+            # Postgres-only and created by migration 0003
+            models.Index(fields=['quantity'], name='item_quantity_idx'),
+            models.Index(fields=['price'], name='item_price_idx'),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class StockMovement(models.Model):
+    """
+    One change to an item's quantity. Rows are only ever inserted.
+
+    `applied` movements were made to `Item.quantity` when they were written
+    (creation, edits, stock adjustments); the others are folded into it later
+    by `fold_stock_movements`. Either way every movement is part of the history.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='movements')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=100, blank=True, default='')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    created_at = models.DateTimeField(default=timezone.now)
+    applied = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # As-of queries for one item, and the fold window over all items
+            models.Index(fields=['item', 'created_at'], name='movement_item_created_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stock movements are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Stock movements are append-only")
+
+    def __str__(self):
+        return f"{self.item_id} {self.delta:+d}"
+
+
+class StockSnapshot(models.Model):
+    """
+    An item's quantity as of `taken_at`, i.e. the sum of every movement up to then
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='stock_snapshots')
+    quantity = models.IntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'taken_at'], name='snapshot_item_taken_at_unique'),
+        ]
+        indexes = [
+            # The fold watermark is the latest snapshot time
+            models.Index(fields=['-taken_at'], name='snapshot_taken_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} = {self.quantity} @ {self.taken_at}"
+
+
+class ItemTombstone(models.Model):
+    """
+    Record of a deleted item, so delta sync clients learn of the delete.
+
+    Written by the post_delete signal and kept for ITEM_TOMBSTONE_RETENTION
+    days; `prune_item_tombstones` removes older ones.
+    """
+    item_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The delta sync seek, in the same (time, id) order as items
+            models.Index(fields=['deleted_at', 'item_id'], name='tombstone_deleted_item_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} deleted @ {self.deleted_at}"
+
+
+class TokenRevocation(models.Model):
+    """
+    When a user's tokens were last revoked, behind the cache entries that
+    StatelessJWTAuthentication checks.
+
+    A cache miss falls back to this row, so an evicted or flushed entry can't
+    let revoked tokens back in. There is no foreign key, so deleted users
+    stay revoked.
+    """
+    user_id = models.BigIntegerField(primary_key=True)
+    revoked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"user {self.user_id} revoked @ {self.revoked_at}"
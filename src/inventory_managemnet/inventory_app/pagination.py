@@ -0,0 +1,98 @@
+from collections import namedtuple
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Keyset ordering used by cursor pages. `id` breaks ties between items that
+# share an `updated_at`, so every position in the list is unique.
+CURSOR_ORDERING = ('-updated_at', '-id')
+CURSOR_SALT = 'inventory_app.pagination.cursor'
+
+CursorPage = namedtuple('CursorPage', ['items', 'next_cursor', 'previous_cursor'])
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(updated_at, pk, reverse=False):
+    """
+    Build an opaque, signed cursor pointing at the (updated_at, id) position
+    """
+    return signing.dumps([updated_at.isoformat(), pk, int(reverse)], salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    """
+    Return the (updated_at, id, reverse) position stored in a cursor
+    """
+    try:
+        updated_at, pk, reverse = signing.loads(cursor, salt=CURSOR_SALT)
+        updated_at = parse_datetime(updated_at)
+        pk = int(pk)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if updated_at is None:
+        raise InvalidCursor(cursor)
+    return updated_at, pk, bool(reverse)
+
+
+def cursor_position(obj):
+    return obj.updated_at, obj.pk
+
+
+def _seek(queryset, cursor):
+    reverse = False
+    if cursor:
+        updated_at, pk, reverse = decode_cursor(cursor)
+        if reverse:
+            queryset = queryset.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+            )
+        else:
+            queryset = queryset.filter(
+                Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lt=pk)
+            )
+
+    if reverse:
+        queryset = queryset.order_by('updated_at', 'id')
+    else:
+        queryset = queryset.order_by(*CURSOR_ORDERING)
+    return queryset, reverse
+
+
+def _cursor_page(items, cursor, reverse, page_size, position):
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    if reverse:
+        items.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(cursor)
+
+    next_cursor = previous_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(*position(items[-1]))
+    if items and has_previous:
+        previous_cursor = encode_cursor(*position(items[0]), reverse=True)
+    return CursorPage(items, next_cursor, previous_cursor)
+
+
+def paginate_by_cursor(queryset, cursor, page_size, position=cursor_position):
+    """
+    Return one page of `queryset` after (or before) the position in `cursor`.
+
+    The page is fetched with a seek on (updated_at, id) instead of an OFFSET,
+    so every page costs the same whatever its depth. One extra row is read to
+    know whether there is anything past the page. `position` returns the
+    (updated_at, id) pair of a fetched element, for querysets of rows.
+    """
+    queryset, reverse = _seek(queryset, cursor)
+    return _cursor_page(list(queryset[:page_size + 1]), cursor, reverse, page_size, position)
+
+
+async def apaginate_by_cursor(queryset, cursor, page_size, position=cursor_position):
+    queryset, reverse = _seek(queryset, cursor)
+    items = [item async for item in queryset[:page_size + 1]]
+    return _cursor_page(items, cursor, reverse, page_size, position)
@@ -0,0 +1,114 @@
+"""
+Read-only Item representation built straight from database rows.
+
+Produces the same JSON shape as ItemSerializer without going through DRF
+field introspection; ItemSerializer is still used for every write.
+"""
+from decimal import Decimal
+from django.db import models
+from django.utils import timezone
+from .instrumentation import timed_function
+from .models import Item
+
+# Same keys, in the same order, as ItemSerializer
+ITEM_FIELDS = ('id', 'name', 'description', 'quantity', 'price', 'updated_at', 'created_at', 'created_by')
+ITEM_COLUMNS = ITEM_FIELDS[:-1] + ('created_by__username',)
+
+_ID_INDEX = ITEM_FIELDS.index('id')
+_UPDATED_AT_INDEX = ITEM_FIELDS.index('updated_at')
+
+
+def format_decimal(value, quantum, tz=None):
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return format(value.quantize(quantum), 'f')
+
+
+def format_datetime(value, tz=None):
+    """
+    ISO 8601 in the current time zone, with UTC written as 'Z' like DRF does
+    """
+    if value is None:
+        return None
+    value = value.astimezone(tz or timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _formatter(column):
+    if '__' in column:
+        return None
+    field = Item._meta.get_field(column)
+    if isinstance(field, models.DecimalField):
+        quantum = Decimal('.1') ** field.decimal_places
+        return lambda value, tz: format_decimal(value, quantum)
+    if isinstance(field, models.DateTimeField):
+        return format_datetime
+    return None
+
+
+# (column index, formatter) resolved once at import, so building a
+# representation is a single pass over the row
+_FORMATTERS = tuple(
+    (index, formatter)
+    for index, formatter in enumerate(map(_formatter, ITEM_COLUMNS))
+    if formatter
+)
+
+
+def format_row(row, tz=None):
+    """
+    Return the row's values formatted for output, in ITEM_FIELDS order.
+
+    Pass `tz` when formatting many rows to look the current time zone up once.
+    """
+    tz = tz or timezone.get_current_timezone()
+    row = list(row)
+    for index, formatter in _FORMATTERS:
+        row[index] = formatter(row[index], tz)
+    return row
+
+
+@timed_function('serialize')
+def represent_row(row, tz=None):
+    """
+    Build the Item representation from a tuple of ITEM_COLUMNS
+    """
+    return dict(zip(ITEM_FIELDS, format_row(row, tz)))
+
+
+@timed_function('serialize')
+def represent_rows(rows):
+    tz = timezone.get_current_timezone()
+    return [represent_row(row, tz) for row in rows]
+
+
+def represent_item(item):
+    """
+    Build the Item representation from a model instance
+    """
+    return represent_row(
+        [getattr(item, key) for key in ITEM_FIELDS[:-1]] + [item.created_by.username]
+    )
+
+
+def item_rows(queryset):
+    """
+    Project `queryset` onto ITEM_COLUMNS; `created_by` is joined, not looked up
+    """
+    return queryset.values_list(*ITEM_COLUMNS)
+
+
+def represent_items(queryset):
+    # Fetch first, so the query isn't counted as serialization time
+    return represent_rows(list(item_rows(queryset)))
+
+
+def row_position(row):
+    """
+    The (updated_at, id) keyset position of a raw row, for cursor pagination
+    """
+    return row[_UPDATED_AT_INDEX], row[_ID_INDEX]
@@ -0,0 +1,89 @@
+"""
+Database routing between the primary and its read replicas.
+
+Writes go to the primary (`default`), and so do reads inside a transaction
+on it. Other reads go to a random alias from DATABASE_REPLICAS unless the
+current context is pinned to the primary: by `pin_to_primary()`, by a
+request that writes, or by a request from a user who wrote in the last
+DB_REPLICA_PIN_SECONDS, so users always read their own writes.
+"""
+import contextlib
+import contextvars
+import random
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+_pinned = contextvars.ContextVar('db_pinned_to_primary', default=False)
+_current_request = contextvars.ContextVar('db_routing_request', default=None)
+
+
+def user_pin_key(user_id):
+    return f"db_primary_pin_user_{user_id}"
+
+
+@contextlib.contextmanager
+def pin_to_primary(pinned=True):
+    """
+    Send every read in the block to the primary (when `pinned`)
+    """
+    token = _pinned.set(_pinned.get() or pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextlib.contextmanager
+def routing_request(request):
+    token = _current_request.set(request)
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+def pin_user(user):
+    cache.set(user_pin_key(user.pk), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+async def apin_user(user):
+    await cache.aset(user_pin_key(user.pk), True, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def _request_pinned(request):
+    pinned = getattr(request, '_db_pinned', None)
+    if pinned is not None:
+        return pinned
+    # DRF and the async views replace the lazy session user once the token is
+    # checked; until then the user is unknown and must not be evaluated here,
+    # since loading it is itself a routed read
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, LazyObject):
+        return False
+    request._db_pinned = user.is_authenticated and cache.get(user_pin_key(user.pk)) is not None
+    return request._db_pinned
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _pinned.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        request = _current_request.get()
+        if request is not None and _request_pinned(request):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,101 @@
+"""
+Item list filters and search.
+
+    ?q=          ranked full-text search on name and description
+    ?search=     case-insensitive substring of name or description
+    ?name_prefix= case-insensitive name prefix
+    ?min_quantity= ?max_quantity= ?min_price= ?max_price=   inclusive ranges
+    ?created_by= username of the owner
+
+On Postgres `q` matches the `search_vector` column, which a trigger keeps
+up to date, and `search`/`name_prefix` are served by trigram indexes on
+UPPER(name) and UPPER(description), the form Django's icontains and
+istartswith lookups compile to (see migration 0003). Other databases fall
+back to substring matching so the same queries run in tests.
+"""
+from decimal import Decimal, InvalidOperation
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from .pagination import CURSOR_ORDERING
+
+SEARCH_CONFIG = 'english'
+
+RANGE_FILTERS = (
+    ('min_quantity', 'quantity__gte', int),
+    ('max_quantity', 'quantity__lte', int),
+    ('min_price', 'price__gte', Decimal),
+    ('max_price', 'price__lte', Decimal),
+)
+FILTER_PARAMS = ('q', 'search', 'name_prefix', 'created_by') + tuple(param for param, _, _ in RANGE_FILTERS)
+
+
+class InvalidFilter(Exception):
+    pass
+
+
+def _parse_number(params, name, cast):
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        number = cast(value)
+    except (ValueError, InvalidOperation):
+        raise InvalidFilter(f"{name} must be a number")
+    if isinstance(number, Decimal) and not number.is_finite():
+        raise InvalidFilter(f"{name} must be a number")
+    return number
+
+
+def is_filtered(params):
+    return any(params.get(name, '').strip() for name in FILTER_PARAMS)
+
+
+def filter_items(queryset, params):
+    """
+    Apply the filters in `params` to an Item queryset.
+
+    Returns `(queryset, ranked)`; a ranked queryset is ordered by relevance
+    first, so it can't be paged by cursor. Raises InvalidFilter on a
+    malformed value.
+    """
+    for param, lookup, cast in RANGE_FILTERS:
+        value = _parse_number(params, param, cast)
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+
+    created_by = params.get('created_by', '').strip()
+    if created_by:
+        queryset = queryset.filter(created_by__username=created_by)
+
+    name_prefix = params.get('name_prefix', '').strip()
+    if name_prefix:
+        queryset = queryset.filter(name__istartswith=name_prefix)
+
+    search = params.get('search', '').strip()
+    if search:
+        queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
+
+    q = params.get('q', '').strip()
+    if q:
+        return full_text_search(queryset, q), True
+    return queryset, False
+
+
+def full_text_search(queryset, q):
+    """
+    Items matching the web-search style query `q`, best match first
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+        rank = SearchRank(F('search_vector'), query)
+        return queryset.filter(search_vector=query).annotate(rank=rank).order_by('-rank', *CURSOR_ORDERING)
+
+    # Every term must appear in the name or the description; items that
+    # have all of them in the name rank first, as the name weighs more
+    in_name = Q()
+    for term in q.split():
+        queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        in_name &= Q(name__icontains=term)
+    rank = Case(When(in_name, then=Value(1.0)), default=Value(0.4), output_field=FloatField())
+    return queryset.annotate(rank=rank).order_by('-rank', *CURSOR_ORDERING)
@@ -1,8 +1,26 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Item
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import USER_CLAIMS
+from .instrumentation import timed
+from .models import Item, StockMovement
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """
+    Count validation and representation as the request's serialize time
+    """
+
+    def run_validation(self, *args, **kwargs):
+        with timed('serialize'):
+            return super().run_validation(*args, **kwargs)
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     
     class Meta:
@@ -17,7 +35,20 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
 
-class ItemSerializer(serializers.ModelSerializer):
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair carrying the claims StatelessJWTAuthentication builds the user from
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+class ItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
 
     class Meta:
@@ -36,4 +67,58 @@ class ItemSerializer(serializers.ModelSerializer):
         else:
             if Item.objects.filter(name=value).exclude(id=self.instance.id).exists():
                 raise serializers.ValidationError('An item with this name already exists.')
-        return value
\ No newline at end of file
+        return value
+
+
+class BulkItemSerializer(ItemSerializer):
+    """
+    ItemSerializer for bulk writes. Name uniqueness is checked for the whole
+    batch in one query (see `inventory_app.bulk`), not once per row.
+    """
+    name = serializers.CharField(max_length=100)
+
+    def validate_name(self, value):
+        return value
+
+
+# Largest value of the quantity column (a 32-bit integer)
+QUANTITY_MAX = 2**31 - 1
+
+
+class StockAdjustmentSerializer(TimedSerializerMixin, serializers.Serializer):
+    delta = serializers.IntegerField(min_value=-QUANTITY_MAX, max_value=QUANTITY_MAX)
+    allow_negative = serializers.BooleanField(default=False)
+
+    def validate_delta(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Delta must not be zero.")
+        return value
+
+
+class StockBatchEntrySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    delta = serializers.IntegerField(min_value=-QUANTITY_MAX, max_value=QUANTITY_MAX)
+
+    validate_delta = StockAdjustmentSerializer.validate_delta
+
+
+class StockBatchSerializer(TimedSerializerMixin, serializers.Serializer):
+    adjustments = StockBatchEntrySerializer(many=True, allow_empty=False)
+    allow_negative = serializers.BooleanField(default=False)
+
+    def validate_adjustments(self, value):
+        if len(value) > settings.ITEM_BULK_MAX_ROWS:
+            raise serializers.ValidationError(f"A batch may contain at most {settings.ITEM_BULK_MAX_ROWS} adjustments.")
+        return value
+
+
+class StockMovementSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user = serializers.ReadOnlyField(source='user.username')
+
+    class Meta:
+        model = StockMovement
+        fields = ('id', 'item', 'delta', 'reason', 'user', 'created_at', 'applied')
+        read_only_fields = ('id', 'item', 'created_at', 'applied')
+        extra_kwargs = {'delta': {'min_value': -QUANTITY_MAX, 'max_value': QUANTITY_MAX}}
+
+    validate_delta = StockAdjustmentSerializer.validate_delta
@@ -0,0 +1,126 @@
+import contextlib
+import contextvars
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .authentication import revoke_user_tokens
+from .counting import adjust_item_count
+from .db_pool import record_connection_created
+from .feed import CREATED, DELETED, UPDATED, item_event, publish
+from .instrumentation import record_query
+from .item_cache import items_changed
+from .ledger import REASON_CREATED, REASON_EDITED, record_applied
+from .models import Item, ItemTombstone
+
+
+@receiver(post_init, sender=Item)
+def item_loaded(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred quantity is not fetched here
+    instance._loaded_quantity = instance.__dict__.get('quantity')
+
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        adjust_item_count(1)
+    items_changed([instance.pk])
+    record_quantity_change(instance, created, update_fields)
+    publish([item_event(CREATED if created else UPDATED, instance.pk, quantity=instance.__dict__.get('quantity'))])
+
+
+def record_quantity_change(instance, created, update_fields):
+    # Saved quantities are written straight to the item, so the ledger entry is applied
+    quantity = instance.__dict__.get('quantity')
+    if created:
+        record_applied({instance.pk: quantity}, REASON_CREATED, instance.created_by_id)
+    elif update_fields is not None and 'quantity' not in update_fields:
+        return
+    elif quantity is not None and instance._loaded_quantity is not None:
+        record_applied({instance.pk: quantity - instance._loaded_quantity}, REASON_EDITED)
+    instance._loaded_quantity = quantity
+
+
+# Set inside `batched_deletes()`, whose caller records the deletes itself
+_batching_deletes = contextvars.ContextVar('batching_item_deletes', default=False)
+
+
+@contextlib.contextmanager
+def batched_deletes():
+    """
+    Skip the per-item delete bookkeeping in the block; the caller passes the
+    deleted ids to `record_item_deletes` instead
+    """
+    token = _batching_deletes.set(True)
+    try:
+        yield
+    finally:
+        _batching_deletes.reset(token)
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    if not _batching_deletes.get():
+        record_item_deletes([instance.pk])
+
+
+def record_item_deletes(pks):
+    """
+    Count, invalidate, tombstone and publish the deletes of `pks`
+    """
+    pks = list(pks)
+    adjust_item_count(-len(pks))
+    items_changed(pks)
+    ItemTombstone.objects.bulk_create([ItemTombstone(item_id=pk) for pk in pks])
+    publish(item_event(DELETED, pk) for pk in pks)
+
+
+# Changing any of these must end the sessions that tokens already grant
+TOKEN_ACCESS_FIELDS = ('password', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _access_fields(user):
+    return {field: user.__dict__.get(field) for field in TOKEN_ACCESS_FIELDS}
+
+
+@receiver(post_init, sender=User)
+def user_loaded(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not fetched here
+    instance._loaded_username = instance.__dict__.get('username')
+    instance._loaded_access = _access_fields(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if not created:
+        revoke_if_access_changed(instance)
+
+    # Item payloads embed the creator's username, so a rename invalidates them
+    username = instance.__dict__.get('username')
+    if created or username == instance._loaded_username:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._loaded_username = username
+    items_changed(Item.objects.filter(created_by=instance).values_list('id', flat=True))
+
+
+def revoke_if_access_changed(instance):
+    access = _access_fields(instance)
+    loaded = instance._loaded_access
+    # Unloaded fields, and a first password, can't have been relied on by a token
+    if any(loaded[field] not in (None, '') and access[field] != loaded[field] for field in TOKEN_ACCESS_FIELDS):
+        revoke_user_tokens(instance.pk)
+    instance._loaded_access = access
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
+
+
+@receiver(connection_created)
+def database_connected(sender, connection, **kwargs):
+    record_connection_created(connection.alias)
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
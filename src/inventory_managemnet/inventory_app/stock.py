@@ -0,0 +1,92 @@
+import logging
+from django.db import DataError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from .feed import STOCK, item_event, publish
+from .item_cache import items_changed
+from .ledger import REASON_ADJUSTED, quantity_plus, record_applied
+from .models import Item
+
+
+logger = logging.getLogger('inventory_app')
+
+
+def merge_adjustments(pairs):
+    """
+    Sum the deltas of `(item_id, delta)` pairs per item, keeping first-seen order
+    """
+    deltas = {}
+    for pk, delta in pairs:
+        deltas[pk] = deltas.get(pk, 0) + delta
+    return deltas
+
+
+def _stock_condition(deltas, allow_negative):
+    if allow_negative:
+        return Q(pk__in=deltas)
+    # A decrement only matches while the row still has enough stock
+    condition = Q(pk__in=[pk for pk, delta in deltas.items() if delta >= 0])
+    for pk, delta in deltas.items():
+        if delta < 0:
+            condition |= Q(pk=pk, quantity__gte=-delta)
+    return condition
+
+
+def adjust_stock(deltas, allow_negative=False, user=None):
+    """
+    Add `deltas` ({item_id: delta}) to item quantities in one UPDATE.
+
+    The quantities are changed in the database (`quantity = quantity + delta`),
+    so concurrent adjustments never overwrite each other, and unless
+    `allow_negative` no quantity can drop below zero. Either every item is
+    adjusted or none is; each adjustment is also recorded in the ledger as
+    an applied movement by `user`. Returns `(applied, failures)` where
+    `failures` maps item ids to `(status, detail)`.
+    """
+    try:
+        applied = _apply(deltas, allow_negative, user)
+    except DataError as e:
+        # The new quantity overflows the column
+        logger.warning("Stock adjustment out of range: %s", e)
+        return False, {pk: (status.HTTP_400_BAD_REQUEST, "Quantity out of range") for pk in deltas}
+
+    if applied:
+        logger.info("Adjusted stock of %s items", len(deltas))
+        return True, {}
+    return False, stock_failures(deltas, allow_negative)
+
+
+def _apply(deltas, allow_negative, user):
+    with transaction.atomic():
+        updated = Item.objects.filter(_stock_condition(deltas, allow_negative)).update(
+            quantity=quantity_plus(deltas),
+            updated_at=timezone.now(),
+        )
+        applied = updated == len(deltas)
+        if applied:
+            record_applied(deltas, REASON_ADJUSTED, getattr(user, 'pk', None))
+            # update() sends no signals; the cached payloads are dropped, not re-read
+            items_changed(deltas)
+            publish(item_event(STOCK, pk, delta=delta) for pk, delta in deltas.items())
+        else:
+            transaction.set_rollback(True)
+    return applied
+
+
+def stock_failures(deltas, allow_negative):
+    """
+    Work out why a rejected adjustment did not match every item
+    """
+    quantities = dict(Item.objects.filter(pk__in=deltas).values_list('id', 'quantity'))
+    failures = {}
+    for pk, delta in deltas.items():
+        if pk not in quantities:
+            failures[pk] = (status.HTTP_404_NOT_FOUND, "Item not found")
+        elif not allow_negative and quantities[pk] + delta < 0:
+            failures[pk] = (status.HTTP_409_CONFLICT, "Insufficient stock")
+    if not failures:
+        # The stock was restored between the UPDATE and this read
+        failures = {pk: (status.HTTP_409_CONFLICT, "Stock changed concurrently, retry") for pk in deltas}
+    logger.warning("Rejected stock adjustment of %s items", len(deltas))
+    return failures
@@ -0,0 +1,124 @@
+"""
+Delta sync: what changed in the item table since a client's watermark.
+
+Items are read in (updated_at, id) order and the tombstones of deleted items
+in (deleted_at, item_id) order, each through its index, and merged into one
+stream of changes. A watermark is a signed position in that stream, so a
+sync reads only the changes after it, whatever the size of the catalogue.
+
+Only changes older than ITEM_SYNC_LAG seconds are served. `updated_at` is
+stamped before the write commits, so a change younger than that could still
+be joined by an older-stamped one that commits later.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Item, ItemTombstone
+from .representations import item_rows, represent_rows, row_position
+
+WATERMARK_SALT = 'inventory_app.sync.watermark'
+
+# Order of entries with the same time and id: an item before its tombstone
+ITEM, TOMBSTONE = 0, 1
+
+ChangeSet = namedtuple('ChangeSet', ['items', 'deleted', 'watermark', 'more'])
+
+
+class InvalidWatermark(Exception):
+    pass
+
+
+class ExpiredWatermark(Exception):
+    """
+    The watermark predates the retained tombstones; the client must resync
+    """
+
+
+def encode_watermark(changed_at, pk, kind):
+    return signing.dumps([changed_at.isoformat(), pk, kind], salt=WATERMARK_SALT)
+
+
+def decode_watermark(watermark):
+    """
+    Return the (changed_at, id, kind) position stored in a watermark
+    """
+    try:
+        changed_at, pk, kind = signing.loads(watermark, salt=WATERMARK_SALT)
+        changed_at = parse_datetime(changed_at)
+        pk, kind = int(pk), int(kind)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidWatermark(watermark)
+    if changed_at is None:
+        raise InvalidWatermark(watermark)
+    return changed_at, pk, kind
+
+
+def _after(queryset, time_field, id_field, position, kind):
+    changed_at, pk, position_kind = position
+    after = Q(**{f'{time_field}__gt': changed_at}) | Q(**{time_field: changed_at, f'{id_field}__gt': pk})
+    if kind > position_kind:
+        after |= Q(**{time_field: changed_at, id_field: pk})
+    return queryset.filter(after)
+
+
+def changes_since(watermark, limit, now=None):
+    """
+    Return the first `limit` changes after `watermark` as a ChangeSet.
+
+    Without a watermark every item is a change. Within a set, only the last
+    change of an item counts, so `items` and `deleted` never share an id.
+    Once caught up, the watermark moves on to the lag cutoff, so idle
+    clients' watermarks don't expire.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.ITEM_SYNC_LAG)
+    position = decode_watermark(watermark) if watermark else None
+    if position is not None and position[0] < now - timedelta(days=settings.ITEM_TOMBSTONE_RETENTION):
+        raise ExpiredWatermark(watermark)
+
+    items = Item.objects.filter(updated_at__lte=cutoff)
+    tombstones = ItemTombstone.objects.filter(deleted_at__lte=cutoff)
+    if position is not None:
+        items = _after(items, 'updated_at', 'id', position, ITEM)
+        tombstones = _after(tombstones, 'deleted_at', 'item_id', position, TOMBSTONE)
+
+    # Either stream may supply the whole set, so each is read up to limit + 1
+    rows = item_rows(items.order_by('updated_at', 'id'))[:limit + 1]
+    deletes = tombstones.order_by('deleted_at', 'item_id').values_list('deleted_at', 'item_id')[:limit + 1]
+    stream = sorted(
+        [(*row_position(row), ITEM, row) for row in rows]
+        + [(deleted_at, pk, TOMBSTONE, None) for deleted_at, pk in deletes],
+        key=lambda entry: entry[:3],
+    )
+    more = len(stream) > limit
+    stream = stream[:limit]
+
+    latest = {}
+    for _, pk, _, row in stream:
+        latest.pop(pk, None)
+        latest[pk] = row
+
+    end = tuple(stream[-1][:3]) if stream else position
+    if not more:
+        end = max(end or (cutoff, 0, ITEM), (cutoff, 0, ITEM))
+    return ChangeSet(
+        items=represent_rows([row for row in latest.values() if row is not None]),
+        deleted=[pk for pk, row in latest.items() if row is None],
+        watermark=encode_watermark(*end),
+        more=more,
+    )
+
+
+def prune_tombstones(now=None):
+    """
+    Delete tombstones past ITEM_TOMBSTONE_RETENTION; return how many
+    """
+    now = now or timezone.now()
+    deleted, _ = ItemTombstone.objects.filter(
+        deleted_at__lt=now - timedelta(days=settings.ITEM_TOMBSTONE_RETENTION),
+    ).delete()
+    return deleted
@@ -11,7 +11,7 @@ class UserFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = User
 
-    username = factory.lazy_attribute(lambda _: fake.user_name())
+    username = factory.Sequence(lambda n: f"{fake.user_name()}{n}")
     email = factory.lazy_attribute(lambda _: fake.email())
     password = factory.PostGenerationMethodCall("set_password", "password123")  
 
@@ -19,7 +19,8 @@ class UserFactory(factory.django.DjangoModelFactory):
 class ItemFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Item
-    name = factory.LazyAttribute(lambda _: fake.word().capitalize())
+    # Item names are unique, so suffix the random word with a sequence number
+    name = factory.Sequence(lambda n: f"{fake.word().capitalize()} {n}")
     description = factory.LazyAttribute(lambda _: fake.sentence())
     quantity = factory.LazyAttribute(lambda _: fake.random_int(min=1, max=100))
     price = factory.LazyAttribute(lambda _: fake.pydecimal(left_digits=3, right_digits=2, positive=True))
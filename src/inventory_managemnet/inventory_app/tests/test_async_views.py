@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from inventory_app.item_cache import get_item_payload
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class AsyncItemViewsTest(TestCase):
+    """Test the async (ASGI) item read endpoints"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.items = ItemFactory.create_batch(12, created_by=self.user)
+        self.item = self.items[0]
+        self.headers = {'Authorization': f"Bearer {AccessToken.for_user(self.user)}"}
+
+        # Cached counts would otherwise leak between tests
+        cache.clear()
+
+    async def test_authentication_required(self):
+        """Test requests without a valid token get 401"""
+        response = await self.async_client.get(reverse("async-item-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        response = await self.async_client.get(reverse("async-item-list"), headers={'Authorization': "Bearer not-a-token"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_matches_sync_view(self):
+        """Test the async list returns the same page as the sync one"""
+        response = await self.async_client.get(reverse("async-item-list"), {'page': 1}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['count'], 12)
+        self.assertTrue(data['next'].startswith(reverse("async-item-list")))
+
+        sync = await self.async_client.get(reverse("item-list"), {'page': 1}, headers=self.headers)
+        self.assertEqual(data['results'], sync.json()['results'])
+
+        response = await self.async_client.get(
+            reverse("async-item-list"), {'page': 1}, headers={**self.headers, 'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_cursor_and_filters(self):
+        """Test cursor pages and filters work on the async list"""
+        response = await self.async_client.get(reverse("async-item-list"), {'cursor': ''}, headers=self.headers)
+        first = response.json()
+        self.assertEqual(len(first['results']), 10)
+        response = await self.async_client.get(first['next'], headers=self.headers)
+        self.assertEqual(len(response.json()['results']), 2)
+
+        response = await self.async_client.get(reverse("async-item-list"), {'cursor': 'bogus'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+        response = await self.async_client.get(reverse("async-item-list"), {'name_prefix': self.item.name}, headers=self.headers)
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.item.pk])
+
+    async def test_detail_is_cached(self):
+        """Test the async detail fills the shared item cache"""
+        url = reverse("async-item-detail", kwargs={"pk": self.item.pk})
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['name'], self.item.name)
+        self.assertEqual(get_item_payload(self.item.pk), response.json())
+
+        response = await self.async_client.get(reverse("async-item-detail", kwargs={"pk": 99999}), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_stock(self):
+        """Test the async stock read sums the ledger"""
+        response = await self.async_client.get(reverse("async-item-stock", kwargs={"pk": self.item.pk}), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['quantity'], self.item.quantity)
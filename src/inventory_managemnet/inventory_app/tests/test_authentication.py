@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class StatelessJWTAuthenticationTest(APITestCase):
+    """Test authenticating from token claims, and revoking tokens"""
+
+    def setUp(self):
+        self.user = UserFactory(username="claims-user")
+        self.item = ItemFactory(created_by=self.user)
+        self.detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        cache.clear()
+
+    def obtain_token(self):
+        response = self.client.post(reverse("token_obtain_pair"), {"username": "claims-user", "password": "password123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def authorize(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_cached_detail_needs_no_queries(self):
+        """Test an authenticated item cache hit runs no SQL"""
+        self.authorize(self.obtain_token()['access'])
+        self.client.get(self.detail_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The claims-built user works as a foreign key value
+        response = self.client.post(reverse("item-list"), {"name": "Claims item", "quantity": 1, "price": "1.00"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_by'], "claims-user")
+
+    def test_tokens_without_claims_are_cached(self):
+        """Test older tokens fall back to one lookup per process"""
+        self.authorize(AccessToken.for_user(self.user))
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_200_OK)
+
+    def test_revoke(self):
+        """Test revoked tokens, and tokens refreshed from them, are refused"""
+        tokens = self.obtain_token()
+        self.authorize(tokens['access'])
+        response = self.client.post(reverse("token_revoke"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        refreshed = self.client.post(reverse("token_refresh"), {"refresh": tokens['refresh']}).data['access']
+        self.authorize(refreshed)
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_survives_cache_loss(self):
+        """Test revoked tokens stay refused after the cache is flushed"""
+        self.authorize(self.obtain_token()['access'])
+        self.client.post(reverse("token_revoke"))
+        cache.clear()
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Unrevoked users cost one lookup, then the answer is cached
+        other = UserFactory()
+        self.authorize(AccessToken.for_user(other))
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_200_OK)
+
+    def test_access_changes_revoke(self):
+        """Test changing a password or deactivating a user ends their tokens"""
+        self.authorize(self.obtain_token()['access'])
+        self.user.email = "claims@example.com"
+        self.user.save()
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_200_OK)
+        self.user.set_password("new-password-456")
+        self.user.save()
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        other = UserFactory()
+        self.authorize(AccessToken.for_user(other))
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_200_OK)
+        other.is_active = False
+        other.save()
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_401_UNAUTHORIZED)
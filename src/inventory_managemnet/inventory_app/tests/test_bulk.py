@@ -0,0 +1,133 @@
+import json
+from unittest.mock import patch
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from inventory_app.models import Item, ItemTombstone
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemBulkTest(APITestCase):
+    """Test the bulk create/update/delete endpoint"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user, quantity=5)
+        self.other = ItemFactory(created_by=self.user)
+        self.bulk_url = reverse("item-bulk")
+        cache.clear()
+
+    def test_mixed_batch(self):
+        """Test creates, updates and deletes are applied together"""
+        rows = [
+            {"name": "Bulk A", "quantity": 1, "price": "1.00"},
+            {"id": self.item.pk, "quantity": 9},
+            {"op": "delete", "id": self.other.pk},
+            {"name": "Bulk B", "quantity": 2, "price": "2.50"},
+        ]
+        response = self.client.post(self.bulk_url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], [201, 200, 204, 201])
+        self.assertEqual(Item.objects.get(pk=results[0]['id']).name, "Bulk A")
+        self.assertEqual(Item.objects.get(pk=results[0]['id']).created_by, self.user)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 9)
+        self.assertFalse(Item.objects.filter(pk=self.other.pk).exists())
+
+    def test_ndjson_body(self):
+        """Test an NDJSON body is accepted"""
+        body = "\n".join(json.dumps({"name": f"Line {n}", "quantity": n, "price": "1.00"}) for n in range(3))
+        response = self.client.post(self.bulk_url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Item.objects.filter(name__startswith="Line ").count(), 3)
+
+    def test_invalid_row_rejects_batch(self):
+        """Test nothing is written when any row is invalid"""
+        rows = [
+            {"name": "Fine", "quantity": 1, "price": "1.00"},
+            {"name": self.other.name, "quantity": 1, "price": "1.00"},
+            {"name": "Fine", "quantity": 1, "price": "1.00"},
+            {"id": 99999, "quantity": 1},
+            {"op": "explode"},
+        ]
+        response = self.client.post(self.bulk_url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        results = response.data['results']
+        self.assertNotIn('errors', results[0])
+        self.assertIn('name', results[1]['errors'])
+        self.assertIn('name', results[2]['errors'])
+        self.assertEqual(results[3]['status'], status.HTTP_404_NOT_FOUND)
+        self.assertIn('op', results[4]['errors'])
+        self.assertFalse(Item.objects.filter(name="Fine").exists())
+
+    def test_name_freed_by_delete(self):
+        """Test a name can be reused when its holder is deleted in the same batch"""
+        rows = [
+            {"op": "delete", "id": self.other.pk},
+            {"name": self.other.name, "quantity": 1, "price": "1.00"},
+        ]
+        response = self.client.post(self.bulk_url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_updates_invalidate_cache(self):
+        """Test the cached detail of an updated item is dropped"""
+        detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        self.client.get(detail_url)
+
+        self.client.post(self.bulk_url, [{"id": self.item.pk, "quantity": 77}], format="json")
+        self.assertEqual(self.client.get(detail_url).data['quantity'], 77)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Test validation and writes use a fixed number of queries"""
+        rows = [{"name": f"Batch {n}", "quantity": n, "price": "1.00"} for n in range(50)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.bulk_url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), 5)
+
+    def test_updates_only_write_their_fields(self):
+        """Test a row is updated with the fields it sets, not the whole batch's"""
+        rows = [{"id": self.item.pk, "name": "Renamed"}, {"id": self.other.pk, "quantity": 3}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.bulk_url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        rename = next(sql for sql in updates if '"name"' in sql)
+        self.assertNotIn('"quantity"', rename)
+
+    def test_concurrent_name_conflict(self):
+        """Test a name taken after the check is rejected, not a server error"""
+        rows = [{"name": self.other.name, "quantity": 1, "price": "1.00"}]
+        # As if `other` had been created between the check and the insert
+        with patch('inventory_app.bulk.check_name_conflicts'):
+            response = self.client.post(self.bulk_url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'][0]['status'], status.HTTP_409_CONFLICT)
+        self.assertEqual(Item.objects.filter(name=self.other.name).count(), 1)
+
+    def test_delete_queries_do_not_grow_with_batch(self):
+        """Test deletes, and their tombstones, use a fixed number of queries"""
+        def delete_batch(size):
+            items = ItemFactory.create_batch(size, created_by=self.user)
+            rows = [{"op": "delete", "id": item.pk} for item in items]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.bulk_url, rows, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        self.assertEqual(delete_batch(2), delete_batch(20))
+        self.assertEqual(ItemTombstone.objects.count(), 22)
+
+    def test_rejects_non_list(self):
+        """Test a body that is not a list of rows is rejected"""
+        response = self.client.post(self.bulk_url, {"name": "Single"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
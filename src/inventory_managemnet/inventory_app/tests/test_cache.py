@@ -4,6 +4,11 @@ from django.urls import reverse
 from django.core.cache import cache
 from inventory_app.tests.factories import UserFactory, ItemFactory
 from unittest.mock import patch
+from inventory_app.item_cache import (
+    ITEM_PAYLOAD_VERSION, cache_stats, generation_key, get_generation, get_item_payload, item_cache_key,
+    reset_cache_stats,
+)
+from inventory_app.models import Item
 
 class ItemCacheTest(APITestCase):
     """Test caching behavior for item details"""
@@ -25,7 +30,7 @@ class ItemCacheTest(APITestCase):
         self.assertEqual(response1.status_code, status.HTTP_200_OK)
         
         # Check that it logged a cache miss (debug message about database fetch)
-        mock_logger.debug.assert_called_with(f"item {self.item.pk} fetched from database and cached")
+        mock_logger.debug.assert_called_with("item %s fetched from database and cached", self.item.pk)
         mock_logger.reset_mock()
         
         # Second request - should be a cache hit
@@ -33,7 +38,7 @@ class ItemCacheTest(APITestCase):
         self.assertEqual(response2.status_code, status.HTTP_200_OK)
         
         # Check that it logged a cache hit
-        mock_logger.debug.assert_called_with(f"Item {self.item.pk} fetched from cache")
+        mock_logger.debug.assert_called_with("Item %s fetched from cache", self.item.pk)
     
     def test_cache_invalidation_on_update(self):
         """Test that cache is updated after item update"""
@@ -66,4 +71,125 @@ class ItemCacheTest(APITestCase):
         # Verify item is gone from database
         response = self.client.get(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("detail", response.data)
\ No newline at end of file
+        self.assertIn("detail", response.data)
+
+class ItemPayloadCacheTest(APITestCase):
+    """Test the detail cache stores rendered payloads"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user)
+        self.detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        cache.clear()
+
+    def test_cache_holds_payload(self):
+        """Test the cached entry is the response body, not a model instance"""
+        response = self.client.get(self.detail_url)
+        self.assertEqual(get_item_payload(self.item.pk), response.data)
+
+    def test_cache_hit_needs_no_queries(self):
+        """Test a cache hit runs no query, including for created_by"""
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["created_by"], self.user.username)
+
+    def test_update_refreshes_payload(self):
+        """Test a PUT drops the cached payload and the next read caches the update"""
+        self.client.get(self.detail_url)
+        data = {"name": "Refreshed", "description": "", "quantity": 3, "price": "3.00"}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.detail_url, data, format="json")
+        self.assertEqual(response.data["name"], "Refreshed")
+        self.assertIsNone(get_item_payload(self.item.pk))
+
+        self.assertEqual(self.client.get(self.detail_url).data, response.data)
+        self.assertEqual(get_item_payload(self.item.pk), response.data)
+
+    def test_other_versions_ignored(self):
+        """Test entries written under another payload version are not served"""
+        cache.set(item_cache_key(self.item.pk), {"stale": True}, version=ITEM_PAYLOAD_VERSION - 1)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["name"], self.item.name)
+
+    def test_invalid_update(self):
+        """Test an invalid PUT returns the validation errors"""
+        response = self.client.put(self.detail_url, {"name": ""}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("name", response.data)
+
+
+class ItemCacheInvalidationTest(APITestCase):
+    """Test signal-driven invalidation and the item generation"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user)
+        self.detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        cache.clear()
+        reset_cache_stats()
+
+    def test_orm_save_invalidates(self):
+        """Test a save outside the API (admin, shell, commands) drops the cached payload"""
+        self.client.get(self.detail_url)
+        item = Item.objects.get(pk=self.item.pk)
+        item.quantity = 12345
+        item.save()
+        self.assertIsNone(get_item_payload(self.item.pk))
+        self.assertEqual(self.client.get(self.detail_url).data["quantity"], 12345)
+
+    def test_orm_delete_invalidates(self):
+        """Test a delete outside the API drops the cached payload"""
+        self.client.get(self.detail_url)
+        Item.objects.filter(pk=self.item.pk).delete()
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_rename_invalidates(self):
+        """Test renaming the creator refreshes the embedded username"""
+        self.client.get(self.detail_url)
+        self.user.username = "renamed-user"
+        self.user.save()
+        self.assertEqual(self.client.get(self.detail_url).data["created_by"], "renamed-user")
+
+    def test_user_login_keeps_cache(self):
+        """Test saving other user fields does not touch item entries"""
+        self.client.get(self.detail_url)
+        self.user.last_login = self.item.updated_at
+        self.user.save(update_fields=["last_login"])
+        self.assertIsNotNone(get_item_payload(self.item.pk))
+
+    def test_generation_bumps_on_write(self):
+        """Test every item write moves generation-keyed entries to new keys"""
+        key = generation_key("item_list")
+        ItemFactory(created_by=self.user)
+        self.assertNotEqual(generation_key("item_list"), key)
+
+    def test_bulk_invalidates_once(self):
+        """Test a bulk batch bumps the generation once for all its rows"""
+        other = ItemFactory(created_by=self.user)
+        self.client.get(self.detail_url)
+        generation = get_generation()
+
+        rows = [{"id": self.item.pk, "quantity": 1}, {"op": "delete", "id": other.pk}]
+        self.client.post(reverse("item-bulk"), rows, format="json")
+        self.assertEqual(get_generation(), generation + 1)
+        self.assertIsNone(get_item_payload(self.item.pk))
+
+    def test_stats(self):
+        """Test hit, miss and eviction counters"""
+        self.client.get(self.detail_url)
+        self.client.get(self.detail_url)
+        self.item.save()
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1, 'evictions': 1})
+
+    def test_stats_endpoint_is_admin_only(self):
+        """Test only staff can read the cache counters"""
+        stats_url = reverse("internal-cache-stats")
+        self.assertEqual(self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=UserFactory(is_staff=True))
+        response = self.client.get(stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("hits", response.data)
@@ -0,0 +1,193 @@
+import queue
+import threading
+import time
+import uuid
+from unittest.mock import patch
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from inventory_app.cache_backends import RedisInvalidationBus
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class FakeRedis:
+    """In-memory stand-in for the pub/sub subset of redis-py"""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for inbox in subscribers:
+            inbox.put({'type': 'message', 'channel': channel, 'data': message.encode()})
+        return len(subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.inbox = queue.Queue()
+
+    def subscribe(self, channel):
+        with self.redis.lock:
+            self.redis.subscribers.setdefault(channel, []).append(self.inbox)
+
+    def listen(self):
+        while True:
+            yield self.inbox.get()
+
+
+def two_tier_caches(max_entries=1024, local_timeout=60):
+    """CACHES with a shared locmem 'remote' and two two-tier 'workers' in front of it"""
+    suffix = uuid.uuid4().hex
+    worker = {
+        'BACKEND': 'inventory_app.cache_backends.TwoTierCache',
+        'OPTIONS': {
+            'REMOTE': 'remote',
+            'LOCAL_MAX_ENTRIES': max_entries,
+            'LOCAL_TIMEOUT': local_timeout,
+            'INVALIDATION_CHANNEL': 'invalidation',
+        },
+    }
+    return {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'default-{suffix}'},
+        'remote': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'remote-{suffix}'},
+        'worker_a': dict(worker, LOCATION=f'a-{suffix}'),
+        'worker_b': dict(worker, LOCATION=f'b-{suffix}'),
+    }
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    """Test the in-process tier in front of a shared cache"""
+
+    def test_local_hit_skips_remote(self):
+        """Test a repeated read is served without touching the remote cache"""
+        with override_settings(CACHES=two_tier_caches()):
+            worker = caches['worker_a']
+            worker.set('key', {'value': 1})
+            with patch.object(caches['remote'], 'get') as remote_get:
+                self.assertEqual(worker.get('key'), {'value': 1})
+            remote_get.assert_not_called()
+
+    def test_local_values_are_copies(self):
+        """Test mutating a returned value does not change the cached one"""
+        with override_settings(CACHES=two_tier_caches()):
+            worker = caches['worker_a']
+            worker.set('key', {'value': 1})
+            worker.get('key')['value'] = 2
+            self.assertEqual(worker.get('key'), {'value': 1})
+
+    def test_size_cap(self):
+        """Test the local tier evicts least recently used entries past its cap"""
+        with override_settings(CACHES=two_tier_caches(max_entries=3)):
+            worker = caches['worker_a']
+            for n in range(3):
+                worker.set(f'key{n}', n)
+            worker.get('key0')
+            worker.set('key3', 3)
+
+            self.assertEqual(len(worker.local), 3)
+            self.assertEqual(worker.local.stats['evictions'], 1)
+            with patch.object(caches['remote'], 'get', wraps=caches['remote'].get) as remote_get:
+                self.assertEqual(worker.get('key0'), 0)
+                self.assertEqual(worker.get('key1'), 1)
+            self.assertEqual(remote_get.call_count, 1)
+
+    def test_local_timeout(self):
+        """Test local entries expire after LOCAL_TIMEOUT and are re-read from the remote"""
+        with override_settings(CACHES=two_tier_caches(local_timeout=0.05)):
+            worker_a, worker_b = caches['worker_a'], caches['worker_b']
+            worker_b.set('key', 'old')
+            worker_a.get('key')
+            caches['remote'].set('key', 'new')
+
+            self.assertEqual(worker_a.get('key'), 'old')
+            time.sleep(0.06)
+            self.assertEqual(worker_a.get('key'), 'new')
+
+    def test_writes_evict_local_copy(self):
+        """Test incr and delete through a worker drop its own local copy"""
+        with override_settings(CACHES=two_tier_caches()):
+            worker = caches['worker_a']
+            worker.set('counter', 1)
+            worker.incr('counter')
+            self.assertEqual(worker.get('counter'), 2)
+            worker.delete('counter')
+            self.assertIsNone(worker.get('counter'))
+
+    async def test_async_api(self):
+        """Test async reads serve local hits in place and fall back to the remote"""
+        with override_settings(CACHES=two_tier_caches()):
+            worker_a, worker_b = caches['worker_a'], caches['worker_b']
+            await worker_a.aset('key', 'value')
+            with patch.object(caches['remote'], 'get') as remote_get:
+                self.assertEqual(await worker_a.aget('key'), 'value')
+            remote_get.assert_not_called()
+
+            self.assertEqual(await worker_b.aget('key'), 'value')
+            self.assertTrue(await worker_b.aadd('lock', 1))
+            self.assertFalse(await worker_a.aadd('lock', 1))
+            await worker_a.adelete('key')
+            self.assertIsNone(await worker_a.aget('key'))
+
+    def test_pubsub_invalidation(self):
+        """Test writes in one worker evict the key from other workers' local tier"""
+        with override_settings(CACHES=two_tier_caches()):
+            worker_a, worker_b = caches['worker_a'], caches['worker_b']
+            redis = FakeRedis()
+            for worker in (worker_a, worker_b):
+                worker.set_bus(RedisInvalidationBus(redis, 'invalidation', worker.local))
+                worker.get_bus()
+            self.assertTrue(wait_for(lambda: len(redis.subscribers.get('invalidation', ())) == 2))
+
+            worker_a.set('key', 'old')
+            self.assertEqual(worker_b.get('key'), 'old')
+
+            worker_a.set('key', 'new')
+            self.assertTrue(wait_for(lambda: worker_b.get('key') == 'new'))
+
+            worker_a.delete_many(['key'])
+            self.assertTrue(wait_for(lambda: worker_b.get('key') is None))
+
+            worker_b.set('other', 1)
+            worker_a.get('other')
+            worker_b.clear()
+            self.assertTrue(wait_for(lambda: len(worker_a.local) == 0))
+
+
+class TwoTierDetailCacheTest(APITestCase):
+    """Test the item endpoints with the two-tier cache as the default cache"""
+
+    def test_item_detail(self):
+        cache_settings = two_tier_caches()
+        cache_settings['default'] = cache_settings.pop('worker_a')
+        with override_settings(CACHES=cache_settings):
+            user = UserFactory()
+            self.client.force_authenticate(user=user)
+            item = ItemFactory(created_by=user)
+            detail_url = reverse("item-detail", kwargs={"pk": item.pk})
+
+            self.assertEqual(self.client.get(detail_url).data["name"], item.name)
+            with self.assertNumQueries(0), patch.object(caches['remote'], 'get') as remote_get:
+                self.assertEqual(self.client.get(detail_url).data["name"], item.name)
+            remote_get.assert_not_called()
+
+            data = {"name": "Two tier", "description": "", "quantity": 1, "price": "1.00"}
+            self.client.put(detail_url, data, format="json")
+            self.assertEqual(self.client.get(detail_url).data["name"], "Two tier")
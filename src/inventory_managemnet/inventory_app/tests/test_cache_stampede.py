@@ -0,0 +1,99 @@
+import threading
+import time
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from inventory_app import item_cache
+from inventory_app.item_cache import get_item_payload, get_or_compute_item_payload, set_item_payload
+
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stampede-tests'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ItemCacheStampedeTest(SimpleTestCase):
+    """Test single-flight recomputation and early refresh of item payloads"""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, delay=0.2):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            return {'id': 1, 'name': 'Computed'}
+        return compute
+
+    def run_threads(self, count, target):
+        results = []
+        barrier = threading.Barrier(count)
+
+        def worker():
+            barrier.wait()
+            results.append(target())
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_misses_compute_once(self):
+        """Test only one of many concurrent misses recomputes"""
+        results = self.run_threads(10, lambda: get_or_compute_item_payload(1, self.compute()))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(payload == {'id': 1, 'name': 'Computed'} for payload, _ in results))
+        self.assertEqual(sorted(computed for _, computed in results), [False] * 9 + [True])
+
+    def test_waiters_give_up_after_lock_wait(self):
+        """Test waiters compute themselves if the lock holder takes too long"""
+        with patch.object(item_cache, 'ITEM_CACHE_LOCK_WAIT', 0.05):
+            results = self.run_threads(3, lambda: get_or_compute_item_payload(1, self.compute(0.3)))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(self.calls, 3)
+
+    def test_lock_released_on_error(self):
+        """Test a failing computation does not leave the lock behind"""
+        def fail():
+            raise LookupError
+
+        with self.assertRaises(LookupError):
+            get_or_compute_item_payload(1, fail)
+        payload, computed = get_or_compute_item_payload(1, self.compute(0))
+        self.assertTrue(computed)
+
+    def test_early_refresh(self):
+        """Test an entry near expiry is recomputed by one caller while others get the current value"""
+        # random() close to 1 makes -log(1 - random()) large, forcing a refresh
+        with patch('inventory_app.item_cache.random.random', return_value=0.999999), \
+                patch.object(item_cache, 'ITEM_CACHE_TIMEOUT', 60):
+            set_item_payload({'id': 1, 'name': 'Current'}, delta=10)
+            results = self.run_threads(5, lambda: get_or_compute_item_payload(1, self.compute()))
+
+        self.assertEqual(self.calls, 1)
+        names = sorted(payload['name'] for payload, _ in results)
+        self.assertEqual(names, ['Computed'] + ['Current'] * 4)
+        self.assertEqual(get_item_payload(1)['name'], 'Computed')
+
+    def test_fresh_entry_not_refreshed(self):
+        """Test an entry far from expiry is served as is"""
+        set_item_payload({'id': 1, 'name': 'Current'}, delta=0.01)
+        payload, computed = get_or_compute_item_payload(1, self.compute())
+        self.assertEqual((payload['name'], computed), ('Current', False))
+        self.assertEqual(self.calls, 0)
+
+    def test_timeout_jitter(self):
+        """Test timeouts are spread around ITEM_CACHE_TIMEOUT"""
+        with patch.object(cache, 'set') as cache_set:
+            for pk in range(50):
+                set_item_payload({'id': pk})
+        timeouts = {call.kwargs['timeout'] for call in cache_set.call_args_list}
+        self.assertGreater(len(timeouts), 1)
+        for timeout in timeouts:
+            self.assertLessEqual(abs(timeout - item_cache.ITEM_CACHE_TIMEOUT), item_cache.ITEM_CACHE_TIMEOUT * 0.1)
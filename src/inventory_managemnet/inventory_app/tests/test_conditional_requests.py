@@ -0,0 +1,116 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from inventory_app.models import Item
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemConditionalRequestTest(APITestCase):
+    """Test ETag and Last-Modified on the item detail endpoint"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user, quantity=5)
+        self.detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        self.data = {"name": self.item.name, "description": "", "quantity": 7, "price": "1.00"}
+        cache.clear()
+
+    def test_validators(self):
+        """Test responses carry validators that change with every write"""
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['Last-Modified'], http_date(self.item.updated_at.timestamp()))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.detail_url)['ETag'], etag)
+
+        response = self.client.put(self.detail_url, self.data, format="json")
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.detail_url)['ETag'], response['ETag'])
+
+    def test_if_none_match(self):
+        """Test a current ETag gets 304 from the cache, without a query"""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        Item.objects.filter(pk=self.item.pk).update(quantity=1, updated_at=self.item.updated_at + timedelta(seconds=1))
+        cache.clear()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 1)
+
+    def test_uncached_check(self):
+        """Test an uncached item is checked with one query and not serialized"""
+        etag = self.client.get(self.detail_url)['ETag']
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since compares with Last-Modified"""
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        earlier = http_date(self.item.updated_at.timestamp() - 60)
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=earlier)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_match(self):
+        """Test PUT with If-Match only applies to the version it names"""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        response = self.client.put(self.detail_url, self.data, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 7)
+
+        stale = dict(self.data, quantity=9)
+        response = self.client.put(self.detail_url, stale, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 7)
+
+    def test_if_unmodified_since(self):
+        """Test PUT with If-Unmodified-Since is refused once the item has changed"""
+        earlier = http_date(self.item.updated_at.timestamp() - 60)
+        response = self.client.put(self.detail_url, self.data, format="json", HTTP_IF_UNMODIFIED_SINCE=earlier)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_unconditional_put_not_locked(self):
+        """Test a PUT without a precondition neither locks the row nor opens a transaction"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.detail_url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = " ".join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn("SAVEPOINT", sql)
+        self.assertNotIn("FOR UPDATE", sql)
+
+    def test_missing_item(self):
+        """Test conditional requests for unknown items are answered like plain ones"""
+        url = reverse("item-detail", kwargs={"pk": 9999})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"9999-1"')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(url, self.data, format="json", HTTP_IF_MATCH='"9999-1"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_view(self):
+        """Test the async detail endpoint answers If-None-Match too"""
+        headers = {'Authorization': f"Bearer {AccessToken.for_user(self.user)}"}
+        url = reverse("async-item-detail", kwargs={"pk": self.item.pk})
+
+        response = await self.async_client.get(url, headers=headers)
+        etag = response['ETag']
+        response = await self.async_client.get(url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,78 @@
+from unittest.mock import patch
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from inventory_app.counting import ITEM_COUNT_CACHE_KEY, get_item_count
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+def count_queries(queries):
+    return [q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()]
+
+
+class ItemCountTest(APITestCase):
+    """Test the cached / estimated item count"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user)
+        self.list_url = reverse("item-list")
+        cache.clear()
+        # The counts these tests commit to the cache would outlive the test
+        self.addCleanup(cache.clear)
+
+    def test_count_is_cached(self):
+        """Test only the first list request runs COUNT(*)"""
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertTrue(response.data['count_exact'])
+        self.assertEqual(len(count_queries(queries)), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(count_queries(queries), [])
+
+    def test_count_follows_create_and_delete(self):
+        """Test create and delete signals adjust the cached count"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.list_url)
+
+        data = {"name": "Counted", "description": "", "quantity": 1, "price": "1.00"}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.list_url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(cache.get(ITEM_COUNT_CACHE_KEY), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("item-detail", kwargs={"pk": self.item.pk}))
+        self.assertEqual(cache.get(ITEM_COUNT_CACHE_KEY), 1)
+        self.assertEqual(self.client.get(self.list_url).data['count'], 1)
+
+    def test_rolled_back_create_not_counted(self):
+        """Test a create that is rolled back leaves the cached count alone"""
+        with self.captureOnCommitCallbacks(execute=True):
+            get_item_count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                ItemFactory(created_by=self.user)
+                transaction.set_rollback(True)
+        self.assertEqual(get_item_count(), (1, True))
+
+    @override_settings(ITEM_COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_estimate_above_threshold(self):
+        """Test the planner estimate is used for large tables on Postgres"""
+        with patch.object(connection, 'vendor', 'postgresql'), \
+                patch('inventory_app.counting.estimate_item_count', return_value=250000):
+            self.assertEqual(get_item_count(), (250000, False))
+
+        with patch.object(connection, 'vendor', 'postgresql'), \
+                patch('inventory_app.counting.estimate_item_count', return_value=10):
+            self.assertEqual(get_item_count(), (1, True))
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from inventory_app.models import Item
+from inventory_app.pagination import encode_cursor
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemCursorPaginationTest(APITestCase):
+    """Test keyset (cursor) pagination for items list"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        # 25 items, with some sharing the same updated_at to exercise the id tie-breaker
+        ItemFactory.create_batch(25, created_by=self.user)
+        now = timezone.now()
+        for index, item in enumerate(Item.objects.order_by('id')):
+            Item.objects.filter(pk=item.pk).update(updated_at=now - timedelta(seconds=index // 3))
+
+        self.list_url = reverse("item-list")
+
+    def walk(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_first_page(self):
+        """Test first cursor page has no previous link and no count"""
+        response = self.walk(f"{self.list_url}?cursor=")
+
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_walk_forward_and_back(self):
+        """Test following next and previous links visits every item once, in order"""
+        expected = list(Item.objects.order_by('-updated_at', '-id').values_list('id', flat=True))
+
+        pages = [self.walk(f"{self.list_url}?cursor=")]
+        while pages[-1].data['next']:
+            pages.append(self.walk(pages[-1].data['next']))
+
+        seen = [item['id'] for page in pages for item in page.data['results']]
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(page.data['results']) for page in pages], [10, 10, 5])
+
+        back = self.walk(pages[-1].data['previous'])
+        self.assertEqual(back.data['results'], pages[1].data['results'])
+        back = self.walk(back.data['previous'])
+        self.assertEqual(back.data['results'], pages[0].data['results'])
+        self.assertIsNone(back.data['previous'])
+
+    def test_count_on_request(self):
+        """Test the total count is only included when asked for"""
+        response = self.walk(f"{self.list_url}?cursor=&count=true")
+        self.assertEqual(response.data['count'], 25)
+        self.assertIn('count=true', response.data['next'])
+
+    def test_tampered_cursor(self):
+        """Test a cursor that fails signature verification is rejected"""
+        cursor = encode_cursor(timezone.now(), 1)
+        response = self.client.get(f"{self.list_url}?cursor={cursor[:-2]}xx")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "Invalid cursor")
+
+    def test_cursor_page_queries(self):
+        """Test a cursor page does not run a COUNT query"""
+        with CaptureQueriesContext(connection) as queries:
+            self.walk(f"{self.list_url}?cursor=")
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()])
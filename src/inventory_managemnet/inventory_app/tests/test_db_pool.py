@@ -0,0 +1,50 @@
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from inventory_app.db_pool import connections_created, pool_stats
+from inventory_app.tests.factories import UserFactory
+
+
+class FakePool:
+
+    def get_stats(self):
+        return {
+            'pool_min': 2, 'pool_max': 8, 'pool_size': 5, 'pool_available': 1,
+            'requests_waiting': 3, 'connections_num': 6, 'requests_errors': 1,
+        }
+
+
+class DatabaseStatsTest(APITestCase):
+    """Test the database connection counters"""
+
+    def test_persistent_connection_stats(self):
+        """Test counters without a pool report reuse of this process' connections"""
+        created = connections_created()
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+        stats = pool_stats()
+        self.assertFalse(stats['pooled'])
+        self.assertEqual(stats['created'], created + 1)
+        self.assertEqual(stats['conn_max_age'], connection.settings_dict['CONN_MAX_AGE'])
+
+    def test_pool_stats(self):
+        """Test pool counters are reported as in use, idle, waiting and created"""
+        with mock.patch.object(connection, 'pool', FakePool(), create=True):
+            stats = pool_stats()
+        self.assertTrue(stats['pooled'])
+        self.assertEqual((stats['in_use'], stats['idle'], stats['waiting'], stats['created']), (4, 1, 3, 6))
+        self.assertEqual(stats['max_size'], 8)
+
+    def test_stats_endpoint_is_admin_only(self):
+        """Test only staff can read the database counters"""
+        stats_url = reverse("internal-db-stats")
+        self.client.force_authenticate(user=UserFactory())
+        self.assertEqual(self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=UserFactory(is_staff=True))
+        response = self.client.get(stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("created", response.data)
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from inventory_app.models import Item
+from inventory_app.serializers import ItemSerializer
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemExportTest(APITestCase):
+    """Test the streaming inventory export"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        ItemFactory.create_batch(5, created_by=self.user)
+        ItemFactory(created_by=UserFactory(), description=None)
+        self.export_url = reverse("item-export")
+
+    def expected(self):
+        return [dict(data) for data in ItemSerializer(Item.objects.order_by('id'), many=True).data]
+
+    def content(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_matches_serializer(self):
+        """Test each NDJSON line matches the ItemSerializer representation"""
+        response = self.client.get(self.export_url)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(lines, self.expected())
+
+    def test_csv(self):
+        """Test the CSV export has a header row and one row per item"""
+        response = self.client.get(self.export_url, {'type': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(len(rows), 6)
+        expected = self.expected()
+        self.assertEqual(rows[0]['name'], expected[0]['name'])
+        self.assertEqual(rows[0]['price'], expected[0]['price'])
+        self.assertEqual(rows[-1]['created_by'], expected[-1]['created_by'])
+
+    def test_query_count(self):
+        """Test the export joins created_by instead of querying per row"""
+        response = self.client.get(self.export_url)
+        with self.assertNumQueries(1):
+            self.content(response)
+
+    def test_unknown_type(self):
+        """Test an unknown export type is rejected"""
+        response = self.client.get(self.export_url, {'type': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
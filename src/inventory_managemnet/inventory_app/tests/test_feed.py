@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+import json
+from asgiref.sync import sync_to_async
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from inventory_app.feed import hub
+from inventory_app.stock import adjust_stock
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+def parse_events(chunk):
+    """
+    Return the (event, data) pairs of an SSE chunk, skipping comments
+    """
+    events = []
+    for message in chunk.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines() if not line.startswith(":"))
+        if 'data' in fields:
+            events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+
+class ItemFeedTest(APITestCase):
+    """Test the live item feed"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.item = ItemFactory(created_by=self.user, quantity=5)
+        self.headers = {'Authorization': f"Bearer {AccessToken.for_user(self.user)}"}
+        self.feed_url = reverse("async-item-feed")
+
+    @contextlib.asynccontextmanager
+    async def open_feed(self, **params):
+        response = await self.async_client.get(self.feed_url, params, headers=self.headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            self.assertIn(b"retry:", await anext(stream))
+            yield stream
+        finally:
+            await sync_to_async(self.close_response)(response)
+        self.assertEqual(len(hub), 0)
+
+    def close_response(self, response):
+        # As the ASGI handler does once the stream ends, but without letting
+        # request_finished close the connection the test runs in, which is
+        # what django.test.client does too
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+
+    async def next_events(self, stream):
+        return parse_events(await asyncio.wait_for(anext(stream), timeout=5))
+
+    def write(self, func, *args, **kwargs):
+        # The test transaction never commits, so run the on_commit callbacks
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    async def test_item_changes(self):
+        """Test creates, updates, deletes and stock adjustments are streamed"""
+        async with self.open_feed() as stream:
+            created = await sync_to_async(self.write)(ItemFactory, created_by=self.user, quantity=3)
+            self.assertEqual(await self.next_events(stream), [
+                ('message', {'type': 'created', 'id': created.pk, 'quantity': 3}),
+            ])
+
+            await sync_to_async(self.write)(adjust_stock, {created.pk: -2})
+            self.assertEqual(await self.next_events(stream), [
+                ('message', {'type': 'stock', 'id': created.pk, 'delta': -2}),
+            ])
+
+            pk = created.pk
+            await sync_to_async(self.write)(created.delete)
+            self.assertEqual(await self.next_events(stream), [('message', {'type': 'deleted', 'id': pk})])
+
+    async def test_filters(self):
+        """Test a client only receives the ids and types it asked for"""
+        async with self.open_feed(ids=f"{self.item.pk}", types="stock") as stream:
+            other = await sync_to_async(ItemFactory)(created_by=self.user)
+            await sync_to_async(self.write)(adjust_stock, {other.pk: 1})
+            self.item.name = "Renamed"
+            await sync_to_async(self.write)(self.item.save)
+            await sync_to_async(self.write)(adjust_stock, {self.item.pk: 4})
+
+            self.assertEqual(await self.next_events(stream), [
+                ('message', {'type': 'stock', 'id': self.item.pk, 'delta': 4}),
+            ])
+
+    @override_settings(ITEM_FEED_QUEUE_SIZE=2)
+    async def test_slow_client_reset(self):
+        """Test a client that falls behind is told to resync instead of buffering"""
+        async with self.open_feed() as stream:
+            await sync_to_async(self.write)(adjust_stock, {self.item.pk: 1})
+            await sync_to_async(self.write)(adjust_stock, {self.item.pk: 1})
+            await sync_to_async(self.write)(adjust_stock, {self.item.pk: 1})
+
+            events = await self.next_events(stream)
+            self.assertEqual([event for event, _ in events], ['reset'])
+
+            await sync_to_async(self.write)(adjust_stock, {self.item.pk: 1})
+            self.assertEqual(await self.next_events(stream), [
+                ('message', {'type': 'stock', 'id': self.item.pk, 'delta': 1}),
+            ])
+
+    @override_settings(ITEM_FEED_HEARTBEAT=0.01, ITEM_FEED_MAX_AGE=0.1)
+    async def test_heartbeat_and_max_age(self):
+        """Test idle streams get heartbeats and end after ITEM_FEED_MAX_AGE"""
+        async with self.open_feed() as stream:
+            self.assertEqual(len(hub), 1)
+            self.assertEqual(await anext(stream), b": heartbeat\n\n")
+
+            chunks = [chunk async for chunk in stream]
+            self.assertTrue(all(chunk == b": heartbeat\n\n" for chunk in chunks))
+
+    def test_wsgi_refused(self):
+        """Test the feed is refused under WSGI, which can't stream it"""
+        response = self.client.get(self.feed_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    async def test_invalid_requests(self):
+        """Test anonymous clients and bad filters are rejected"""
+        response = await self.async_client.get(self.feed_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(self.feed_url, {'ids': 'one'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get(self.feed_url, {'types': 'moved'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from inventory_app.importer import Checkpoint, ImportState
+from inventory_app.ledger import REASON_CREATED
+from inventory_app.models import Item, StockMovement
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ImportItemsTest(TestCase):
+    """Test the import_items management command"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_items', path, user=self.user.username, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv(self):
+        """Test CSV rows become items with their creation in the ledger"""
+        path = self.write('items.csv', (
+            "name,description,quantity,price\n"
+            "Bolt,,10,0.25\n"
+            "Nut,Hex nut,0,0.10\n"
+            "Washer,,5,0.05\n"
+        ))
+        stdout, _ = self.run_import(path, chunk_size=2)
+        self.assertIn("Imported 3 items from 3 rows", stdout)
+
+        bolt = Item.objects.get(name="Bolt")
+        self.assertEqual((bolt.quantity, bolt.price, bolt.created_by), (10, Decimal('0.25'), self.user))
+        self.assertEqual(Item.objects.get(name="Nut").description, "Hex nut")
+        self.assertEqual(
+            sorted(StockMovement.objects.filter(reason=REASON_CREATED).values_list('item__name', 'delta', 'applied')),
+            [("Bolt", 10, True), ("Washer", 5, True)],
+        )
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_invalid_rows(self):
+        """Test invalid and conflicting rows are reported and the rest imported"""
+        ItemFactory(name="Taken", created_by=self.user)
+        path = self.write('items.ndjson', "\n".join([
+            json.dumps({"name": "Good", "quantity": 3, "price": "1.00"}),
+            json.dumps({"name": "Taken", "quantity": 1, "price": "1.00"}),
+            "{not json",
+            json.dumps({"name": "Good", "quantity": 1, "price": "1.00"}),
+            json.dumps({"name": "Bad price", "price": "cheap"}),
+            "",
+            json.dumps({"description": "No name"}),
+        ]) + "\n")
+
+        with self.assertRaisesMessage(CommandError, "5 rows were rejected"):
+            self.run_import(path)
+
+        self.assertTrue(Item.objects.filter(name="Good", quantity=3).exists())
+        self.assertEqual(Item.objects.count(), 2)
+
+    def test_rejected_rows_listed(self):
+        """Test each rejected row is listed with its line number"""
+        path = self.write('items.csv', "name,quantity\nFine,1\nBroken,many\n")
+        stderr = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_items', path, user=self.user.username, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn("Line 3:", stderr.getvalue())
+        self.assertIn("quantity", stderr.getvalue())
+
+    def test_resume(self):
+        """Test an import carries on after the rows its checkpoint covers"""
+        path = self.write('items.csv', "name,quantity\nFirst,1\nSecond,2\nThird,3\n")
+        ItemFactory(name="First", created_by=self.user)
+        Checkpoint(f'{path}.checkpoint', path).save(ImportState(rows=1, created=1))
+
+        with self.assertRaisesMessage(CommandError, "--resume"):
+            self.run_import(path)
+
+        stdout, _ = self.run_import(path, resume=True)
+        self.assertIn("Resuming after 1 rows", stdout)
+        self.assertIn("Imported 3 items from 3 rows", stdout)
+        self.assertEqual(set(Item.objects.values_list('name', flat=True)), {"First", "Second", "Third"})
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_checkpoint_for_other_file(self):
+        """Test a checkpoint is not applied to a file that has changed"""
+        path = self.write('items.csv', "name\nOne\n")
+        Checkpoint(f'{path}.checkpoint', path).save(ImportState(rows=1, created=1))
+        self.write('items.csv', "name\nOne\nTwo\n")
+
+        with self.assertRaisesMessage(CommandError, "has changed"):
+            self.run_import(path, resume=True)
+
+    def test_queries_per_chunk(self):
+        """Test the queries an import makes depend on the chunks, not the rows"""
+        rows = "".join(f"Item {n},{n}\n" for n in range(50))
+        path = self.write('items.csv', "name,quantity\n" + rows)
+        # Per chunk: name check, item insert, id lookup, movement insert,
+        # and the transaction's savepoint and release
+        with self.assertNumQueries(1 + 2 * 6):
+            self.run_import(path, chunk_size=25)
+        self.assertEqual(Item.objects.count(), 50)
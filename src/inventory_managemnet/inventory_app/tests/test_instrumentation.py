@@ -0,0 +1,73 @@
+import re
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+def timing(response, name):
+    """
+    The Server-Timing entry `name` as a dict of its parameters
+    """
+    for entry in response['Server-Timing'].split(', '):
+        metric, *params = entry.split(';')
+        if metric == name:
+            return dict(re.match(r'(\w+)="?([^"]*)"?', param).groups() for param in params)
+    return None
+
+
+@override_settings(PERF_LOG_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTest(APITestCase):
+    """Test per-request timings in headers and log records"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user)
+        self.detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        cache.clear()
+
+    def test_server_timing(self):
+        """Test database, cache and serialization show up in Server-Timing"""
+        response = self.client.get(self.detail_url)
+        self.assertNotEqual(timing(response, 'db')['desc'], "0 queries")
+        self.assertEqual(timing(response, 'cache')['desc'], "0 hits / 1 misses")
+        self.assertIsNotNone(timing(response, 'serialize'))
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(timing(response, 'db')['desc'], "0 queries")
+        self.assertEqual(timing(response, 'cache')['desc'], "1 hits / 0 misses")
+        self.assertGreater(float(timing(response, 'app')['dur']), 0)
+
+    def test_log_record(self):
+        """Test each request is logged with its route and counters"""
+        with self.assertLogs('inventory_app.performance', 'INFO') as logs:
+            self.client.post(reverse("item-list"), {"name": "Logged item", "quantity": 1, "price": "2.50"})
+        performance = logs.records[0].performance
+        self.assertEqual((performance['route'], performance['method'], performance['status']), ("item-list", "POST", 201))
+        self.assertGreater(performance['db_queries'], 0)
+        self.assertIn('serialize_ms', performance)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0, SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_logs(self):
+        """Test requests and queries over their thresholds are logged as warnings"""
+        with self.assertLogs('inventory_app.slow_queries', 'WARNING') as queries:
+            with self.assertLogs('inventory_app.performance', 'WARNING'):
+                self.client.get(self.detail_url)
+        self.assertIn("SELECT", queries.records[0].getMessage())
+
+    @override_settings(SLOW_QUERY_SAMPLE_RATE=0.0, SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_sampling(self):
+        """Test slow queries are only logged at the sample rate"""
+        with self.assertNoLogs('inventory_app.slow_queries', 'WARNING'):
+            self.client.get(self.detail_url)
+
+    async def test_async_views(self):
+        """Test queries made from async views are counted"""
+        headers = {'Authorization': f"Bearer {AccessToken.for_user(self.user)}"}
+        response = await self.async_client.get(reverse("async-item-detail", kwargs={"pk": self.item.pk}), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(timing(response, 'db')['desc'], "0 queries")
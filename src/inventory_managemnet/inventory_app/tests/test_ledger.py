@@ -0,0 +1,147 @@
+import io
+import threading
+from datetime import timedelta
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from inventory_app.item_cache import get_item_payload, set_item_payload
+from inventory_app.ledger import append_movement, fold_movements, quantity_as_of
+from inventory_app.models import StockMovement, StockSnapshot
+from inventory_app.representations import represent_item
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class StockLedgerTest(APITestCase):
+    """Test the stock movement ledger, folding and as-of queries"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user, quantity=10)
+        self.movements_url = reverse("item-movements", kwargs={"pk": self.item.pk})
+        self.stock_url = reverse("item-stock", kwargs={"pk": self.item.pk})
+        cache.clear()
+
+    def later(self, seconds=60):
+        return timezone.now() + timedelta(seconds=seconds)
+
+    def test_writes_are_recorded(self):
+        """Test creation, edits and stock adjustments all land in the ledger"""
+        self.item.quantity = 7
+        self.item.save()
+        self.client.post(self.stock_url, {"delta": 5}, format="json")
+
+        movements = list(StockMovement.objects.filter(item=self.item).values_list('reason', 'delta', 'applied', 'user'))
+        self.assertEqual(movements, [
+            ('created', 10, True, self.user.pk),
+            ('edited', -3, True, None),
+            ('adjusted', 5, True, self.user.pk),
+        ])
+
+    def test_append_then_fold(self):
+        """Test appended movements only reach the item once folded"""
+        response = self.client.post(self.movements_url, {"delta": -4, "reason": "sale"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user'], self.user.username)
+        self.assertFalse(response.data['applied'])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+
+        set_item_payload(represent_item(self.item))
+        self.assertEqual(fold_movements(now=self.later()), 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 6)
+        self.assertIsNone(get_item_payload(self.item.pk))
+        self.assertEqual(StockSnapshot.objects.get(item=self.item).quantity, 6)
+
+        # Nothing new to fold
+        self.assertEqual(fold_movements(now=self.later(120)), 0)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 6)
+
+    def test_grace_window(self):
+        """Test movements younger than the grace period wait for the next fold"""
+        append_movement(self.item.pk, 3)
+        fold_movements(grace=60)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+
+        call_command('fold_stock_movements', grace=0, stdout=io.StringIO())
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 13)
+
+    def test_quantity_as_of(self):
+        """Test as-of reads the nearest snapshot and the movements after it"""
+        start = timezone.now()
+        for minutes, delta in ((1, 5), (2, -2), (4, 1)):
+            StockMovement.objects.create(item=self.item, delta=delta, created_at=start + timedelta(minutes=minutes))
+        fold_movements(now=start + timedelta(minutes=3), grace=0)
+
+        self.assertEqual(quantity_as_of(self.item.pk, start), 10)
+        self.assertEqual(quantity_as_of(self.item.pk, start + timedelta(minutes=1)), 15)
+        self.assertEqual(quantity_as_of(self.item.pk, start + timedelta(minutes=3)), 13)
+        self.assertEqual(quantity_as_of(self.item.pk, start + timedelta(minutes=5)), 14)
+
+        response = self.client.get(self.stock_url, {"at": (start + timedelta(minutes=2)).isoformat().replace('+00:00', 'Z')})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 13)
+
+    def test_invalid_requests(self):
+        """Test bad datetimes, zero deltas and unknown items are rejected"""
+        response = self.client.get(self.stock_url, {"at": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.movements_url, {"delta": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        url = reverse("item-movements", kwargs={"pk": 99999})
+        response = self.client.post(url, {"delta": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_append_only(self):
+        """Test movements can't be changed or deleted one by one"""
+        movement = append_movement(self.item.pk, 1)
+        movement.delta = 2
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+
+class ConcurrentAppendTest(TransactionTestCase):
+    """Test appends from many threads are all kept"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_appends(self):
+        # Checked here, against the test database rather than the configured one
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("shared-cache in-memory SQLite fails concurrent writers instead of making them wait")
+        item = ItemFactory(quantity=0)
+        errors = []
+
+        def append():
+            try:
+                for _ in range(25):
+                    append_movement(item.pk, 1, reason='concurrent')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=append) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(StockMovement.objects.filter(item=item, reason='concurrent').count(), 200)
+        fold_movements(now=timezone.now() + timedelta(minutes=1))
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 200)
+        self.assertEqual(quantity_as_of(item.pk, timezone.now()), 200)
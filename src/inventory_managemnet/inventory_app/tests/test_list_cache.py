@@ -0,0 +1,68 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from inventory_app.models import Item
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemListCacheTest(APITestCase):
+    """Test list page caching and conditional GETs"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user)
+        ItemFactory.create_batch(2, created_by=self.user)
+        self.list_url = reverse("item-list")
+        cache.clear()
+
+    def test_write_invalidates_pages(self):
+        """Test any item write is visible on the next list request"""
+        self.client.get(self.list_url)
+
+        Item.objects.filter(pk=self.item.pk).first().delete()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotIn(self.item.pk, [item['id'] for item in response.data['results']])
+
+        data = {"name": "Fresh", "description": "", "quantity": 1, "price": "1.00"}
+        self.client.post(self.list_url, data)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['results'][0]['name'], "Fresh")
+
+    def test_pages_keyed_by_query(self):
+        """Test different query strings are cached separately"""
+        ItemFactory.create_batch(10, created_by=self.user)
+        first = self.client.get(self.list_url)
+        second = self.client.get(f"{self.list_url}?page=2")
+        self.assertNotEqual(first.data['results'], second.data['results'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match(self):
+        """Test an unchanged page answers 304 without a body"""
+        etag = self.client.get(self.list_url)['ETag']
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=f'W/{etag}, "other"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changed_page_returns_body(self):
+        """Test a stale ETag gets the new page"""
+        etag = self.client.get(self.list_url)['ETag']
+        self.item.quantity += 1
+        self.item.save()
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_errors_not_cached(self):
+        """Test an invalid cursor is not cached or given an ETag"""
+        response = self.client.get(f"{self.list_url}?cursor=bogus")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework import status
+from rest_framework.test import APITestCase
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class MetricsEndpointTest(APITestCase):
+    """Test the Prometheus metrics endpoint"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user)
+        cache.clear()
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.content.decode())
+            for sample in family.samples
+        }
+
+    def test_request_cache_and_database_metrics(self):
+        """Test requests, item cache lookups and queries are counted"""
+        latency = ('inventory_http_request_duration_seconds_count', (('method', 'GET'), ('route', 'item-detail')))
+        hits = ('inventory_item_cache_lookups_total', (('result', 'hit'),))
+        misses = ('inventory_item_cache_lookups_total', (('result', 'miss'),))
+        queries = ('inventory_db_query_duration_seconds_count', (('database', 'default'),))
+        before = self.scrape()
+
+        url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        self.client.get(url)
+        self.client.get(url)
+        after = self.scrape()
+
+        self.assertEqual(after[latency] - before.get(latency, 0), 2)
+        self.assertEqual(after[hits] - before.get(hits, 0), 1)
+        self.assertEqual(after[misses] - before.get(misses, 0), 1)
+        self.assertGreater(after[queries], before.get(queries, 0))
+        self.assertEqual(after[('inventory_items', (('exact', 'true'),))], 1)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_token(self):
+        """Test a configured token is required"""
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,94 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemQueryCountTest(APITestCase):
+    """
+    Regression tests for the number of queries per endpoint.
+
+    Each endpoint must run a fixed number of queries, whatever the page or
+    batch size, and in particular no query per item for `created_by`.
+    """
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse("item-list")
+        # Spread items over several users so a per-row user lookup would show up
+        self.owners = [self.user, UserFactory(), UserFactory()]
+        cache.clear()
+
+    def create_items(self, count):
+        for n in range(count):
+            ItemFactory(created_by=self.owners[n % len(self.owners)])
+
+    def assertListQueries(self, url, expected):
+        for item_count in (1, 10, 25):
+            with self.subTest(items=item_count):
+                self.create_items(item_count)
+                cache.clear()
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_offset_list(self):
+        """Test an offset page costs the page query and the count"""
+        self.assertListQueries(self.list_url, 2)
+
+    def test_offset_list_later_page(self):
+        """Test a later offset page costs the same as the first"""
+        self.assertListQueries(f"{self.list_url}?page=2", 2)
+
+    def test_offset_list_cached_count(self):
+        """Test the count query is skipped once the count is cached"""
+        self.create_items(12)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.list_url)
+        self.addCleanup(cache.clear)
+        with self.assertNumQueries(1):
+            self.client.get(f"{self.list_url}?page=2")
+
+    def test_cached_page(self):
+        """Test a repeated page is served from the cache"""
+        self.create_items(12)
+        self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            self.client.get(self.list_url)
+
+    def test_cursor_list(self):
+        """Test a cursor page costs a single query"""
+        self.assertListQueries(f"{self.list_url}?cursor=", 1)
+
+    def test_detail(self):
+        """Test item detail costs one query on a miss and none on a hit"""
+        item = ItemFactory(created_by=self.owners[1])
+        detail_url = reverse("item-detail", kwargs={"pk": item.pk})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_200_OK)
+
+    def test_export(self):
+        """Test the export is one query whatever the number of items"""
+        export_url = reverse("item-export")
+        for item_count in (1, 10, 25):
+            with self.subTest(items=item_count):
+                self.create_items(item_count)
+                response = self.client.get(export_url)
+                with self.assertNumQueries(1):
+                    b''.join(response.streaming_content)
+
+    def test_bulk_create(self):
+        """Test bulk validation and writes do not grow with the batch"""
+        bulk_url = reverse("item-bulk")
+        for size in (1, 10, 25):
+            with self.subTest(rows=size):
+                rows = [{"name": f"Counted {size}-{n}", "quantity": n + 1, "price": "1.00"} for n in range(size)]
+                # savepoint + name check + insert + ledger insert + savepoint release
+                with self.assertNumQueries(5):
+                    response = self.client.post(bulk_url, rows, format="json")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,114 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from inventory_app.item_cache import ITEM_WRITTEN_KEY, invalidate_items
+from inventory_app.models import Item
+from inventory_app.routers import PRIMARY, pin_to_primary, user_pin_key
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Test reads go to replicas and writers read their own writes from the primary"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Separate in-memory SQLite databases stand in for the replicas; they
+        # never receive the primary's writes, so stale reads are easy to spot
+        connections.settings = connections.configure_settings({**connections.settings, **{
+            alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': f'file:{alias}?mode=memory&cache=shared'}
+            for alias in REPLICAS
+        }})
+        for alias in REPLICAS:
+            call_command('migrate', database=alias, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in REPLICAS:
+            del connections[alias]
+            del connections.settings[alias]
+        super().tearDownClass()
+
+    def setUp(self):
+        self.writer = UserFactory()
+        self.reader = UserFactory()
+        self.item = ItemFactory(created_by=self.writer, name="Fresh name", quantity=10)
+        self.detail_url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        for alias in REPLICAS:
+            User.objects.using(alias).bulk_create([
+                User(pk=user.pk, username=user.username, password=user.password) for user in (self.writer, self.reader)
+            ])
+            Item.objects.using(alias).bulk_create([Item(
+                pk=self.item.pk, name="Stale name", quantity=10, price=self.item.price, created_by_id=self.writer.pk,
+            )])
+        cache.clear()
+
+    def tearDown(self):
+        for alias in REPLICAS:
+            call_command('flush', database=alias, interactive=False, verbosity=0)
+
+    def get_name(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['name']
+
+    def write(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(reverse("item-stock", kwargs={"pk": self.item.pk}), {"delta": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reads_go_to_replicas(self):
+        """Test reads are served by a replica and writes by the primary"""
+        self.assertEqual(self.get_name(self.reader), "Stale name")
+        self.assertIn(Item.objects.all().db, REPLICAS)
+
+        self.write(self.reader)
+        self.item.refresh_from_db(using=PRIMARY)
+        self.assertEqual(self.item.quantity, 11)
+        for alias in REPLICAS:
+            self.assertEqual(Item.objects.using(alias).get(pk=self.item.pk).quantity, 10)
+
+    def test_writer_reads_own_writes(self):
+        """Test a user's reads stick to the primary for a while after they write"""
+        self.write(self.writer)
+        # Take out the global cache-fill guard to see the per-user pin alone
+        cache.delete(ITEM_WRITTEN_KEY)
+
+        self.assertEqual(self.get_name(self.writer), "Fresh name")
+        invalidate_items([self.item.pk])
+        self.assertEqual(self.get_name(self.reader), "Stale name")
+
+        cache.delete(user_pin_key(self.writer.pk))
+        invalidate_items([self.item.pk])
+        self.assertEqual(self.get_name(self.writer), "Stale name")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_without_replicas(self):
+        """Test writes don't pin the user when there are no replicas to avoid"""
+        self.write(self.writer)
+        self.assertIsNone(cache.get(user_pin_key(self.writer.pk)))
+
+    def test_cache_fills_after_write_use_primary(self):
+        """Test a payload cached right after a write is read from the primary"""
+        self.write(self.writer)
+        self.assertEqual(self.get_name(self.reader), "Fresh name")
+
+    def test_transactions_read_from_primary(self):
+        """Test reads in a transaction, locking reads and pinned blocks use the primary"""
+        with transaction.atomic():
+            self.assertEqual(Item.objects.all().db, PRIMARY)
+        self.assertEqual(Item.objects.select_for_update().db, PRIMARY)
+        with pin_to_primary():
+            self.assertEqual(Item.objects.all().db, PRIMARY)
+        self.assertIn(Item.objects.all().db, REPLICAS)
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from inventory_app.models import Item
+from inventory_app.representations import item_rows, represent_item, represent_items
+from inventory_app.serializers import ItemSerializer
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemRepresentationTest(TestCase):
+    """Test the fast read path renders exactly like ItemSerializer"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        ItemFactory.create_batch(3, created_by=self.user)
+        ItemFactory(created_by=self.user, description=None, price=Decimal('0'), quantity=0)
+        ItemFactory(created_by=self.user, price=Decimal('99999999.99'))
+        item = ItemFactory(created_by=self.user)
+        Item.objects.filter(pk=item.pk).update(
+            created_at=datetime(2024, 2, 29, 23, 59, 59, 123456, tzinfo=dt_timezone.utc)
+        )
+
+    def test_rows_match_serializer(self):
+        """Test represent_items matches ItemSerializer for every item"""
+        queryset = Item.objects.order_by('id')
+        expected = [dict(data) for data in ItemSerializer(queryset, many=True).data]
+        self.assertEqual(represent_items(queryset), expected)
+
+    def test_instance_matches_serializer(self):
+        """Test represent_item matches ItemSerializer for a model instance"""
+        for item in Item.objects.select_related('created_by'):
+            self.assertEqual(represent_item(item), dict(ItemSerializer(item).data))
+
+    def test_rows_join_created_by(self):
+        """Test the row projection does not query per item"""
+        with self.assertNumQueries(1):
+            list(item_rows(Item.objects.all()))
+
+
+class ItemReadPathTest(APITestCase):
+    """Test the list and detail endpoints still render ItemSerializer's shape"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        ItemFactory.create_batch(3, created_by=self.user)
+        cache.clear()
+
+    def test_list_and_detail(self):
+        expected = [dict(data) for data in ItemSerializer(Item.objects.all(), many=True).data]
+        self.assertEqual(self.client.get(reverse("item-list")).data['results'], expected)
+        self.assertEqual(self.client.get(f"{reverse('item-list')}?cursor=").data['results'], expected)
+
+        detail = self.client.get(reverse("item-detail", kwargs={"pk": expected[0]['id']})).data
+        self.assertEqual(detail, expected[0])
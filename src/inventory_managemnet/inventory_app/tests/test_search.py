@@ -0,0 +1,81 @@
+from decimal import Decimal
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.core.cache import cache
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+class ItemSearchTest(APITestCase):
+    """Test search and filters on the items list"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.other = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        ItemFactory(name="Red widget", description="A small widget", quantity=5, price=Decimal('2.50'), created_by=self.user)
+        ItemFactory(name="Blue widget", description="A large widget", quantity=50, price=Decimal('12.00'), created_by=self.user)
+        ItemFactory(name="Gadget", description="Pairs with any red widget", quantity=500, price=Decimal('99.99'), created_by=self.other)
+        ItemFactory(name="Sprocket", description="Steel", quantity=0, price=Decimal('0.75'), created_by=self.other)
+
+        self.list_url = reverse("item-list")
+
+        # Cached counts would otherwise leak between tests
+        cache.clear()
+
+    def names(self, **params):
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+
+    def test_name_prefix(self):
+        """Test prefix search is case-insensitive and only matches the name"""
+        self.assertEqual(self.names(name_prefix='red'), ["Red widget"])
+        self.assertEqual(self.names(name_prefix='widget'), [])
+
+    def test_substring_search(self):
+        """Test substring search matches name or description"""
+        self.assertCountEqual(self.names(search='WIDGET'), ["Red widget", "Blue widget", "Gadget"])
+        self.assertEqual(self.names(search='stee'), ["Sprocket"])
+
+    def test_full_text_search_ranks_name_matches_first(self):
+        """Test q requires every term and ranks name matches above description matches"""
+        self.assertEqual(self.names(q='red widget'), ["Red widget", "Gadget"])
+
+    def test_ranges(self):
+        """Test quantity and price ranges are inclusive"""
+        self.assertCountEqual(self.names(min_quantity=5, max_quantity=50), ["Red widget", "Blue widget"])
+        self.assertCountEqual(self.names(min_price='12', max_price='99.99'), ["Blue widget", "Gadget"])
+
+    def test_created_by(self):
+        """Test filtering on the owner's username"""
+        self.assertCountEqual(self.names(created_by=self.other.username), ["Gadget", "Sprocket"])
+
+    def test_invalid_number(self):
+        """Test a malformed range value is rejected"""
+        for params in ({'min_quantity': 'many'}, {'max_price': 'NaN'}):
+            response = self.client.get(self.list_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filtered_count_and_links(self):
+        """Test a filtered page counts only matches and its links keep the filter"""
+        ItemFactory.create_batch(12, created_by=self.other, quantity=7)
+        response = self.client.get(self.list_url, {'min_quantity': 7, 'max_quantity': 7})
+
+        self.assertEqual(response.data['count'], 12)
+        self.assertTrue(response.data['count_exact'])
+        self.assertIn('min_quantity=7', response.data['next'])
+        self.assertIn('page=2', response.data['next'])
+
+        page_two = self.client.get(response.data['next'])
+        self.assertEqual(len(page_two.data['results']), 2)
+
+    def test_cursor_with_filter(self):
+        """Test cursor pages apply filters, but not ranked search"""
+        response = self.client.get(self.list_url, {'cursor': '', 'search': 'widget', 'count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+
+        response = self.client.get(self.list_url, {'cursor': '', 'q': 'widget'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,103 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from inventory_app.item_cache import get_item_payload, set_item_payload
+from inventory_app.models import Item
+from inventory_app.representations import represent_item
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+def update_queries(queries):
+    return [query for query in queries if query['sql'].startswith('UPDATE')]
+
+
+class ItemStockTest(APITestCase):
+    """Test the atomic stock adjustment endpoints"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.item = ItemFactory(created_by=self.user, quantity=5)
+        self.other = ItemFactory(created_by=self.user, quantity=1)
+        self.stock_url = reverse("item-stock", kwargs={"pk": self.item.pk})
+        self.batch_url = reverse("item-stock-batch")
+        cache.clear()
+
+    def quantity(self, item):
+        item.refresh_from_db()
+        return item.quantity
+
+    def test_increment_and_decrement(self):
+        """Test deltas are added in a single UPDATE without reading the item"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.stock_url, {"delta": 3}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"id": self.item.pk, "delta": 3})
+        self.assertEqual(len(update_queries(queries)), 1)
+        self.assertFalse(any(query['sql'].startswith('SELECT') for query in queries))
+
+        self.client.post(self.stock_url, {"delta": -8}, format="json")
+        self.assertEqual(self.quantity(self.item), 0)
+
+    def test_guard_rejects_negative_stock(self):
+        """Test a decrement below zero is refused unless allow_negative is set"""
+        response = self.client.post(self.stock_url, {"delta": -6}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.quantity(self.item), 5)
+
+        response = self.client.post(self.stock_url, {"delta": -6, "allow_negative": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.quantity(self.item), -1)
+
+    def test_invalid_and_missing(self):
+        """Test a zero delta is rejected and an unknown item is a 404"""
+        response = self.client.post(self.stock_url, {"delta": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse("item-stock", kwargs={"pk": 99999})
+        response = self.client.post(url, {"delta": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_payload_invalidated(self):
+        """Test the cached item is dropped so the next read sees the new quantity"""
+        set_item_payload(represent_item(self.item))
+        self.client.post(self.stock_url, {"delta": 2}, format="json")
+        self.assertIsNone(get_item_payload(self.item.pk))
+
+        response = self.client.get(reverse("item-detail", kwargs={"pk": self.item.pk}))
+        self.assertEqual(response.data['quantity'], 7)
+
+    def test_batch(self):
+        """Test a batch runs as one UPDATE and sums deltas of the same item"""
+        adjustments = [
+            {"id": self.item.pk, "delta": -2},
+            {"id": self.other.pk, "delta": 4},
+            {"id": self.item.pk, "delta": -1},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.batch_url, {"adjustments": adjustments}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(update_queries(queries)), 1)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': self.item.pk, 'delta': -3, 'status': 200}, {'id': self.other.pk, 'delta': 4, 'status': 200}],
+        )
+        self.assertEqual(self.quantity(self.item), 2)
+        self.assertEqual(self.quantity(self.other), 5)
+
+    def test_batch_is_all_or_nothing(self):
+        """Test one failing item leaves every quantity unchanged"""
+        adjustments = [
+            {"id": self.item.pk, "delta": -1},
+            {"id": self.other.pk, "delta": -2},
+            {"id": 99999, "delta": 1},
+        ]
+        response = self.client.post(self.batch_url, {"adjustments": adjustments}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual([r['status'] for r in response.data['results']], [None, 409, 404])
+        self.assertEqual(self.quantity(self.item), 5)
+        self.assertEqual(self.quantity(self.other), 1)
+        self.assertFalse(Item.objects.filter(pk=99999).exists())
@@ -0,0 +1,122 @@
+import io
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from inventory_app.models import Item, ItemTombstone
+from inventory_app.sync import ITEM, encode_watermark
+from inventory_app.tests.factories import UserFactory, ItemFactory
+
+
+@override_settings(ITEM_SYNC_LAG=0)
+class ItemChangesTest(APITestCase):
+    """Test the delta sync endpoint"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.items = ItemFactory.create_batch(5, created_by=self.user)
+        self.changes_url = reverse("item-changes")
+
+    def sync(self, since=None, **params):
+        """
+        Follow `next` to the end; return (item ids, deleted ids, watermark, responses)
+        """
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(self.changes_url, params)
+        responses = [response]
+        while response.data['more']:
+            response = self.client.get(response.data['next'])
+            responses.append(response)
+        items = [item['id'] for response in responses for item in response.data['items']]
+        deleted = [pk for response in responses for pk in response.data['deleted']]
+        return items, deleted, response.data['watermark'], responses
+
+    def test_full_sync_in_chunks(self):
+        """Test a first sync returns every item once, a chunk at a time"""
+        items, deleted, _, responses = self.sync(limit=2)
+        self.assertEqual(sorted(items), sorted(item.pk for item in self.items))
+        self.assertEqual(deleted, [])
+        self.assertEqual(len(responses), 3)
+
+    def test_changes_since_watermark(self):
+        """Test only updates, creates and deletes after the watermark are returned"""
+        _, _, watermark, _ = self.sync()
+
+        updated, removed = self.items[0], self.items[1]
+        updated.quantity += 1
+        updated.save()
+        removed_pk = removed.pk
+        removed.delete()
+        created = ItemFactory(created_by=self.user)
+
+        items, deleted, watermark, _ = self.sync(watermark)
+        self.assertEqual(items, [updated.pk, created.pk])
+        self.assertEqual(deleted, [removed_pk])
+
+        items, deleted, _, _ = self.sync(watermark)
+        self.assertEqual((items, deleted), ([], []))
+
+    def test_latest_change_wins(self):
+        """Test an item updated then deleted in one chunk is only reported deleted"""
+        _, _, watermark, _ = self.sync()
+        item = self.items[0]
+        item.quantity += 1
+        item.save()
+        item_pk = item.pk
+        item.delete()
+
+        items, deleted, _, _ = self.sync(watermark)
+        self.assertEqual((items, deleted), ([], [item_pk]))
+
+    def test_bulk_deletes_leave_tombstones(self):
+        """Test deletes through the bulk endpoint are synced too"""
+        _, _, watermark, _ = self.sync()
+        rows = [{"op": "delete", "id": item.pk} for item in self.items[:2]]
+        self.client.post(reverse("item-bulk"), rows, format="json")
+
+        _, deleted, _, _ = self.sync(watermark)
+        self.assertEqual(sorted(deleted), sorted(item.pk for item in self.items[:2]))
+
+    def test_queries(self):
+        """Test a chunk costs one item query and one tombstone query"""
+        for item in self.items[:3]:
+            item.delete()
+        with self.assertNumQueries(2):
+            self.client.get(self.changes_url, {'limit': 3})
+
+    @override_settings(ITEM_SYNC_LAG=60)
+    def test_lag(self):
+        """Test changes younger than ITEM_SYNC_LAG are held back"""
+        items, _, _, _ = self.sync()
+        self.assertEqual(items, [])
+
+        Item.objects.update(updated_at=timezone.now() - timedelta(minutes=2))
+        items, _, _, _ = self.sync()
+        self.assertEqual(len(items), 5)
+
+    def test_invalid_requests(self):
+        """Test bad watermarks and limits are rejected"""
+        response = self.client.get(self.changes_url, {'since': 'not-a-watermark'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.changes_url, {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        expired = encode_watermark(timezone.now() - timedelta(days=365), 0, ITEM)
+        response = self.client.get(self.changes_url, {'since': expired})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_prune_tombstones(self):
+        """Test tombstones past the retention period are pruned"""
+        old, recent = self.items[0].pk, self.items[1].pk
+        Item.objects.filter(pk__in=[old, recent]).delete()
+        ItemTombstone.objects.filter(item_id=old).update(deleted_at=timezone.now() - timedelta(days=365))
+
+        stdout = io.StringIO()
+        call_command('prune_item_tombstones', stdout=stdout)
+        self.assertIn("Pruned 1 tombstones", stdout.getvalue())
+        self.assertEqual(list(ItemTombstone.objects.values_list('item_id', flat=True)), [recent])
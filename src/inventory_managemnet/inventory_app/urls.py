@@ -1,14 +1,35 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterView, ItemListCreateView, ItemDetailView
+from .async_views import AsyncItemListView, AsyncItemDetailView, AsyncItemStockView, AsyncItemFeedView
+from .views import (
+    RegisterView, TokenRevokeView, ItemListCreateView, ItemBulkView, ItemExportView, ItemStockView, ItemStockBatchView,
+    ItemMovementView, ItemChangesView, ItemDetailView, CacheStatsView, DatabaseStatsView,
+)
 
 urlpatterns = [
     # Authentication endpoints
     path('register/', RegisterView.as_view(), name='register'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
     
     # Item endpoints
     path('items/', ItemListCreateView.as_view(), name='item-list'),
+    path('items/bulk/', ItemBulkView.as_view(), name='item-bulk'),
+    path('items/export/', ItemExportView.as_view(), name='item-export'),
+    path('items/changes/', ItemChangesView.as_view(), name='item-changes'),
+    path('items/stock/', ItemStockBatchView.as_view(), name='item-stock-batch'),
     path('items/<int:pk>/', ItemDetailView.as_view(), name='item-detail'),
+    path('items/<int:pk>/stock/', ItemStockView.as_view(), name='item-stock'),
+    path('items/<int:pk>/movements/', ItemMovementView.as_view(), name='item-movements'),
+
+    # Async (ASGI) item reads and the live feed
+    path('async/items/', AsyncItemListView.as_view(), name='async-item-list'),
+    path('async/items/feed/', AsyncItemFeedView.as_view(), name='async-item-feed'),
+    path('async/items/<int:pk>/', AsyncItemDetailView.as_view(), name='async-item-detail'),
+    path('async/items/<int:pk>/stock/', AsyncItemStockView.as_view(), name='async-item-stock'),
+
+    # Internal endpoints
+    path('internal/cache/', CacheStatsView.as_view(), name='internal-cache-stats'),
+    path('internal/db/', DatabaseStatsView.as_view(), name='internal-db-stats'),
 ]
\ No newline at end of file
@@ -1,35 +1,163 @@
 import logging
 from rest_framework.views import APIView
 from rest_framework import status, permissions
-from .serializers import UserSerializer, ItemSerializer
+from rest_framework.parsers import JSONParser
+from .authentication import revoke_user_tokens
+from .bulk import apply_bulk
+from .parsers import NDJSONParser
+from .serializers import (
+    UserSerializer, ItemSerializer, StockAdjustmentSerializer, StockBatchSerializer, StockMovementSerializer,
+)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .counting import get_item_count
+from .db_pool import pool_stats
+from .export import EXPORT_FORMATS, export_rows
+from .item_cache import (
+    cache_stats, get_generation, get_item_payload, get_list_page, get_or_compute_item_payload, items_recently_written,
+    list_page_key, set_list_page,
+)
+from .ledger import append_movement, parse_as_of, quantity_as_of
+from .metrics import render as render_metrics
 from .models import Item
-from django.core.cache import cache
-from django.http import Http404
+from .pagination import InvalidCursor, paginate_by_cursor
+from .representations import format_datetime, item_rows, represent_item, represent_row, represent_rows, row_position
+from .routers import pin_to_primary
+from .search import InvalidFilter, filter_items, is_filtered
+from .stock import adjust_stock, merge_adjustments
+from .sync import ExpiredWatermark, InvalidWatermark, changes_since
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_etags, urlencode
 
 
 logger =  logging.getLogger('inventory_app')
 
+
+def _page_link(request, **params):
+    query = request.query_params.copy()
+    for key, value in params.items():
+        query[key] = value
+    return f"{request.path}?{urlencode(query, doseq=True)}"
+
+
+def etag_matches(request, etag):
+    """
+    Weak If-None-Match comparison, as RFC 9110 requires for GET
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    return '*' in candidates or etag.removeprefix('W/') in [c.removeprefix('W/') for c in candidates]
+
+
+# Headers that make a request conditional on the item's current version
+CONDITIONAL_HEADERS = ('If-Match', 'If-None-Match', 'If-Modified-Since', 'If-Unmodified-Since')
+
+
+def is_conditional(request):
+    return any(header in request.headers for header in CONDITIONAL_HEADERS)
+
+
+def has_write_precondition(request):
+    return 'If-Match' in request.headers or 'If-Unmodified-Since' in request.headers
+
+
+def item_validators(pk, updated_at):
+    """
+    `(etag, last_modified)` of an item version: every write moves `updated_at`
+    """
+    return f'"{pk}-{round(updated_at.timestamp() * 1000000)}"', int(updated_at.timestamp())
+
+
+def payload_validators(payload):
+    return item_validators(payload['id'], parse_datetime(payload['updated_at']))
+
+
+def with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _wants_count(request):
+    return request.query_params.get('count', '').lower() in ('1', 'true', 'yes')
+
 class RegisterView(APIView):
     permission_classes = [ permissions.AllowAny ]
 
     def post(self, request):
         serializer = UserSerializer(data = request.data)
         try:
-            logger.info(f"User registration attempt: {request.data.get('username')}")
+            logger.info("User registration attempt: %s", request.data.get('username'))
             if serializer.is_valid():
                 serializer.save()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"User registration failed: {str(e)}")
+            logger.error("User registration failed: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class TokenRevokeView(APIView):
+    """
+    Revoke every token issued to the requesting user so far
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        revoke_user_tokens(request.user.pk)
+        logger.info("Tokens revoked for user %s", request.user.pk)
+        return Response({"message": "Tokens revoked"}, status=status.HTTP_200_OK)
+
+
 class ItemListCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        items = Item.objects.all()
+        """
+        List pages are cached under the item generation, so any item write
+        makes every page stale at once. Unchanged pages answer a matching
+        If-None-Match with 304.
+        """
+        cache_key = list_page_key(request.query_params)
+        cached = get_list_page(cache_key)
+        if cached is None:
+            with pin_to_primary(items_recently_written()):
+                response = self.get_page(request)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = set_list_page(cache_key, response.data)
+        else:
+            etag, data = cached
+            response = Response(data)
+
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+    def get_page(self, request):
+        """
+        One page of items, filtered as described in `inventory_app.search`
+        """
+        try:
+            items, ranked = filter_items(Item.objects.all(), request.query_params)
+        except InvalidFilter as e:
+            logger.warning("Invalid item list filter: %s", e)
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if 'cursor' in request.query_params:
+            if ranked:
+                return Response(
+                    {"detail": "Cursor pagination can't be combined with q, use page"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return self.get_cursor_page(request, items)
 
         page = request.query_params.get('page',1)
         try:
@@ -37,91 +165,391 @@ class ItemListCreateView(APIView):
         except ValueError:
             page = 1
         
-        page_size = 10
+        page_size = api_settings.PAGE_SIZE
         start = (page - 1) * page_size
         end = start + page_size
-        paginated_items = items[start:end]
-        serializer = ItemSerializer(paginated_items, many=True)
+        results = represent_rows(item_rows(items)[start:end])
 
-        total_items = items.count()
+        if is_filtered(request.query_params):
+            total_items, count_exact = items.count(), True
+        else:
+            total_items, count_exact = get_item_count()
         total_pages = (total_items + page_size - 1) // page_size
 
-        logger.info(f"Retrieved item list, page {page} of {total_pages}")
+        logger.info("Retrieved item list, page %s of %s", page, total_pages)
 
         return Response({
             'count': total_items,
-            'next': f"/api/items/?page={page+1}" if page < total_pages else None,
-            'previous': f"/api/items/?page={page-1}" if page > 1 else None,
-            'results': serializer.data
+            'count_exact': count_exact,
+            'next': _page_link(request, page=page+1) if page < total_pages else None,
+            'previous': _page_link(request, page=page-1) if page > 1 else None,
+            'results': results
         })
+
+    def get_cursor_page(self, request, items):
+        """
+        Keyset pagination: `?cursor=` (empty for the first page) seeks on
+        (updated_at, id). The total count is only computed with `?count=true`.
+        """
+        try:
+            page = paginate_by_cursor(
+                item_rows(items), request.query_params.get('cursor'),
+                api_settings.PAGE_SIZE, position=row_position,
+            )
+        except InvalidCursor:
+            logger.warning("Invalid item list cursor")
+            return Response({"detail": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {}
+        if _wants_count(request) and is_filtered(request.query_params):
+            data['count'], data['count_exact'] = items.count(), True
+        elif _wants_count(request):
+            data['count'], data['count_exact'] = get_item_count()
+        data.update({
+            'next': _page_link(request, cursor=page.next_cursor) if page.next_cursor else None,
+            'previous': _page_link(request, cursor=page.previous_cursor) if page.previous_cursor else None,
+            'results': represent_rows(page.items)
+        })
+        return Response(data)
     
     def post(self, request):
         serializer = ItemSerializer(data=request.data)
         try:
             if serializer.is_valid():
-                logger.info(f"Creating new item: {serializer.validated_data.get('name')}")
+                logger.info("Creating new item: %s", serializer.validated_data.get('name'))
                 serializer.save(created_by=request.user)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
-            logger.warning(f"Invalid item data: {serializer.errors}")
+            logger.warning("Invalid item data: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Item creation failed: {str(e)}")
+            logger.error("Item creation failed: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
 
+class ItemChangesView(APIView):
+    """
+    Items changed and deleted since `?since=<watermark>`, for delta sync.
+
+    Follow `next` while `more` is true, then keep the last `watermark` for
+    the next sync. Leave `since` out to start from scratch.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', settings.ITEM_SYNC_CHUNK_SIZE))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= settings.ITEM_SYNC_CHUNK_SIZE:
+            return Response(
+                {"detail": f"limit must be between 1 and {settings.ITEM_SYNC_CHUNK_SIZE}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            # A replica lagging more than ITEM_SYNC_LAG could hide changes
+            # behind the new watermark for good
+            with pin_to_primary():
+                changes = changes_since(request.query_params.get('since') or None, limit)
+        except InvalidWatermark:
+            logger.warning("Invalid sync watermark")
+            return Response({"detail": "Invalid watermark"}, status=status.HTTP_400_BAD_REQUEST)
+        except ExpiredWatermark:
+            return Response(
+                {"detail": "Watermark is older than the deletes kept for sync, start again without since"},
+                status=status.HTTP_410_GONE,
+            )
+
+        return Response({
+            'items': changes.items,
+            'deleted': changes.deleted,
+            'watermark': changes.watermark,
+            'more': changes.more,
+            'next': _page_link(request, since=changes.watermark) if changes.more else None,
+        })
+
+
+class ItemBulkView(APIView):
+    """
+    Create, update and delete many items in one transaction.
+
+    Accepts a JSON array or an NDJSON body of rows such as
+    `{"op": "update", "id": 3, "quantity": 7}`. Nothing is written unless
+    every row is valid; the response holds one result per row.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"detail": "Expected a JSON array or NDJSON body"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.ITEM_BULK_MAX_ROWS:
+            return Response(
+                {"detail": f"A batch may contain at most {settings.ITEM_BULK_MAX_ROWS} rows"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        applied, results = apply_bulk(rows, request.user)
+        if not applied:
+            logger.warning("Rejected bulk item batch of %s rows", len(rows))
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class ItemExportView(APIView):
+    """
+    Stream the whole inventory as NDJSON (default) or CSV with `?type=csv`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export type, use one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        content_type, stream = EXPORT_FORMATS[export_type]
+        logger.info("Exporting items as %s", export_type)
+        response = StreamingHttpResponse(
+            stream(export_rows(settings.ITEM_EXPORT_CHUNK_SIZE)), content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="items.{export_type}"'
+        return response
+
+
+class ItemStockView(APIView):
+    """
+    GET: the item's quantity from the stock ledger, as of `?at=` (ISO 8601,
+    default now), including movements not folded yet.
+
+    POST: add `delta` to the quantity in a single UPDATE, without reading the
+    item. A decrement that would take the quantity below zero gets 409
+    unless `allow_negative` is true.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        at = parse_as_of(request.query_params.get('at'))
+        if at is None:
+            return Response({"detail": "at must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not Item.objects.filter(pk=pk).exists():
+            return Response({"detail": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"id": pk, "at": format_datetime(at), "quantity": quantity_as_of(pk, at)})
+
+    def post(self, request, pk):
+        serializer = StockAdjustmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        delta = serializer.validated_data['delta']
+        applied, failures = adjust_stock({pk: delta}, serializer.validated_data['allow_negative'], request.user)
+        if not applied:
+            status_code, detail = failures[pk]
+            return Response({"detail": detail}, status=status_code)
+        return Response({"id": pk, "delta": delta}, status=status.HTTP_200_OK)
+
+
+class ItemStockBatchView(APIView):
+    """
+    Apply `{"adjustments": [{"id": 3, "delta": -2}, ...]}` in a single UPDATE.
+
+    Deltas for the same item are summed. Nothing is changed unless every
+    item exists and has enough stock; the response holds one result per item.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = StockBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        deltas = merge_adjustments(
+            (adjustment['id'], adjustment['delta']) for adjustment in serializer.validated_data['adjustments']
+        )
+        applied, failures = adjust_stock(deltas, serializer.validated_data['allow_negative'], request.user)
+
+        results = []
+        for pk, delta in deltas.items():
+            result = {'id': pk, 'delta': delta, 'status': status.HTTP_200_OK if applied else None}
+            if pk in failures:
+                result['status'], detail = failures[pk]
+                result['errors'] = {'detail': detail}
+            results.append(result)
+
+        if not applied:
+            # 409 (insufficient stock) takes precedence over 404 and 400
+            return Response({"results": results}, status=max(code for code, _ in failures.values()))
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class ItemMovementView(APIView):
+    """
+    Append a movement to the stock ledger: `{"delta": -2, "reason": "sale"}`.
+
+    This is an INSERT that never locks the item row, for hot items. The
+    quantity follows once `fold_stock_movements` has run; there is no
+    non-negative guard, use the stock endpoint for that.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        serializer = StockMovementSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not Item.objects.filter(pk=pk).exists():
+            return Response({"detail": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            with transaction.atomic():
+                movement = append_movement(pk, user=request.user, **serializer.validated_data)
+        except IntegrityError:
+            # The item was deleted in between
+            return Response({"detail": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(StockMovementSerializer(movement).data, status=status.HTTP_201_CREATED)
+
+
 class ItemDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_object(self, pk):
-        cache_key = f'item_{pk}'
-        item = cache.get(cache_key)
-
-        if item is None:
-            try:
-                item = Item.objects.get(pk=pk)
-                cache.set(cache_key, item, timeout=60*15)
-                logger.debug(f"item {pk} fetched from database and cached")
-            except Item.DoesNotExist:
-                logger.warning(f"Item {pk} not found")
-                raise Http404("Item not found")
+    def get_payload(self, pk):
+        """
+        Rendered item from the cache, or from one query on a miss
+        """
+        payload, computed = get_or_compute_item_payload(pk, lambda: self.load_payload(pk))
+        if computed:
+            logger.debug("item %s fetched from database and cached", pk)
         else:
-            logger.debug(f"Item {pk} fetched from cache")
-        return item
+            logger.debug("Item %s fetched from cache", pk)
+        return payload
+
+    def load_payload(self, pk):
+        row = item_rows(Item.objects.filter(pk=pk)).first()
+        if row is None:
+            logger.warning("Item %s not found", pk)
+            raise Http404("Item not found")
+        return represent_row(row)
+
+    def load_validators(self, pk):
+        """
+        Validators of the stored item, from the primary key index alone
+        """
+        updated_at = Item.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            logger.warning("Item %s not found", pk)
+            raise Http404("Item not found")
+        return item_validators(pk, updated_at)
+
+    def get_object(self, pk, lock=False):
+        items = Item.objects.select_related('created_by')
+        if lock:
+            items = items.select_for_update(of=('self',))
+        try:
+            return items.get(pk=pk)
+        except Item.DoesNotExist:
+            logger.warning("Item %s not found", pk)
+            raise Http404("Item not found")
     
     def get(self, request, pk):
+        """
+        Conditional requests are answered from the cached payload or the
+        item's `updated_at`, without building the payload when it is unchanged.
+        """
         try:
-            item = self.get_object(pk)
-            serializer = ItemSerializer(item)
-            return Response(serializer.data)
+            payload = None
+            if is_conditional(request):
+                payload = get_item_payload(pk)
+                validators = payload_validators(payload) if payload is not None else self.load_validators(pk)
+                response = get_conditional_response(request, *validators)
+                if response is not None:
+                    return with_validators(response, *validators)
+            if payload is None:
+                payload = self.get_payload(pk)
+            return with_validators(Response(payload), *payload_validators(payload))
         except Http404:
             return Response({"detail": "Item not found"}, status=status.HTTP_400_BAD_REQUEST)
     
     def put(self, request, pk):
+        """
+        With If-Match or If-Unmodified-Since, the update only goes ahead if the
+        item is still at that version; the row stays locked between the check
+        and the write. Other updates need no transaction.
+        """
         try:
-            item = self.get_object(pk)
-            serializer = ItemSerializer(item, data=request.data)
-            if serializer.is_valid():
-                logger.info(f"Updating item {pk}")
-                serializer.save()
-
-                #update cache with new data
-                cache_key = f"item_{pk}"
-                cache.set(cache_key, serializer.instance, timeout=60*15)
-                return Response(serializer.data)
+            if has_write_precondition(request):
+                with transaction.atomic():
+                    item = self.get_object(pk, lock=True)
+                    response = get_conditional_response(request, *item_validators(item.pk, item.updated_at))
+                    if response is not None:
+                        logger.warning("Update of item %s rejected, precondition failed", pk)
+                        return response
+                    serializer = self.save_item(item, request.data)
+            else:
+                serializer = self.save_item(self.get_object(pk), request.data)
         except Http404:
             return Response({"detail": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+        if serializer.errors:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Not cached here: a concurrent PUT may have committed since, and its
+        # payload must not be overwritten. The commit dropped the entry and the
+        # next read refills it.
+        payload = represent_item(serializer.instance)
+        return with_validators(Response(payload), *item_validators(pk, serializer.instance.updated_at))
+
+    def save_item(self, item, data):
+        """
+        Validate `data` and save it onto `item`; return the serializer
+        """
+        serializer = ItemSerializer(item, data=data)
+        if serializer.is_valid():
+            logger.info("Updating item %s", item.pk)
+            serializer.save()
+        else:
+            logger.warning("Invalid item data: %s", serializer.errors)
+        return serializer
     
     def delete(self, request, pk):
         try:
             item = self.get_object(pk)
             item_id = item.id
             item.delete()
-            
-            #delete from cache
-            cache_key = f"item_{item_id}"
-            cache.delete(cache_key)
 
-            logger.info(f"Deleted item {item_id}")
+            logger.info("Deleted item %s", item_id)
             return Response({"message": "Item deleted successfully"}, status=status.HTTP_200_OK)
         except Http404:
-            return Response({"detail": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({"detail": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class CacheStatsView(APIView):
+    """
+    Item cache counters of the process that serves the request
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({**cache_stats(), 'generation': get_generation()})
+
+
+class DatabaseStatsView(APIView):
+    """
+    Database connection counters of the process that serves the request
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(pool_stats())
+
+
+def metrics_view(request):
+    """
+    Prometheus exposition of `inventory_app.metrics`, for scrapers rather than API clients
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
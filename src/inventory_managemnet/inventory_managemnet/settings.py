@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+import django
+from django.core.exceptions import ImproperlyConfigured
+from decouple import Csv, config
 from datetime import timedelta 
 
 
@@ -44,11 +46,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'inventory_app.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'inventory_app.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,20 +89,152 @@ DATABASES = {
         'HOST': config('DB_HOST'),
         'USER': config('DB_USER'),
         'PORT': config('DB_PORT'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {},
     }
 }
 
+# With DB_CONN_MAX_AGE, connections are kept open that many seconds and checked
+# before reuse. It stays 0 under ASGI, where Django opens a connection per
+# async context and persistent ones leak; gunicorn.conf.py sets 60 for WSGI.
+# DB_POOL_MAX_SIZE gives every worker process a psycopg pool of that size, so
+# the server sees at most workers x DB_POOL_MAX_SIZE connections. Callers wait
+# up to DB_POOL_TIMEOUT seconds for a free connection; idle ones above
+# DB_POOL_MIN_SIZE close after DB_POOL_MAX_IDLE. Pools need Django 5.1 and
+# psycopg-pool, so this is unused until Django is upgraded from the pinned 4.2.
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+DB_POOL_MAX_IDLE = config('DB_POOL_MAX_IDLE', default=60*10, cast=float)
+
+if DB_POOL_MAX_SIZE:
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured("DB_POOL_MAX_SIZE needs Django 5.1 or newer")
+    from psycopg_pool import ConnectionPool
+
+    # The pool replaces persistent connections and does its own health checks
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': DB_POOL_TIMEOUT,
+        'max_idle': DB_POOL_MAX_IDLE,
+        'check': ConnectionPool.check_connection,
+    }
+
+# Read replicas, as host or host:port entries sharing the primary's name and
+# credentials. Reads go to a random replica; a user's reads stay on the
+# primary for DB_REPLICA_PIN_SECONDS after they write (inventory_app.routers).
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
 
+DATABASE_ROUTERS = ['inventory_app.routers.ReplicaRouter']
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=5, cast=int)
+
+
+# `default` keeps a small in-process LRU in front of Redis (see
+# inventory_app.cache_backends). Workers evict each other's local copies over
+# Redis pub/sub; CACHE_LOCAL_MAX_ENTRIES=0 turns the local tier off.
 CACHES = {
     'default': {
+        'BACKEND': 'inventory_app.cache_backends.TwoTierCache',
+        'OPTIONS': {
+            'REMOTE': 'redis',
+            'LOCAL_MAX_ENTRIES': config('CACHE_LOCAL_MAX_ENTRIES', default=1024, cast=int),
+            'LOCAL_TIMEOUT': config('CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+            'INVALIDATION_CHANNEL': 'inventory-cache-invalidation',
+        },
+    },
+    'redis': {
         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
         'LOCATION': 'redis://127.0.0.1:6379/1',
-    }
+    },
 }
 
+# Item list count: the exact count is cached for this many seconds, and
+# above this many rows (per the Postgres planner) the estimate is served
+# instead of running COUNT(*). Set the threshold to 0 to always count exactly.
+ITEM_COUNT_CACHE_TIMEOUT = config('ITEM_COUNT_CACHE_TIMEOUT', default=60*15, cast=int)
+ITEM_COUNT_ESTIMATE_THRESHOLD = config('ITEM_COUNT_ESTIMATE_THRESHOLD', default=1000000, cast=int)
+
+# Bulk item endpoint: largest accepted batch and rows per INSERT/UPDATE statement
+ITEM_BULK_MAX_ROWS = config('ITEM_BULK_MAX_ROWS', default=5000, cast=int)
+ITEM_BULK_BATCH_SIZE = config('ITEM_BULK_BATCH_SIZE', default=500, cast=int)
+
+# Rows fetched per round trip when streaming the inventory export
+ITEM_EXPORT_CHUNK_SIZE = config('ITEM_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Rows validated and inserted per transaction by `manage.py import_items`
+ITEM_IMPORT_CHUNK_SIZE = config('ITEM_IMPORT_CHUNK_SIZE', default=5000, cast=int)
+
+# Delta sync (`GET /api/items/changes/`): most changes per response, and how
+# far (seconds) behind the clock the watermark stays, so writes still being
+# committed are not skipped. Tombstones of deleted items are kept this many
+# days; older watermarks must resync from scratch.
+ITEM_SYNC_CHUNK_SIZE = config('ITEM_SYNC_CHUNK_SIZE', default=500, cast=int)
+ITEM_SYNC_LAG = config('ITEM_SYNC_LAG', default=5, cast=int)
+ITEM_TOMBSTONE_RETENTION = config('ITEM_TOMBSTONE_RETENTION', default=30, cast=int)
+
+# Live item feed (`GET /api/async/items/feed/`, ASGI only): events cross
+# processes on ITEM_FEED_CHANNEL of the ITEM_FEED_CACHE Redis cache. A client
+# more than ITEM_FEED_QUEUE_SIZE events behind is told to resync. Idle streams
+# get a heartbeat every ITEM_FEED_HEARTBEAT seconds and are closed after
+# ITEM_FEED_MAX_AGE, for the client to reconnect.
+ITEM_FEED_CACHE = config('ITEM_FEED_CACHE', default='redis')
+ITEM_FEED_CHANNEL = config('ITEM_FEED_CHANNEL', default='inventory-item-feed')
+ITEM_FEED_QUEUE_SIZE = config('ITEM_FEED_QUEUE_SIZE', default=100, cast=int)
+ITEM_FEED_HEARTBEAT = config('ITEM_FEED_HEARTBEAT', default=15, cast=float)
+ITEM_FEED_MAX_AGE = config('ITEM_FEED_MAX_AGE', default=60*5, cast=float)
+
+# Cached item list pages; every item write moves pages to new keys, so this
+# only bounds how long unused pages stay in Redis
+ITEM_LIST_CACHE_TIMEOUT = config('ITEM_LIST_CACHE_TIMEOUT', default=60*15, cast=int)
+
+# Stock ledger folding: movements younger than the grace period (seconds) are
+# left for the next fold, which `fold_stock_movements --loop` runs every
+# interval. The lock must outlive the slowest fold.
+STOCK_FOLD_GRACE = config('STOCK_FOLD_GRACE', default=5, cast=int)
+STOCK_FOLD_INTERVAL = config('STOCK_FOLD_INTERVAL', default=60, cast=int)
+STOCK_FOLD_LOCK_TIMEOUT = config('STOCK_FOLD_LOCK_TIMEOUT', default=60*10, cast=int)
+
+# Build request.user from the access token's claims instead of loading it on
+# every request; revocations are stored in the database and checked through
+# the cache. Tokens without the claims are looked up once per
+# JWT_USER_CACHE_TIMEOUT seconds per process.
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=True, cast=bool)
+JWT_USER_CACHE_TIMEOUT = config('JWT_USER_CACHE_TIMEOUT', default=30, cast=int)
+
+# Request instrumentation (inventory_app.instrumentation): every response gets
+# a Server-Timing header, and a PERF_LOG_SAMPLE_RATE share of requests is
+# logged to `inventory_app.performance`. Requests and queries over their
+# threshold (ms) are logged as warnings; slow queries at SLOW_QUERY_SAMPLE_RATE.
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+PERF_LOG_SAMPLE_RATE = config('PERF_LOG_SAMPLE_RATE', default=0.1, cast=float)
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=500, cast=float)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100, cast=float)
+SLOW_QUERY_SAMPLE_RATE = config('SLOW_QUERY_SAMPLE_RATE', default=1.0, cast=float)
+
+# Prometheus metrics at /metrics (inventory_app.metrics). Threads fold their
+# figures into the shared metrics every METRICS_FLUSH_INTERVAL seconds or
+# METRICS_FLUSH_SIZE updates. With METRICS_TOKEN set, scrapers must send it
+# as a bearer token. Multi-process servers also need PROMETHEUS_MULTIPROC_DIR.
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+METRICS_FLUSH_SIZE = config('METRICS_FLUSH_SIZE', default=1000, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'inventory_app.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -121,6 +257,7 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'inventory_app.serializers.ClaimsTokenObtainPairSerializer',
 }
 
 # CORS settings
@@ -139,6 +276,9 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'inventory_app.log_format.JSONFormatter',
+        },
     },
     'handlers': {
         'console': {
@@ -152,6 +292,11 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs/django.log'),
             'formatter': 'verbose',
         },
+        'performance': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
     },
     'loggers': {
         'django': {
@@ -164,6 +309,21 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'inventory_app': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'inventory_app.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'inventory_app.slow_queries': {
+            'handlers': ['performance'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 